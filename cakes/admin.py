@@ -1,12 +1,14 @@
 from django.contrib import admin
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.urls import reverse
 from .models import (
     Cake, CakeSize, CakeImage, CakeComposition,
     CakeFlavor, CakeIngredient, CakeAllergen,
-    NutritionalInfo
+    NutritionalInfo, CakeRecipe, CakeRecipeLine
 )
 from django.utils.safestring import mark_safe
+from commons.images import variant_url
+from supplies.services.nutrition import recipe_nutrition
 
 FALLBACK_IMAGE_URL = "/static/img/no-image.png"  # Ajuste esse caminho conforme seu projeto
 
@@ -63,7 +65,7 @@ class CakeImageInline(admin.TabularInline):
         if obj.image:
             return format_html(
                 '<img src="{}" width="100" style="border-radius: 4px; border: 1px solid #ccc;" />',
-                obj.image.url
+                variant_url(obj.image, "thumb")
             )
         return format_html('<span style="opacity: 0.5;">Sem imagem</span>')
     preview.short_description = "Visualização"
@@ -75,6 +77,51 @@ class NutritionalInfoInline(admin.StackedInline):
     max_num = 1
     show_change_link = False
 
+class CakeRecipeInline(admin.TabularInline):
+    model = CakeRecipe
+    extra = 0
+    fields = ("size", "yield_quantity", "notes")
+    show_change_link = True
+    verbose_name = "Ficha técnica"
+    verbose_name_plural = "Fichas técnicas (edite os insumos pelo link)"
+
+
+class CakeRecipeLineInline(admin.TabularInline):
+    model = CakeRecipeLine
+    extra = 1
+    autocomplete_fields = ["supply_item"]
+    verbose_name = "Insumo"
+    verbose_name_plural = "Insumos"
+
+
+@admin.register(CakeRecipe)
+class CakeRecipeAdmin(admin.ModelAdmin):
+    list_display = ("cake", "size", "yield_quantity", "updated_at")
+    list_filter = ("size",)
+    search_fields = ("cake__name",)
+    list_select_related = ("cake",)
+    autocomplete_fields = ["cake"]
+    inlines = [CakeRecipeLineInline]
+    readonly_fields = ("nutrition_estimate",)
+
+    def nutrition_estimate(self, obj):
+        if not obj.pk:
+            return "—"
+        estimate = recipe_nutrition([obj.pk])[obj.pk]
+        labels = {
+            "calories": "Calorias (kcal)", "protein": "Proteínas (g)", "fat": "Gorduras totais (g)",
+            "saturated_fat": "Gorduras saturadas (g)", "trans_fat": "Gorduras trans (g)",
+            "carbohydrates": "Carboidratos (g)", "sugars": "Açúcares (g)", "fiber": "Fibras (g)", "sodium": "Sódio (mg)",
+        }
+        rows = format_html_join("", "<tr><td>{}</td><td style='text-align:right'>{}</td></tr>", (
+            (labels[name], value) for name, value in estimate["per_cake"].items()
+        ))
+        missing = format_html(
+            "<p style='opacity:0.7'>Sem informação nutricional ou conversão: {}</p>", ", ".join(estimate["missing"])
+        ) if estimate["missing"] else ""
+        return format_html("<table>{}</table>{}", rows, missing)
+    nutrition_estimate.short_description = "Nutrição estimada (por bolo)"
+
 # ---------- Botão: editar composição detalhada ---------- #
 
 def edit_composition_link(self, obj):
@@ -97,6 +144,7 @@ class CakeAdmin(admin.ModelAdmin):
     )
     list_filter = ("category", "customizable", "is_active")
     search_fields = ("name", "description", "internal_notes")
+    list_select_related = ("cover_image",)
     ordering = ("-created_at",)
     readonly_fields = (
         "created_at", "updated_at",
@@ -135,22 +183,24 @@ class CakeAdmin(admin.ModelAdmin):
         CakeCompositionInline,
         CakeSizeInline,
         CakeImageInline,
-        NutritionalInfoInline
+        NutritionalInfoInline,
+        CakeRecipeInline,
     ]
 
     def get_cover_image(self, obj):
-        return obj.images.filter(is_cover=True).first() or obj.images.first()
+        return obj.cover_image
     
     def preview_image(self, obj):
         image = self.get_cover_image(obj)
-        if image:
+        if image and image.image:
             return format_html(
                 '''
                 <a href="{url}" target="_blank">
-                    <img src="{url}" width="400" style="border-radius: 8px; transition: 0.3s;" onmouseover="this.style.transform='scale(1.05)'" onmouseout="this.style.transform='scale(1)'" />
+                    <img src="{src}" width="400" style="border-radius: 8px; transition: 0.3s;" onmouseover="this.style.transform='scale(1.05)'" onmouseout="this.style.transform='scale(1)'" />
                 </a>
                 ''',
-                url=image.url
+                url=image.image.url,
+                src=variant_url(image.image, "medium"),
             )
         return format_html('<img src="{}" width="300" style="opacity: 0.5;" />', FALLBACK_IMAGE_URL)
     preview_image.short_description = "Imagem principal"
@@ -212,7 +262,7 @@ class CakeAdmin(admin.ModelAdmin):
             css_class = "carousel-slide cover" if img.is_cover else "carousel-slide"
             html += f'''
                 <div class="{css_class}">
-                    <img src="{img.image.url}" title="{img.image_type}" />
+                    <img src="{variant_url(img.image, "medium")}" title="{img.image_type}" loading="lazy" />
                 </div>
             '''
 
@@ -270,11 +320,11 @@ class CakeAdmin(admin.ModelAdmin):
     edit_composition_link.short_description = "Composição detalhada"
 
     def thumbnail(self, obj):
-        cover_image = obj.images.filter(is_cover=True).first()
+        cover_image = obj.cover_image
         if cover_image and cover_image.image:
             return format_html(
                 '<img src="{}" width="80" height="60" style="object-fit: cover; border-radius: 6px; border: 1px solid #ccc;" />',
-                cover_image.image.url
+                variant_url(cover_image.image, "thumb")
             )
         return "—"
     thumbnail.short_description = "Imagem"
@@ -313,7 +363,7 @@ class CakeImageAdmin(admin.ModelAdmin):
         if obj.image:
             return format_html(
                 '<img src="{}" width="60" style="border-radius: 4px; border: 1px solid #ccc;" />',
-                obj.image.url
+                variant_url(obj.image, "thumb")
             )
         return "—"
     preview_image.short_description = "Imagem"
@@ -1,6 +1,29 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class CakesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cakes'
+
+    def ready(self):
+        from commons.images import delete_image_variants, generate_image_variants, refresh_cover_image
+        from cakes.models import CakeAllergen, CakeComposition, CakeFlavor, CakeImage, CakeIngredient, CakeSize
+        from cakes.services.export import touch_cake, touch_cake_of_composition
+
+        # Miniaturas das imagens
+        post_save.connect(generate_image_variants, sender=CakeImage, dispatch_uid="cakes_image_variants_save")
+        post_delete.connect(delete_image_variants, sender=CakeImage, dispatch_uid="cakes_image_variants_delete")
+
+        # Ponteiro de capa do dono (cover_image)
+        post_save.connect(refresh_cover_image, sender=CakeImage, dispatch_uid="cakes_cover_image_save")
+        post_delete.connect(refresh_cover_image, sender=CakeImage, dispatch_uid="cakes_cover_image_delete")
+
+        # Exportação incremental: alterações nos filhos atualizam o updated_at do bolo
+        for model, receiver in (
+            (CakeComposition, touch_cake), (CakeSize, touch_cake), (CakeImage, touch_cake),
+            (CakeFlavor, touch_cake_of_composition), (CakeIngredient, touch_cake_of_composition),
+            (CakeAllergen, touch_cake_of_composition),
+        ):
+            post_save.connect(receiver, sender=model, dispatch_uid=f"cakes_export_touch_save_{model.__name__}")
+            post_delete.connect(receiver, sender=model, dispatch_uid=f"cakes_export_touch_delete_{model.__name__}")
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cakes', '0004_remove_cakeimage_url_cakeimage_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cake',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['name', 'id'], name='cake_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cake',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['updated_at', 'id'], name='cake_active_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def keep_single_cover(apps, schema_editor):
+    """Antes da restrição: donos com várias capas ficam só com a mais recente."""
+    CakeImage = apps.get_model("cakes", "CakeImage")
+    repeated = (
+        CakeImage.objects.filter(is_cover=True)
+        .values("cake_id").annotate(total=Count("id")).filter(total__gt=1)
+        .values_list("cake_id", flat=True)
+    )
+    for owner_id in repeated:
+        covers = CakeImage.objects.filter(cake_id=owner_id, is_cover=True).order_by("-pk")
+        CakeImage.objects.filter(pk__in=list(covers.values_list("pk", flat=True)[1:])).update(is_cover=False)
+
+
+def fill_cover_image(apps, schema_editor):
+    Cake = apps.get_model("cakes", "Cake")
+    CakeImage = apps.get_model("cakes", "CakeImage")
+    Cake.objects.update(cover_image_id=Subquery(
+        CakeImage.objects.filter(cake_id=OuterRef("pk")).order_by("-is_cover", "pk").values("pk")[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cakes', '0005_cake_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_single_cover, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cakeimage',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_cover', True)), fields=('cake',), name='cake_image_single_cover'),
+        ),
+        migrations.AddField(
+            model_name='cake',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='cakes.cakeimage', verbose_name='Imagem de capa'),
+        ),
+        migrations.RunPython(fill_cover_image, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:10
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cakes', '0006_cover_image'),
+        ('supplies', '0012_cover_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CakeRecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.CharField(blank=True, choices=[('pequeno', 'Pequeno'), ('medio', 'Médio'), ('grande', 'Grande')], max_length=20, null=True, verbose_name='Tamanho')),
+                ('yield_quantity', models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Rendimento (bolos)')),
+                ('notes', models.TextField(blank=True, verbose_name='Observações')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('cake', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipes', to='cakes.cake')),
+            ],
+            options={
+                'verbose_name': 'Ficha técnica',
+                'verbose_name_plural': 'Fichas técnicas',
+            },
+        ),
+        migrations.CreateModel(
+            name='CakeRecipeLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Quantidade')),
+                ('unit_of_measure', models.CharField(blank=True, choices=[('un', 'Unidade'), ('g', 'Grama'), ('kg', 'Quilograma'), ('ml', 'Mililitro'), ('l', 'Litro'), ('fatia', 'Fatia')], max_length=10, verbose_name='Unidade')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='cakes.cakerecipe')),
+                ('supply_item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recipe_lines', to='supplies.supplyitem', verbose_name='Insumo')),
+            ],
+            options={
+                'verbose_name': 'Insumo da ficha técnica',
+                'verbose_name_plural': 'Insumos da ficha técnica',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cakerecipe',
+            constraint=models.UniqueConstraint(fields=('cake', 'size'), name='cake_recipe_unique_size'),
+        ),
+        migrations.AddConstraint(
+            model_name='cakerecipe',
+            constraint=models.UniqueConstraint(condition=models.Q(('size__isnull', True)), fields=('cake',), name='cake_recipe_unique_default'),
+        ),
+        migrations.AddConstraint(
+            model_name='cakerecipeline',
+            constraint=models.UniqueConstraint(fields=('recipe', 'supply_item'), name='cake_recipe_line_unique_item'),
+        ),
+    ]
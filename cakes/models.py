@@ -2,6 +2,9 @@ import uuid
 from django.db import models
 from django.template.defaultfilters import slugify
 from django.core.validators import MinValueValidator
+from django.core.exceptions import ValidationError
+from commons import UnitOfMeasureEnum
+from commons.units import conversion_factor
 
 
 
@@ -47,6 +50,11 @@ class Cake(models.Model):
     slug = models.SlugField(unique=True, blank=True)
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
     updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+    # Capa (ou, sem capa marcada, a primeira imagem); mantida pelos receivers de CakeImage
+    cover_image = models.ForeignKey(
+        "CakeImage", on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="+", editable=False, verbose_name="Imagem de capa",
+    )
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -56,6 +64,13 @@ class Cake(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            # Chaves da paginação por cursor da listagem (só bolos ativos)
+            models.Index(fields=["name", "id"], name="cake_active_name_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["updated_at", "id"], name="cake_active_updated_idx", condition=models.Q(is_active=True)),
+        ]
+
 # -------------------------
 # Composição
 # -------------------------
@@ -115,6 +130,67 @@ class CakeSize(models.Model):
     serves = models.PositiveIntegerField(verbose_name="Serve (pessoas)")
 
 
+# -------------------------
+# Ficha técnica (receita / BOM)
+# -------------------------
+class CakeRecipe(models.Model):
+    """
+    Insumos consumidos para produzir `yield_quantity` bolos. Uma receita sem tamanho
+    vale para todos; a de um tamanho específico tem prioridade sobre ela.
+    """
+    cake = models.ForeignKey("Cake", on_delete=models.CASCADE, related_name="recipes")
+    size = models.CharField("Tamanho", max_length=20, choices=CakeSizeType.choices, null=True, blank=True)
+    yield_quantity = models.PositiveIntegerField("Rendimento (bolos)", default=1, validators=[MinValueValidator(1)])
+    notes = models.TextField("Observações", blank=True)
+    updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "Ficha técnica"
+        verbose_name_plural = "Fichas técnicas"
+        constraints = [
+            models.UniqueConstraint(fields=["cake", "size"], name="cake_recipe_unique_size"),
+            models.UniqueConstraint(fields=["cake"], condition=models.Q(size__isnull=True), name="cake_recipe_unique_default"),
+        ]
+
+    def __str__(self):
+        return f"Ficha técnica de {self.cake.name} ({self.get_size_display() or 'todos os tamanhos'})"
+
+
+class CakeRecipeLine(models.Model):
+    recipe = models.ForeignKey(CakeRecipe, on_delete=models.CASCADE, related_name="lines")
+    supply_item = models.ForeignKey("supplies.SupplyItem", on_delete=models.PROTECT, related_name="recipe_lines", verbose_name="Insumo")
+    quantity = models.DecimalField("Quantidade", max_digits=12, decimal_places=3, validators=[MinValueValidator(0)])
+    unit_of_measure = models.CharField("Unidade", max_length=10, choices=UnitOfMeasureEnum.choices, blank=True)
+
+    class Meta:
+        verbose_name = "Insumo da ficha técnica"
+        verbose_name_plural = "Insumos da ficha técnica"
+        constraints = [
+            models.UniqueConstraint(fields=["recipe", "supply_item"], name="cake_recipe_line_unique_item"),
+        ]
+
+    def __str__(self):
+        return f"{self.supply_item} — {self.quantity} {self.unit_of_measure}"
+
+    def clean(self):
+        # A explosão converte para a unidade do insumo; a conversão precisa existir
+        if not (self.supply_item_id and self.unit_of_measure):
+            return
+        item = self.supply_item
+        if conversion_factor(self.unit_of_measure, item.unit_of_measure, item.density_g_per_ml, item.unit_weight_g) is None:
+            raise ValidationError({
+                "unit_of_measure": (
+                    f"Não há conversão de {self.get_unit_of_measure_display()} para "
+                    f"{item.get_unit_of_measure_display()}: informe a densidade ou o peso da unidade do insumo."
+                )
+            })
+
+    def save(self, *args, **kwargs):
+        if not self.unit_of_measure:
+            self.unit_of_measure = self.supply_item.unit_of_measure
+        super().save(*args, **kwargs)
+
+
 # -------------------------
 # Imagens
 # -------------------------
@@ -129,10 +205,23 @@ class CakeImage(models.Model):
     image_type = models.CharField("Tipo", max_length=20, choices=ImageType.choices)
     is_cover = models.BooleanField("Imagem de capa", default=False)
 
+    # Campo que aponta para o dono da capa (ver commons.images.refresh_cover_image)
+    cover_owner_field = "cake"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cake"], condition=models.Q(is_cover=True), name="cake_image_single_cover"),
+        ]
+
     def __str__(self):
         tipo = self.get_image_type_display()
         return f"{tipo} - {self.cake.name}" + (" [CAPA]" if self.is_cover else "")
 
+    def save(self, *args, **kwargs):
+        if self.is_cover:
+            CakeImage.objects.filter(cake=self.cake, is_cover=True).exclude(pk=self.pk).update(is_cover=False)
+        super().save(*args, **kwargs)
+
 # -------------------------
 # Informações nutricionais
 # -------------------------
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from commons.images import variant_urls
 from .models import (
     Cake,
     CakeComposition,
@@ -47,9 +48,14 @@ class CakeSizeSerializer(serializers.ModelSerializer):
 
 
 class CakeImageSerializer(serializers.ModelSerializer):
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = CakeImage
-        fields = ['id', 'url', 'image_type']
+        fields = ['id', 'image', 'image_type', 'is_cover', 'variants']
+
+    def get_variants(self, obj):
+        return variant_urls(obj.image, self.context.get("request"))
 
 
 class NutritionalInfoSerializer(serializers.ModelSerializer):
@@ -68,6 +74,7 @@ class CakeSerializer(serializers.ModelSerializer):
     composition = CakeCompositionSerializer()
     sizes = CakeSizeSerializer(many=True)
     images = CakeImageSerializer(many=True)
+    cover_image = CakeImageSerializer(read_only=True)
     nutritional_info = NutritionalInfoSerializer(required=False)
 
     class Meta:
@@ -78,7 +85,7 @@ class CakeSerializer(serializers.ModelSerializer):
             'is_available_for_delivery', 'is_available_for_pickup',
             'production_time_days', 'is_active', 'internal_notes',
             'slug', 'created_at', 'updated_at',
-            'composition', 'sizes', 'images', 'nutritional_info',
+            'composition', 'sizes', 'images', 'cover_image', 'nutritional_info',
         ]
         read_only_fields = ['slug', 'created_at', 'updated_at']
 
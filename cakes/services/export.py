@@ -0,0 +1,84 @@
+# cakes/services/export.py
+
+from commons.export import EXPORT_CHUNK_SIZE, touch_updated_at
+from cakes.models import Cake
+
+CAKE_COLUMNS = [
+    "id", "name", "slug", "description", "category", "customizable", "estimated_weight_kg",
+    "is_available_for_delivery", "is_available_for_pickup", "production_time_days", "is_active",
+    "image", "created_at", "updated_at",
+    "composition.topping", "composition.flavors", "composition.ingredients", "composition.allergens",
+    "sizes", "images",
+]
+
+
+def cake_export_queryset(since=None):
+    """
+    Catálogo completo (ativos e inativos) em ordem estável. Com `since`, os bolos
+    alterados desde então — composição, tamanhos e imagens atualizam o `updated_at`
+    do bolo (receivers abaixo).
+    """
+    queryset = (
+        Cake.objects.select_related("composition", "cover_image")
+        .prefetch_related(
+            "composition__flavors", "composition__ingredients", "composition__allergens", "sizes", "images",
+        )
+        .order_by("id")
+    )
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    return queryset
+
+
+def cake_record(cake, build_url=str) -> dict:
+    composition = getattr(cake, "composition", None)
+    return {
+        "id": cake.id,
+        "name": cake.name,
+        "slug": cake.slug,
+        "description": cake.description,
+        "category": cake.category,
+        "customizable": cake.customizable,
+        "estimated_weight_kg": cake.estimated_weight_kg,
+        "is_available_for_delivery": cake.is_available_for_delivery,
+        "is_available_for_pickup": cake.is_available_for_pickup,
+        "production_time_days": cake.production_time_days,
+        "is_active": cake.is_active,
+        "image": build_url(cake.cover_image.image.url) if cake.cover_image and cake.cover_image.image else None,
+        "created_at": cake.created_at,
+        "updated_at": cake.updated_at,
+        "composition": {
+            "topping": composition.topping,
+            "flavors": [{"type": flavor.type, "description": flavor.description} for flavor in composition.flavors.all()],
+            "ingredients": [
+                {"name": ingredient.name, "description": ingredient.description}
+                for ingredient in composition.ingredients.all()
+            ],
+            "allergens": [{"name": allergen.name, "present": allergen.present} for allergen in composition.allergens.all()],
+        } if composition else None,
+        "sizes": [{"description": size.description, "serves": size.serves} for size in cake.sizes.all()],
+        "images": [
+            {"image": build_url(image.image.url), "image_type": image.image_type, "is_cover": image.is_cover}
+            for image in cake.images.all() if image.image
+        ],
+    }
+
+
+def iter_cake_records(since=None, chunk_size=EXPORT_CHUNK_SIZE, build_url=str):
+    """Registros do catálogo com memória constante (.iterator com prefetch por bloco)."""
+    for cake in cake_export_queryset(since).iterator(chunk_size=chunk_size):
+        yield cake_record(cake, build_url)
+
+
+# ---------------------------------------------
+# Receivers: alterações nos filhos marcam o bolo como alterado
+# ---------------------------------------------
+
+def touch_cake(sender, instance, **kwargs):
+    """post_save/post_delete de composição, tamanhos e imagens."""
+    touch_updated_at(Cake, [instance.cake_id])
+
+
+def touch_cake_of_composition(sender, instance, **kwargs):
+    """post_save/post_delete de sabores, ingredientes e alérgenos da composição."""
+    touch_updated_at(Cake, Cake.objects.filter(composition=instance.composition_id).values_list("pk", flat=True))
@@ -11,12 +11,14 @@ from .views import (
     CakeSizeListView,
     CakeCompositionDetailView,
     CakeImageListView,
-    CakeNutritionalInfoView
+    CakeNutritionalInfoView,
+    CakeCatalogExportView,
 )
 
 urlpatterns = [
     # Cakes
     path("cakes/", CakeListView.as_view(), name="cake-list"),
+    path("cakes/export/", CakeCatalogExportView.as_view(), name="cake-export"),
     path("cakes/create/", CakeCreateView.as_view(), name="cake-create"),
     path("cakes/<uuid:pk>/", CakeRetrieveView.as_view(), name="cake-detail"),
     path("cakes/<uuid:pk>/update/", CakeUpdateView.as_view(), name="cake-update"),
@@ -4,7 +4,9 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from commons.pagination import CursorPaginatedView
+from commons.export import CONTENT_TYPES, ExportError, export_response, parse_since
+from cakes.services.export import iter_cake_records, CAKE_COLUMNS
 
 from cakes.models import Cake
 from cakes.serializers import (
@@ -14,42 +16,59 @@ from cakes.serializers import (
     CakeImageSerializer,
     NutritionalInfoSerializer
 )
-# View base com paginação customizada
-class BasePaginatedView(APIView):
-    def paginate_queryset(self, queryset, request, serializer_class):
-        page = request.query_params.get("page", 1)
-        page_size = request.query_params.get("page_size", 10)
-        paginator = Paginator(queryset, page_size)
-        try:
-            paginated_items = paginator.page(page)
-        except (PageNotAnInteger, EmptyPage):
-            paginated_items = paginator.page(1)
-
-        serializer = serializer_class(paginated_items, many=True, context={"request": request})
-        return {
-            "count": paginator.count,
-            "next": paginated_items.next_page_number() if paginated_items.has_next() else None,
-            "previous": paginated_items.previous_page_number() if paginated_items.has_previous() else None,
-            "results": serializer.data,
-        }
 
 # Listagem de bolos
-class CakeListView(BasePaginatedView):
+class CakeListView(CursorPaginatedView):
     permission_classes = [AllowAny]
 
     @swagger_auto_schema(
         operation_summary="List all cakes",
-        operation_description="Retrieve a paginated list of all active cakes.",
+        operation_description=(
+            "Retrieve a cursor-paginated list of all active cakes. "
+            "Pass the `next`/`previous` value as `cursor` to move between pages."
+        ),
         manual_parameters=[
-            openapi.Parameter("page", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter("cursor", openapi.IN_QUERY, type=openapi.TYPE_STRING),
             openapi.Parameter("page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter(
+                "ordering", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                enum=list(CursorPaginatedView.orderings),
+            ),
+            openapi.Parameter("count", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=["estimate", "exact"]),
         ],
         tags=["cakes"]
     )
     def get(self, request):
-        queryset = Cake.objects.filter(is_active=True).order_by("name")
+        queryset = Cake.objects.filter(is_active=True).select_related("cover_image")
         return Response(self.paginate_queryset(queryset, request, CakeSerializer))
 
+# Exportação do catálogo
+class CakeCatalogExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Export the cake catalog (streaming CSV/NDJSON)",
+        operation_description=(
+            "Gera o catálogo completo — com composição, tamanhos e imagens — lido do banco em blocos. "
+            "No CSV, listas de objetos vão como JSON."
+        ),
+        manual_parameters=[
+            openapi.Parameter("file_format", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(CONTENT_TYPES), description="Padrão: csv"),
+            openapi.Parameter("since", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Só bolos alterados desde (ISO 8601)"),
+        ],
+        tags=["cakes"]
+    )
+    def get(self, request):
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in CONTENT_TYPES:
+            return Response({"detail": f"Formato inválido: {file_format}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            since = parse_since(request.query_params.get("since"))
+        except ExportError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        records = iter_cake_records(since=since, build_url=request.build_absolute_uri)
+        return export_response(records, file_format, CAKE_COLUMNS, "catalogo_bolos")
+
 # Criação de bolo
 class CakeCreateView(APIView):
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,109 @@
+import csv
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+# ------------------------------
+# Exportação em streaming (CSV / NDJSON)
+# ------------------------------
+
+EXPORT_CHUNK_SIZE = 500
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+class _Echo:
+    """Buffer mínimo para o csv.writer: devolve a linha em vez de gravá-la."""
+
+    def write(self, value):
+        return value
+
+
+def parse_since(value):
+    """ISO 8601 (data ou data/hora) → datetime com fuso; None sem valor."""
+    if value in (None, ""):
+        return None
+    moment = parse_datetime(str(value))
+    if moment is None:
+        day = parse_date(str(value))
+        if day is None:
+            raise ExportError(f"Data inválida: {value} (use AAAA-MM-DD ou ISO 8601).")
+        moment = datetime.combine(day, time.min)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def flatten(record, prefix=""):
+    """
+    Achata um registro aninhado para uma linha de CSV: dicionários viram colunas
+    "pai.filho", listas de valores simples viram "a|b" e listas de objetos viram JSON.
+    """
+    row = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            row.update(flatten(value, f"{name}."))
+        elif isinstance(value, list):
+            if all(not isinstance(entry, (dict, list)) for entry in value):
+                row[name] = "|".join(str(entry) for entry in value)
+            else:
+                row[name] = json.dumps(value, default=_json_default, ensure_ascii=False)
+        else:
+            row[name] = value
+    return row
+
+
+def render(records, file_format, columns):
+    """Gera o arquivo linha a linha (strings), sem acumular os registros."""
+    if file_format == "ndjson":
+        for record in records:
+            yield json.dumps(record, default=_json_default, ensure_ascii=False) + "\n"
+        return
+    if file_format != "csv":
+        raise ExportError(f"Formato inválido: {file_format} (use {' ou '.join(CONTENT_TYPES)}).")
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for record in records:
+        row = flatten(record)
+        yield writer.writerow([row.get(column) for column in columns])
+
+
+def export_response(records, file_format, columns, filename):
+    """StreamingHttpResponse do arquivo; o formato deve ter sido validado antes."""
+    response = StreamingHttpResponse(render(records, file_format, columns), content_type=CONTENT_TYPES[file_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{file_format}"'
+    return response
+
+
+# ------------------------------
+# Exportação incremental (`since`)
+# ------------------------------
+
+def touch_updated_at(owner_model, owner_ids):
+    """
+    Marca os donos como alterados (UPDATE de `updated_at`, sem save() nem sinais).
+    Usado pelos receivers dos modelos filhos, para que o `since` das exportações
+    enxergue alterações e exclusões que não passam pelo próprio dono.
+    """
+    owner_ids = [owner_id for owner_id in owner_ids if owner_id is not None]
+    if owner_ids:
+        owner_model.objects.filter(pk__in=owner_ids).update(updated_at=timezone.now())
@@ -0,0 +1,15 @@
+from uuid import UUID
+
+
+# ------------------------------
+# Identificadores
+# ------------------------------
+
+def parse_uuid(value, error=ValueError, message="ID inválido: {value}."):
+    """UUID de uma string (ou o próprio UUID); valor inválido levanta `error(message)`."""
+    if isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value))
+    except ValueError:
+        raise error(message.format(value=value))
@@ -0,0 +1,184 @@
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------
+# Derivados de imagens (miniaturas)
+# ------------------------------
+
+FALLBACK_IMAGE_URL = "/static/img/no-image.png"
+DERIVATIVES_DIR = "derivatives"
+
+# Maior lado de cada variante; a proporção original é mantida
+VARIANTS = {
+    "thumb": 160,
+    "medium": 480,
+    "large": 1200,
+}
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+DEFAULT_FORMAT = "webp"
+
+
+def variant_name(name: str, variant: str, fmt: str = DEFAULT_FORMAT) -> str:
+    """
+    Caminho determinístico do derivado no storage:
+    "supplies/images/foto.png" → "derivatives/supplies/images/foto.thumb.webp".
+    Como o storage nunca sobrescreve uploads (gera nomes novos), o caminho muda junto com a imagem.
+    """
+    root, _ = posixpath.splitext(name)
+    return posixpath.join(DERIVATIVES_DIR, f"{root}.{variant}.{fmt}")
+
+
+# Derivados já confirmados no storage (por processo): só o primeiro pedido de cada um
+# consulta o storage. Guarda apenas positivos — um derivado ausente é conferido de novo.
+_KNOWN_VARIANTS = set()
+MAX_KNOWN_VARIANTS = 50000
+
+
+def variant_exists(storage, name: str) -> bool:
+    if name in _KNOWN_VARIANTS:
+        return True
+    if not storage.exists(name):
+        return False
+    if len(_KNOWN_VARIANTS) >= MAX_KNOWN_VARIANTS:
+        _KNOWN_VARIANTS.clear()
+    _KNOWN_VARIANTS.add(name)
+    return True
+
+
+def variant_url(field_file, variant: str, fmt: str = DEFAULT_FORMAT) -> str:
+    """
+    URL do derivado (gerado no upload ou pelo backfill). Enquanto ele não existir —
+    logo após o upload ou antes do backfill —, a URL do original.
+    """
+    if not field_file or not field_file.name:
+        return FALLBACK_IMAGE_URL
+    name = variant_name(field_file.name, variant, fmt)
+    if variant_exists(field_file.storage, name):
+        return field_file.storage.url(name)
+    return field_file.url
+
+
+def variant_urls(field_file, request=None) -> dict:
+    """
+    {"thumb": {"webp": url, "jpeg": url}, ...} para serializers; None sem imagem.
+    Com `request`, as URLs saem absolutas (como as do ImageField no DRF).
+    """
+    if not field_file or not field_file.name:
+        return None
+    build = request.build_absolute_uri if request is not None else str
+    return {
+        variant: {fmt: build(variant_url(field_file, variant, fmt)) for fmt in FORMATS}
+        for variant in VARIANTS
+    }
+
+
+def _render(source: Image.Image, size: int, fmt: str) -> bytes:
+    image = source.copy()
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    pil_format, options = FORMATS[fmt]
+    if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+        # JPEG não tem transparência: aplica sobre fundo branco
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(field_file, force: bool = False) -> int:
+    """
+    Gera os derivados que ainda não existem (ou todos, com `force`).
+    Retorna quantos arquivos foram gravados; arquivos ilegíveis são registrados e ignorados.
+    """
+    if not field_file or not field_file.name:
+        return 0
+    storage = field_file.storage
+    pending = [
+        (variant, size, fmt)
+        for variant, size in VARIANTS.items()
+        for fmt in FORMATS
+        if force or not storage.exists(variant_name(field_file.name, variant, fmt))
+    ]
+    if not pending:
+        return 0
+
+    try:
+        with storage.open(field_file.name, "rb") as handle:
+            source = ImageOps.exif_transpose(Image.open(handle))
+            source.load()
+    except (OSError, UnidentifiedImageError) as exc:
+        logger.warning("Imagem %s ignorada ao gerar derivados: %s", field_file.name, exc)
+        return 0
+
+    for variant, size, fmt in pending:
+        name = variant_name(field_file.name, variant, fmt)
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(_render(source, size, fmt)))
+    return len(pending)
+
+
+def delete_variants(name: str, storage) -> None:
+    for variant in VARIANTS:
+        for fmt in FORMATS:
+            derivative = variant_name(name, variant, fmt)
+            _KNOWN_VARIANTS.discard(derivative)
+            if storage.exists(derivative):
+                storage.delete(derivative)
+
+
+# ------------------------------
+# Receivers (modelos com campo `image`)
+# ------------------------------
+
+def generate_image_variants(sender, instance, **kwargs):
+    """post_save: gera os derivados depois do commit (os já existentes são mantidos)."""
+    field_file = instance.image
+    if field_file and field_file.name:
+        transaction.on_commit(lambda: generate_variants(field_file))
+
+
+def delete_image_variants(sender, instance, **kwargs):
+    """post_delete: remove os derivados junto com o registro."""
+    field_file = instance.image
+    if field_file and field_file.name:
+        name, storage = field_file.name, field_file.storage
+        transaction.on_commit(lambda: delete_variants(name, storage))
+
+
+# ------------------------------
+# Ponteiro de capa (cover_image do dono)
+# ------------------------------
+
+def refresh_cover(image_model, owner_id) -> None:
+    """
+    Recalcula `cover_image` do dono: a imagem marcada como capa ou, sem ela, a primeira.
+    Usa UPDATE direto para não disparar save() (nem auto_now) do dono.
+    """
+    owner_field = image_model.cover_owner_field
+    cover_id = (
+        image_model.objects.filter(**{owner_field: owner_id})
+        .order_by("-is_cover", "pk")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    owner_model = image_model._meta.get_field(owner_field).related_model
+    owner_model.objects.filter(pk=owner_id).update(cover_image_id=cover_id)
+
+
+def refresh_cover_image(sender, instance, **kwargs):
+    """post_save/post_delete de imagens com `cover_owner_field`: mantém o ponteiro de capa do dono."""
+    refresh_cover(sender, getattr(instance, f"{sender.cover_owner_field}_id"))
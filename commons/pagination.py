@@ -0,0 +1,280 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from uuid import UUID
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import DateTimeField, Q
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.views import APIView
+
+
+# ------------------------------
+# Paginação por chave (keyset)
+# ------------------------------
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values) -> str:
+    """
+    Serializa os valores da última linha da página em um cursor opaco (base64 url-safe).
+    """
+    payload = []
+    for value in values:
+        if isinstance(value, datetime):
+            payload.append(["dt", value.isoformat()])
+        elif isinstance(value, date):
+            payload.append(["d", value.isoformat()])
+        elif isinstance(value, UUID):
+            payload.append(["uuid", str(value)])
+        elif isinstance(value, Decimal):
+            payload.append(["dec", str(value)])
+        else:
+            payload.append(["raw", value])
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Reverte `encode_cursor`. Retorna None sem cursor e levanta InvalidCursor se ele
+    não puder ser lido. Os tipos dos valores são conferidos em `clean_cursor_values`.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = []
+        for kind, value in payload:
+            if kind == "dt":
+                values.append(datetime.fromisoformat(value))
+            elif kind == "d":
+                values.append(date.fromisoformat(value))
+            elif kind == "uuid":
+                values.append(UUID(value))
+            elif kind == "dec":
+                values.append(Decimal(value))
+            elif kind == "raw" and isinstance(value, (str, int, float, bool)):
+                values.append(value)
+            else:
+                raise ValueError(kind)
+        return values
+    except (ValueError, TypeError, InvalidOperation):
+        raise InvalidCursor("Cursor inválido.")
+
+
+def _cursor_field(queryset, field):
+    """Campo (ou anotação) do queryset que define o tipo do valor de `field` na ordenação."""
+    name = field.lstrip("-")
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    opts, model_field = queryset.model._meta, None
+    for part in name.split("__"):
+        model_field = opts.pk if part == "pk" else opts.get_field(part)
+        if model_field.is_relation:
+            opts = model_field.related_model._meta
+    return model_field.target_field if model_field.is_relation else model_field
+
+
+def clean_cursor_values(queryset, ordering, values):
+    """
+    Converte os valores do cursor pelo tipo de cada campo da ordenação (`to_python`).
+    Um cursor forjado (tamanho ou tipo errado) levanta InvalidCursor antes de chegar
+    ao banco, em vez de um erro do ORM.
+    """
+    if len(values) != len(ordering):
+        raise InvalidCursor("Cursor inválido.")
+    cleaned = []
+    for field, value in zip(ordering, values):
+        model_field = _cursor_field(queryset, field)
+        try:
+            value = model_field.to_python(value)
+        except (ValidationError, TypeError, ValueError, InvalidOperation):
+            raise InvalidCursor("Cursor inválido.")
+        if value is None:
+            raise InvalidCursor("Cursor inválido.")
+        if isinstance(model_field, DateTimeField) and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        cleaned.append(value)
+    return cleaned
+
+
+def keyset_filter(ordering, values) -> Q:
+    """
+    Monta o filtro "linhas depois do cursor" para uma ordenação composta.
+
+    `ordering` segue a sintaxe do `order_by` (ex.: ["-date", "-id"]) e `values`
+    traz os valores da última linha na mesma ordem. Para (a, b) descendente gera:
+    a < va OR (a = va AND b < vb).
+    """
+    condition = Q()
+    equal_prefix = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+        equal_prefix &= Q(**{name: value})
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=50):
+    """
+    Retorna (linhas, próximo_cursor) usando paginação por chave.
+
+    Busca `limit + 1` linhas para saber se há próxima página sem executar COUNT(*).
+    Cursor inválido levanta InvalidCursor.
+    """
+    values = decode_cursor(cursor)
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, clean_cursor_values(queryset, ordering, values)))
+
+    rows = list(queryset[: limit + 1])
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_next and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor([
+            last[f.lstrip("-")] if isinstance(last, dict) else getattr(last, f.lstrip("-"))
+            for f in ordering
+        ])
+    return rows, next_cursor
+
+
+def _value(row, field):
+    name = field.lstrip("-")
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def _reverse(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def cursor_page(queryset, ordering, cursor=None, limit=50, key=""):
+    """
+    Retorna (linhas, cursor_seguinte, cursor_anterior) navegando nos dois sentidos.
+
+    O cursor carrega `key` (nome da ordenação), o sentido e os valores da linha de
+    referência; a página anterior é lida com a ordenação invertida. Cursores que não
+    combinam com a ordenação pedida levantam InvalidCursor em vez de voltar ao início.
+    """
+    payload = decode_cursor(cursor)
+    if payload is not None:
+        if not payload or len(payload) != len(ordering) + 2 or payload[0] != key or payload[1] not in ("n", "p"):
+            raise InvalidCursor("Cursor inválido.")
+        payload[2:] = clean_cursor_values(queryset, ordering, payload[2:])
+
+    backwards = payload is not None and payload[1] == "p"
+    order = [_reverse(field) for field in ordering] if backwards else list(ordering)
+    queryset = queryset.order_by(*order)
+    if payload:
+        queryset = queryset.filter(keyset_filter(order, payload[2:]))
+
+    rows = list(queryset[: limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    def cursor_for(row, direction):
+        return encode_cursor([key, direction, *(_value(row, field) for field in ordering)])
+
+    # Quem veio de um cursor sempre tem para onde voltar no sentido oposto
+    has_next = has_more if not backwards else True
+    has_previous = has_more if backwards else payload is not None
+    return (
+        rows,
+        cursor_for(rows[-1], "n") if rows and has_next else None,
+        cursor_for(rows[0], "p") if rows and has_previous else None,
+    )
+
+
+def estimated_count(queryset) -> int:
+    """
+    Total aproximado pela estimativa do planejador (EXPLAIN), sem percorrer as linhas
+    como o COUNT(*). Fora do PostgreSQL, faz a contagem exata.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def ordering_choices(*fields, tiebreaker="id") -> dict:
+    """{"name": ["name", "id"], "-name": ["-name", "-id"], ...} para os campos informados."""
+    choices = {}
+    for field in fields:
+        choices[field] = [field, tiebreaker]
+        choices[f"-{field}"] = [f"-{field}", f"-{tiebreaker}"]
+    return choices
+
+
+# ------------------------------
+# View base das listagens
+# ------------------------------
+
+class CursorPaginatedView(APIView):
+    """
+    Listagem paginada por cursor: o custo da página N é o mesmo da primeira
+    (sem OFFSET nem COUNT(*)). Parâmetros: `cursor` (valor de `next`/`previous`),
+    `page_size`, `ordering` (uma das chaves de `orderings`) e `count`
+    (`estimate` ou `exact`; omitido, `count` volta nulo).
+    """
+    orderings = ordering_choices("name", "updated_at")
+    default_ordering = "name"
+    default_page_size = 10
+    max_page_size = 100
+
+    def page_size(self, request):
+        try:
+            return max(1, min(int(request.query_params.get("page_size")), self.max_page_size))
+        except (TypeError, ValueError):
+            return self.default_page_size
+
+    def paginate_queryset(self, queryset, request, serializer_class, orderings=None, default_ordering=None):
+        params = request.query_params
+        orderings = orderings or self.orderings
+        ordering = params.get("ordering") or default_ordering or self.default_ordering
+        if ordering not in orderings:
+            raise ParseError(f"Ordenação inválida. Use: {', '.join(orderings)}.")
+
+        count_mode = params.get("count")
+        if count_mode not in (None, "", "estimate", "exact"):
+            raise ParseError("`count` deve ser 'estimate' ou 'exact'.")
+
+        try:
+            rows, next_cursor, previous_cursor = cursor_page(
+                queryset, orderings[ordering], cursor=params.get("cursor"),
+                limit=self.page_size(request), key=ordering,
+            )
+        except InvalidCursor as exc:
+            raise ParseError(str(exc))
+
+        count = None
+        if count_mode == "estimate":
+            count = estimated_count(queryset)
+        elif count_mode == "exact":
+            count = queryset.order_by().count()
+
+        serializer = serializer_class(rows, many=True, context={"request": request})
+        return {
+            "count": count,
+            "next": next_cursor,
+            "previous": previous_cursor,
+            "results": serializer.data,
+        }
@@ -0,0 +1,98 @@
+import re
+
+import numpy as np
+
+from .enums import UnitOfMeasureEnum
+
+
+# ------------------------------
+# Conversão de unidades (vetorizada)
+# ------------------------------
+
+MASS, VOLUME, COUNT, SLICE = range(4)
+
+# Dimensão e fator para a unidade-base da dimensão (g, ml, un, fatia)
+UNIT_TABLE = {
+    UnitOfMeasureEnum.GRAM: (MASS, 1.0),
+    UnitOfMeasureEnum.KILOGRAM: (MASS, 1000.0),
+    UnitOfMeasureEnum.MILLILITER: (VOLUME, 1.0),
+    UnitOfMeasureEnum.LITER: (VOLUME, 1000.0),
+    UnitOfMeasureEnum.UNIT: (COUNT, 1.0),
+    UnitOfMeasureEnum.SLICE: (SLICE, 1.0),
+}
+UNITS = [str(unit) for unit in UNIT_TABLE]
+UNIT_INDEX = {unit: index for index, unit in enumerate(UNITS)}
+DIMENSION = np.array([dimension for dimension, _ in UNIT_TABLE.values()], dtype=np.int64)
+TO_BASE = np.array([factor for _, factor in UNIT_TABLE.values()], dtype=np.float64)
+
+# CONVERSION_MATRIX[de, para]: fator entre unidades da mesma dimensão; NaN entre dimensões
+CONVERSION_MATRIX = np.where(
+    DIMENSION[:, None] == DIMENSION[None, :], TO_BASE[:, None] / TO_BASE[None, :], np.nan
+)
+
+_QUANTITY_RE = re.compile(r"^\s*(\d+(?:[.,]\d+)?)\s*([a-zA-Z]+)\b")
+
+
+class UnitConversionError(ValueError):
+    pass
+
+
+def unit_codes(units, size=None) -> np.ndarray:
+    """Índice de cada unidade em UNITS; uma unidade só (str) é repetida `size` vezes."""
+    if isinstance(units, str):
+        units = [units] * (size or 1)
+    try:
+        return np.fromiter((UNIT_INDEX[str(unit)] for unit in units), dtype=np.int64, count=len(units))
+    except KeyError as exc:
+        raise UnitConversionError(f"Unidade desconhecida: {exc.args[0]!r}.")
+
+
+def _optional(values, size) -> np.ndarray:
+    """Densidade/peso por linha (escalar ou sequência); None vira NaN."""
+    if values is None:
+        return np.full(size, np.nan)
+    if np.isscalar(values):
+        values = [values] * size
+    return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+
+
+def convert(quantities, from_units, to_units, density=None, unit_weight=None) -> np.ndarray:
+    """
+    Converte um vetor de quantidades em uma passada.
+
+    Entre unidades da mesma dimensão usa CONVERSION_MATRIX; entre dimensões diferentes
+    passa por gramas usando a densidade (g/ml) e o peso da unidade (g) de cada linha.
+    Sem o dado necessário (ou para fatias), o resultado da linha é NaN.
+    """
+    quantities = np.asarray(quantities, dtype=np.float64)
+    size = quantities.shape[0]
+    source, target = unit_codes(from_units, size), unit_codes(to_units, size)
+
+    factor = CONVERSION_MATRIX[source, target]
+    crossing = np.isnan(factor)
+    if crossing.any():
+        # Gramas por unidade-base de cada dimensão, linha a linha: massa, volume, contagem, fatia
+        grams = np.column_stack([
+            np.ones(size), _optional(density, size), _optional(unit_weight, size), np.full(size, np.nan),
+        ])
+        rows = np.arange(size)
+        via_grams = (
+            TO_BASE[source] * grams[rows, DIMENSION[source]]
+            / (TO_BASE[target] * grams[rows, DIMENSION[target]])
+        )
+        factor = np.where(crossing, via_grams, factor)
+    return quantities * factor
+
+
+def conversion_factor(from_unit, to_unit, density=None, unit_weight=None):
+    """Fator de uma única conversão; None quando não há como converter."""
+    factor = convert([1.0], from_unit, to_unit, density, unit_weight)[0]
+    return None if np.isnan(factor) else float(factor)
+
+
+def parse_quantity(text):
+    """"100 g" / "200ml" / "1,5 kg" → (100.0, "g"); None se não reconhecer a unidade."""
+    match = _QUANTITY_RE.match(text or "")
+    if not match or match.group(2).lower() not in UNIT_INDEX:
+        return None
+    return float(match.group(1).replace(",", ".")), match.group(2).lower()
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Terceiros
     'rest_framework',
     'drf_yasg',
@@ -178,6 +179,16 @@ SWAGGER_SETTINGS = {
 }
 
 
+# Reposição de estoque (comando compute_purchase_suggestions)
+STOCK_REPLENISHMENT = {
+    'LEAD_TIME_DAYS': env.int('STOCK_LEAD_TIME_DAYS', default=7),
+    'REVIEW_PERIOD_DAYS': 7,    # intervalo entre compras
+    'SERVICE_LEVEL_Z': 1.65,    # ~95% de nível de serviço
+    'HISTORY_WEEKS': 13,        # semanas de histórico usadas na previsão
+    'SMOOTHING_ALPHA': 0.3,     # suavização exponencial das semanas
+}
+
+
 JAZZMIN_SETTINGS = {
     "site_title": "Painel Confeitaria",
     "site_header": "Administração de Bolos",
@@ -227,6 +238,14 @@ JAZZMIN_SETTINGS = {
                 "permissions": ["supplies.view_supplyitem"],
             },
         ],
+        "stock": [
+            {
+                "name": "Idade e Validade",
+                "url": "/admin/stock/stockitem/reports/aging/",
+                "icon": "fas fa-hourglass-half",
+                "permissions": ["stock.view_stockitem"],
+            },
+        ],
         "cakes": [
             {
                 "name": "Ver site",
@@ -33,6 +33,7 @@ urlpatterns = [
     # App cakes
     path('api/v1/cakes/', include('cakes.urls')),
     path('api/v1/supplies/', include('supplies.urls')),
+    path('api/v1/stock/', include('stock.urls')),
 
     # Swagger UI
     path('api/v1/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalproductionorder',
+            name='size',
+            field=models.CharField(blank=True, choices=[('pequeno', 'Pequeno'), ('medio', 'Médio'), ('grande', 'Grande')], max_length=20, null=True, verbose_name='Tamanho'),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='size',
+            field=models.CharField(blank=True, choices=[('pequeno', 'Pequeno'), ('medio', 'Médio'), ('grande', 'Grande')], max_length=20, null=True, verbose_name='Tamanho'),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from simple_history.models import HistoricalRecords
+from cakes.models import CakeSizeType
 
 
 # --------------------------
@@ -32,6 +33,7 @@ class ProductionOrder(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     cake = models.ForeignKey("cakes.Cake", on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField("Quantidade a produzir")
+    size = models.CharField("Tamanho", max_length=20, choices=CakeSizeType.choices, null=True, blank=True)
     scheduled_date = models.DateField("Data programada")
     status = models.CharField("Status", max_length=32, choices=ProductionOrderStatus.choices, default=ProductionOrderStatus.PLANNED)
 
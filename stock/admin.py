@@ -1,13 +1,26 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ORDER_VAR
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.utils import timezone
 from .models import (
     StockLocation, StockItem, StockMovement, StockThreshold,
-    StockMovementType, StockAdjustmentReason
+    StockMovementType, StockAdjustmentReason, StockReservation, SupplyClassification,
+    PurchaseSuggestion, StockPeriodClose, StockClosingBalance
 )
+from django.core.exceptions import ValidationError
 from django.db.models import Sum
-from stock.forms import StockMovementAdminForm
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.urls import path, reverse
+from commons.pagination import InvalidCursor
+from stock.forms import StockMovementAdminForm, StockItemPickerWidget, StockItemChoiceField
+from stock.services.movement_history import movement_history_page, DEFAULT_PAGE_SIZE
+from stock.services.stock_item_search import search_stock_items
+from stock.services.movement_search import search_movements_queryset
+from stock.services.closing import rebuild_close, ClosingError
+from stock.services.reports import get_aging_report, AGING_BUCKETS, EXPIRATION_BUCKETS, GROUP_BY_FIELDS
 from simple_history.admin import SimpleHistoryAdmin
 from simple_history.utils import update_change_reason
 from import_export.admin import ExportMixin
@@ -88,19 +101,6 @@ class ExpirationStatusFilter(admin.SimpleListFilter):
             return queryset.filter(supply_batch__expiration_date__isnull=True)
 
 
-# -------------------------------
-# Inline: Movimentações em Estoque
-# -------------------------------
-
-class StockMovementInline(admin.TabularInline):
-    model = StockMovement
-    extra = 0
-    readonly_fields = ("movement_type", "quantity", "date", "source_location", "destination_location", "reference", "notes")
-    can_delete = False
-    show_change_link = True
-    verbose_name_plural = "📦 Histórico de Movimentações"
-
-
 # -------------------------------
 # Admin: Itens de Estoque
 # -------------------------------
@@ -133,6 +133,8 @@ class AlertThresholdFilter(admin.SimpleListFilter):
 
 @admin.register(StockItem)
 class StockItemAdmin(admin.ModelAdmin):
+    # Capa do insumo (direto ou pelo lote) por JOIN para a miniatura
+    list_select_related = ("location", "supply_item__cover_image", "supply_batch__supply_item__cover_image")
     list_display = (
          "image_preview","object_name", "batch_code", "location_display", "quantity_display",
         "unit_display", "expiration_badge", "stock_status_badge",
@@ -140,9 +142,8 @@ class StockItemAdmin(admin.ModelAdmin):
     )
     list_filter = ("location", ExpirationStatusFilter, MovementOciosoFilter, AlertThresholdFilter)
     search_fields = ("supply_item__name", "supply_batch__batch_code", "location__name", "name", "ean", "description")
-    readonly_fields = ("created_at", "updated_at", "recalculated_info")
+    readonly_fields = ("created_at", "updated_at", "recalculated_info", "movement_history_panel")
     autocomplete_fields = ["supply_item"]
-    inlines = [StockMovementInline]
     actions = ["recalcular_estoque_em_lote"]
 
     fieldsets = (
@@ -152,6 +153,9 @@ class StockItemAdmin(admin.ModelAdmin):
         ("Produção", {
             "fields": ("production_batch",)
         }),
+        ("📦 Histórico de Movimentações", {
+            "fields": ("movement_history_panel",)
+        }),
         ("Dados Internos", {
             "classes": ("collapse",),
             "fields": ("created_at", "updated_at", "recalculated_info")
@@ -246,15 +250,113 @@ class StockItemAdmin(admin.ModelAdmin):
 
     @admin.display(description="📄 Info Atualizada")
     def recalculated_info(self, obj):
+        if not obj.pk:
+            return "–"
+        summary = self._movement_summary(obj)
         return mark_safe(f"""
             <ul style='margin:0;padding-left:1em;'>
-                <li>💡 <b>Total Entradas:</b> {obj.total_in:.2f}</li>
-                <li>📤 <b>Total Saídas:</b> {obj.total_out:.2f}</li>
-                <li>📊 <b>Média diária (30d):</b> {obj.average_daily_usage:.2f}</li>
-                <li>🕓 <b>Est. dias restantes:</b> {obj.estimated_days_remaining or '–'}</li>
+                <li>💡 <b>Total Entradas:</b> {summary["total_in"]:.2f}</li>
+                <li>📤 <b>Total Saídas:</b> {summary["total_out"]:.2f}</li>
+                <li>📊 <b>Média diária (30d):</b> {summary["average_daily_usage"]:.2f}</li>
+                <li>🕓 <b>Est. dias restantes:</b> {summary["estimated_days_remaining"] or '–'}</li>
             </ul>
         """)
 
+    def _movement_summary(self, obj):
+        # Uma única agregação por página de edição, compartilhada entre os blocos
+        if getattr(obj, "_movement_summary", None) is None:
+            obj._movement_summary = obj.movement_aggregates()
+        return obj._movement_summary
+
+    @admin.display(description="Movimentações")
+    def movement_history_panel(self, obj):
+        if not obj.pk:
+            return format_html('<p style="opacity: 0.5;">Salve o item antes de visualizar o histórico.</p>')
+        return render_to_string("admin/stock/stockitem/movement_history_panel.html", {
+            "item_id": obj.pk,
+            "history_url": reverse("admin:stock_stockitem_movements", args=[obj.pk]),
+            "summary": self._movement_summary(obj),
+        })
+
+    def movements_view(self, request, object_id):
+        """Endpoint JSON do histórico paginado (cursor por data/id)."""
+        obj = self.get_object(request, object_id)
+        if obj is None or not self.has_view_or_change_permission(request, obj):
+            return JsonResponse({"detail": "Item de estoque não encontrado."}, status=404)
+        limit = request.GET.get("limit", "")
+        try:
+            page = movement_history_page(
+                obj.pk,
+                cursor=request.GET.get("cursor"),
+                limit=int(limit) if limit.isdigit() else DEFAULT_PAGE_SIZE,
+            )
+        except InvalidCursor as exc:
+            return JsonResponse({"detail": str(exc)}, status=400)
+        return JsonResponse(page)
+
+    def picker_view(self, request):
+        """Endpoint JSON (formato select2) usado pelo seletor de itens em Movimentações."""
+        if not self.has_view_permission(request):
+            return JsonResponse({"detail": "Sem permissão."}, status=403)
+        results = search_stock_items(request.GET.get("term", ""))
+        return JsonResponse({"results": results, "pagination": {"more": False}})
+
+    def aging_report_view(self, request):
+        """Relatório de idade/validade/perdas (mesmo conteúdo da API, em cache diário)."""
+        group_by = request.GET.get("group_by", "location")
+        if group_by not in GROUP_BY_FIELDS:
+            group_by = "location"
+        report = get_aging_report(group_by=group_by)
+
+        def cell(bucket):
+            return f"{bucket['quantity']} / {bucket['items']}"
+
+        expiration_keys = ["expired"] + [key for key, _, _ in EXPIRATION_BUCKETS] + ["no_date"]
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Idade e Validade do Estoque",
+            "report": report,
+            "aging_headers": ["Grupo", "Unidade", "0–7 dias", "8–30 dias", "31–90 dias", "90+ dias", "Total"],
+            "aging_rows": [
+                [group["label"], group["unit_of_measure"]]
+                + [cell(group["aging"][key]) for key, _, _ in AGING_BUCKETS]
+                + [f"{group['total_quantity']} / {group['total_items']}"]
+                for group in report["groups"]
+            ],
+            "expiration_headers": ["Grupo", "Unidade", "Vencido", "0–7 dias", "8–30 dias", "31–90 dias", "90+ dias", "Sem data"],
+            "expiration_rows": [
+                [group["label"], group["unit_of_measure"]] + [cell(group["expiration"][key]) for key in expiration_keys]
+                for group in report["groups"]
+            ],
+            "loss_headers": ["Mês", "Unidade", "Vencido em estoque", "Descartado", "Total"],
+            "loss_rows": [
+                [row["month"], row["unit_of_measure"], row["expired_on_hand"], row["written_off"], row["total"]]
+                for row in report["expiry_losses"]
+            ],
+        }
+        return render(request, "admin/stock/aging_report.html", context)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                "reports/aging/",
+                self.admin_site.admin_view(self.aging_report_view),
+                name="stock_stockitem_aging_report",
+            ),
+            path(
+                "picker/",
+                self.admin_site.admin_view(self.picker_view),
+                name="stock_stockitem_picker",
+            ),
+            path(
+                "<path:object_id>/movements/",
+                self.admin_site.admin_view(self.movements_view),
+                name="stock_stockitem_movements",
+            ),
+        ]
+        return custom_urls + urls
+
     @admin.action(description="🔁 Recalcular estoque selecionado")
     def recalcular_estoque_em_lote(self, request, queryset):
         for item in queryset:
@@ -329,6 +431,16 @@ class StockMovementAdmin(ExportMixin, admin.ModelAdmin):
             url
         )
     
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "stock_item":
+            # Select2 com busca sob demanda: nada de <option> para cada item do estoque
+            kwargs["widget"] = StockItemPickerWidget(db_field, self.admin_site)
+            kwargs["form_class"] = StockItemChoiceField
+            kwargs["queryset"] = StockItem.objects.select_related(
+                "supply_item", "supply_batch__supply_item", "location"
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
     def formfield_for_dbfield(self, db_field, **kwargs):
         formfield = super().formfield_for_dbfield(db_field, **kwargs)
         if db_field.name == "notes":
@@ -369,6 +481,17 @@ class StockMovementAdmin(ExportMixin, admin.ModelAdmin):
         qs = qs.select_related("stock_item", "source_location", "destination_location")
         return qs
 
+    def get_search_results(self, request, queryset, search_term):
+        # Busca pelo índice full-text (search_vector) em vez de ILIKE em cada coluna de search_fields
+        if not search_term.strip():
+            return queryset, False
+        queryset = search_movements_queryset(queryset, search_term)
+        if "search_rank" in queryset.query.annotations and ORDER_VAR not in request.GET:
+            # Sem ordenação escolhida pelo usuário: mais relevantes primeiro
+            queryset = queryset.order_by("-search_rank", "-date", "-pk")
+        return queryset, False
+
+
     def save_model(self, request, obj, form, change):
         if change:
             if hasattr(obj, "_history_user"):
@@ -376,6 +499,25 @@ class StockMovementAdmin(ExportMixin, admin.ModelAdmin):
             obj._history_user = request.user
         super().save_model(request, obj, form, change)
 
+    def has_delete_permission(self, request, obj=None):
+        # Movimentações de período fechado não podem ser excluídas (StockMovement.delete)
+        locked_until = StockPeriodClose.locked_until() if obj else None
+        if locked_until and timezone.localdate(obj.date) <= locked_until:
+            return False
+        return super().has_delete_permission(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        # Uma a uma, para respeitar o bloqueio de período de StockMovement.delete()
+        blocked = 0
+        for movement in queryset:
+            try:
+                movement.delete()
+            except ValidationError:
+                blocked += 1
+        if blocked:
+            self.message_user(
+                request, f"{blocked} movimentação(ões) em período fechado não foram excluídas.", messages.WARNING
+            )
 
     @admin.display(description="📌 Lote")
     def batch_code(self, obj):
@@ -488,3 +630,136 @@ class StockThresholdAdmin(admin.ModelAdmin):
     list_display = ("supply_item", "min_quantity", "alert_enabled")
     list_editable = ("min_quantity", "alert_enabled")
     search_fields = ("supply_item__name",)
+
+
+# -------------------------------
+# Admin: Reservas de Estoque
+# -------------------------------
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ("production_order", "supply_item", "quantity", "status", "updated_at")
+    list_filter = ("status",)
+    search_fields = ("supply_item__name", "production_order__cake__name")
+    list_select_related = ("production_order__cake", "supply_item")
+    readonly_fields = ("created_at", "updated_at")
+
+    # Reservas são mantidas pelo StockReservationService (totais por item)
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# -------------------------------
+# Admin: Classificação ABC/XYZ
+# -------------------------------
+
+@admin.register(SupplyClassification)
+class SupplyClassificationAdmin(admin.ModelAdmin):
+    list_display = (
+        "supply_item", "abc_class", "xyz_class", "total_consumption",
+        "cumulative_share", "coefficient_of_variation", "period_end", "computed_at",
+    )
+    list_filter = ("abc_class", "xyz_class", "supply_item__category")
+    search_fields = ("supply_item__name", "supply_item__sku")
+    list_select_related = ("supply_item",)
+    ordering = ("abc_class", "xyz_class", "-total_consumption")
+
+    def has_add_permission(self, request):
+        # Gerada pelo comando `classify_supplies`
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# -------------------------------
+# Admin: Sugestões de Compra
+# -------------------------------
+
+@admin.register(PurchaseSuggestion)
+class PurchaseSuggestionAdmin(admin.ModelAdmin):
+    list_display = (
+        "supply_item", "available_quantity", "reorder_point", "safety_stock",
+        "suggested_quantity", "average_daily_demand", "lead_time_days", "computed_at",
+    )
+    list_filter = ("needs_reorder", "supply_item__category", "supply_item__classification__abc_class")
+    search_fields = ("supply_item__name", "supply_item__sku")
+    list_select_related = ("supply_item",)
+    ordering = ("-needs_reorder", "supply_item__name")
+
+    def has_add_permission(self, request):
+        # Gerada pelo comando `compute_purchase_suggestions`
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# -------------------------------
+# Admin: Fechamento Mensal
+# -------------------------------
+
+@admin.register(StockClosingBalance)
+class StockClosingBalanceAdmin(admin.ModelAdmin):
+    """Saldos do snapshot, paginados e filtrados pelo fechamento (link na página do fechamento)."""
+    list_display = (
+        "supply_item", "stock_item", "location", "unit_of_measure", "opening_balance",
+        "inbound_total", "outbound_total", "adjustment_total", "closing_balance", "movement_count",
+    )
+    list_filter = ("period_close", "location")
+    search_fields = ("supply_item__name", "supply_item__sku")
+    list_select_related = ("stock_item", "supply_item", "location")
+    ordering = ("supply_item__name", "id")
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockPeriodClose)
+class StockPeriodCloseAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "period_end", "closed_at", "closed_by", "balance_count", "is_valid")
+    list_filter = ("is_valid",)
+    list_select_related = ("closed_by",)
+    readonly_fields = ("period", "period_end", "closed_at", "closed_by", "balances_link", "is_valid")
+    actions = ["invalidar_fechamentos", "reconstruir_fechamentos"]
+
+    def has_add_permission(self, request):
+        # Gerado pelo comando `close_stock_period`
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Itens no snapshot")
+    def balances_link(self, obj):
+        # Um snapshot tem uma linha por item de estoque: a listagem paginada em vez de inline
+        url = reverse("admin:stock_stockclosingbalance_changelist") + f"?period_close__id__exact={obj.pk}"
+        return format_html('<a href="{}">{} saldo(s) — ver todos</a>', url, obj.balance_count)
+
+    @admin.action(description="⚠️ Marcar snapshot como inválido")
+    def invalidar_fechamentos(self, request, queryset):
+        updated = queryset.update(is_valid=False)
+        self.message_user(request, f"{updated} fechamento(s) marcados para reconstrução.")
+
+    @admin.action(description="🔁 Reconstruir snapshot (e meses seguintes)")
+    def reconstruir_fechamentos(self, request, queryset):
+        first = queryset.order_by("period").first()
+        try:
+            closes = rebuild_close(first.period)
+        except ClosingError as exc:
+            self.message_user(request, str(exc), level="error")
+            return
+        self.message_user(request, f"{len(closes)} fechamento(s) reconstruído(s).")
@@ -1,6 +1,34 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 
 
 class StockConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stock'
+
+    def ready(self):
+        from cakes.models import CakeRecipe, CakeRecipeLine
+        from production.models import ProductionOrder
+        from supplies.models import SupplyItem, SupplyBatch
+        from stock.services.movement_search import remember_search_fields, refresh_related_movements
+        from stock.services.barcode_index import invalidate_barcode_index
+        from stock.services.reservations import (
+            release_order_reservations, remember_order_state, sync_order_reservations, sync_recipe_reservations,
+        )
+
+        # Mantém o índice de busca das movimentações em dia com nomes de insumos e lotes
+        for model in (SupplyItem, SupplyBatch):
+            pre_save.connect(remember_search_fields, sender=model, dispatch_uid=f"stock_search_pre_{model.__name__}")
+            post_save.connect(refresh_related_movements, sender=model, dispatch_uid=f"stock_search_post_{model.__name__}")
+
+        # Índice de códigos de barras do recebimento
+        post_save.connect(invalidate_barcode_index, sender=SupplyItem, dispatch_uid="stock_barcode_index_save")
+        post_delete.connect(invalidate_barcode_index, sender=SupplyItem, dispatch_uid="stock_barcode_index_delete")
+
+        # Reservas de insumos acompanham o ciclo de vida das ordens de produção
+        pre_save.connect(remember_order_state, sender=ProductionOrder, dispatch_uid="stock_reservation_order_pre")
+        post_save.connect(sync_order_reservations, sender=ProductionOrder, dispatch_uid="stock_reservation_order_post")
+        pre_delete.connect(release_order_reservations, sender=ProductionOrder, dispatch_uid="stock_reservation_order_delete")
+        post_save.connect(sync_recipe_reservations, sender=CakeRecipe, dispatch_uid="stock_reservation_recipe_save")
+        for signal, suffix in ((post_save, "save"), (post_delete, "delete")):
+            signal.connect(sync_recipe_reservations, sender=CakeRecipeLine, dispatch_uid=f"stock_reservation_line_{suffix}")
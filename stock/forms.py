@@ -1,8 +1,31 @@
 from django import forms
+from django.contrib.admin.widgets import AutocompleteSelect
 from django.core.exceptions import ValidationError
+from django.urls import reverse
 from stock.models import StockMovement, StockMovementType, StockItem
 
 
+class StockItemPickerWidget(AutocompleteSelect):
+    """Select2 do admin apontando para a busca indexada de itens de estoque."""
+
+    def get_url(self):
+        return reverse("admin:stock_stockitem_picker")
+
+
+class StockItemChoiceField(forms.ModelChoiceField):
+    """
+    Guarda a linha resolvida para que o help_text e o clean() do formulário
+    reutilizem o mesmo objeto, sem nova consulta ao banco.
+    """
+
+    def to_python(self, value):
+        cached = getattr(self, "_resolved", None)
+        if cached is not None and str(cached.pk) == str(value):
+            return cached
+        self._resolved = super().to_python(value)
+        return self._resolved
+
+
 class StockMovementAdminForm(forms.ModelForm):
     class Meta:
         model = StockMovement
@@ -18,15 +41,15 @@ class StockMovementAdminForm(forms.ModelForm):
             unidade = instance.stock_item.unit_of_measure
             self.fields["quantity"].help_text = f"Estoque atual: {estoque} {unidade}"
 
-        elif "stock_item" in self.data:
+        elif self.data.get("stock_item"):
             try:
-                stock_item_id = self.data.get("stock_item")
-                stock_item = StockItem.objects.get(id=stock_item_id)
+                stock_item = self.fields["stock_item"].to_python(self.data.get("stock_item"))
+            except ValidationError:
+                stock_item = None
+            if stock_item:
                 estoque = stock_item.quantity
                 unidade = stock_item.unit_of_measure
                 self.fields["quantity"].help_text = f"Estoque atual: {estoque} {unidade}"
-            except StockItem.DoesNotExist:
-                pass
 
         # 🛈 Ajuda contextual para o usuário
         self.fields["quantity"].help_text = self.fields["quantity"].help_text or "Informe uma quantidade positiva."
@@ -47,6 +70,7 @@ class StockMovementAdminForm(forms.ModelForm):
 
         # -------------------------------
         # ❌ 1. Bloqueia saídas acima do estoque atual
+        #    (stock_item é a mesma linha já carregada pelo campo)
         # -------------------------------
         if stock_item and movement_type in [
             StockMovementType.OUTBOUND,
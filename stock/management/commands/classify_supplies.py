@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from stock.services.classification import run_classification, DEFAULT_MONTHS
+
+
+class Command(BaseCommand):
+    help = "Recalcula a classificação ABC/XYZ dos insumos a partir do histórico de saídas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months", type=int, default=DEFAULT_MONTHS,
+            help=f"Meses fechados considerados no cálculo (padrão: {DEFAULT_MONTHS})."
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = run_classification(months=options["months"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} insumos classificados em {time.monotonic() - started:.1f}s."
+        ))
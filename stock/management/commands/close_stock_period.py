@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from stock.services.closing import ClosingError, close_period, parse_period
+
+
+class Command(BaseCommand):
+    help = "Fecha o mês de estoque: grava o snapshot de saldos e bloqueia movimentações retroativas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period", help="Mês a fechar (AAAA-MM). Padrão: mês anterior.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            period = parse_period(options["period"]) if options["period"] else None
+            close = close_period(period)
+        except ClosingError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {close} gravado com {close.balance_count} saldos em {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from stock.models import StockPeriodClose
+from stock.services.closing import ClosingError, parse_period, rebuild_close
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o snapshot de um fechamento (e dos seguintes) a partir do razão."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period", help="Mês a reconstruir (AAAA-MM).")
+        parser.add_argument("--invalid", action="store_true", help="A partir do fechamento inválido mais antigo.")
+        parser.add_argument("--no-cascade", action="store_true", help="Não reconstrói os meses seguintes.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            if options["period"]:
+                period = parse_period(options["period"])
+            elif options["invalid"]:
+                period = (
+                    StockPeriodClose.objects.filter(is_valid=False)
+                    .order_by("period").values_list("period", flat=True).first()
+                )
+                if period is None:
+                    self.stdout.write("Nenhum fechamento inválido.")
+                    return
+            else:
+                raise CommandError("Informe --period AAAA-MM ou --invalid.")
+            closes = rebuild_close(period, cascade=not options["no_cascade"])
+        except ClosingError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(closes)} fechamento(s) reconstruído(s) em {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from production.models import ProductionOrder
+from stock.services.requirements import OPEN_ORDER_STATUSES
+from stock.services.reservations import StockReservationService
+
+SYNC_CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os totais reservados por insumo a partir das reservas ativas "
+        "(ex.: após exclusões em cascata ou cargas diretas). Com --orders, antes "
+        "reexplode as reservas das ordens abertas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", action="store_true", help="Sincroniza as reservas das ordens abertas antes.")
+        parser.add_argument("--chunk-size", type=int, default=SYNC_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        synced = 0
+        if options["orders"]:
+            order_ids = list(
+                ProductionOrder.objects.filter(status__in=OPEN_ORDER_STATUSES)
+                .order_by("id").values_list("id", flat=True)
+            )
+            chunk_size = max(1, options["chunk_size"])
+            for start in range(0, len(order_ids), chunk_size):
+                synced += StockReservationService.sync_orders(order_ids[start:start + chunk_size])
+        fixed = StockReservationService.rebuild_totals()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {synced} reserva(s) sincronizada(s) e {fixed} total(is) corrigido(s) "
+            f"em {time.monotonic() - started:.1f}s."
+        ))
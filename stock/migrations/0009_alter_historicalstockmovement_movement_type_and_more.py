@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0001_initial'),
+        ('stock', '0008_historicalstockmovement_after_quantity_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historicalstockmovement',
+            name='movement_type',
+            field=models.CharField(choices=[('entrada', 'Entrada'), ('saida', 'Saída'), ('transferencia', 'Transferência'), ('ajuste', 'Ajuste'), ('insumo_producao', 'Produção'), ('producao_final', 'Produto Acabado')], max_length=32, verbose_name='Tipo de movimento'),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='movement_type',
+            field=models.CharField(choices=[('entrada', 'Entrada'), ('saida', 'Saída'), ('transferencia', 'Transferência'), ('ajuste', 'Ajuste'), ('insumo_producao', 'Produção'), ('producao_final', 'Produto Acabado')], max_length=32, verbose_name='Tipo de movimento'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['stock_item', '-date', '-id'], name='stock_mov_item_date_idx'),
+        ),
+    ]
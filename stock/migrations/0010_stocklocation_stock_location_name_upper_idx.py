@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:25
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0009_alter_historicalstockmovement_movement_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stocklocation',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='stock_location_name_upper_idx'),
+        ),
+    ]
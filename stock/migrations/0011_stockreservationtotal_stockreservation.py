@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:28
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0001_initial'),
+        ('stock', '0010_stocklocation_stock_location_name_upper_idx'),
+        ('supplies', '0008_supplybatch_supply_batch_code_upper_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservationTotal',
+            fields=[
+                ('supply_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reservation_total', serialize=False, to='supplies.supplyitem', verbose_name='Item de Insumo')),
+                ('reserved_quantity', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Quantidade reservada')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Total Reservado',
+                'verbose_name_plural': 'Totais Reservados',
+                'constraints': [models.CheckConstraint(condition=models.Q(('reserved_quantity__gte', 0)), name='stock_reservation_total_non_negative')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Quantidade reservada')),
+                ('status', models.CharField(choices=[('ativa', 'Ativa'), ('liberada', 'Liberada'), ('consumida', 'Consumida')], default='ativa', max_length=16, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('production_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='production.productionorder', verbose_name='Ordem de Produção')),
+                ('supply_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='supplies.supplyitem', verbose_name='Item de Insumo')),
+            ],
+            options={
+                'verbose_name': 'Reserva de Estoque',
+                'verbose_name_plural': 'Reservas de Estoque',
+                'indexes': [models.Index(fields=['production_order', 'status'], name='stock_resv_order_status_idx')],
+                'unique_together': {('production_order', 'supply_item')},
+            },
+        ),
+    ]
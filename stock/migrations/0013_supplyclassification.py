@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0012_alter_historicalstockmovement_adjustment_reason_and_more'),
+        ('supplies', '0008_supplybatch_supply_batch_code_upper_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplyClassification',
+            fields=[
+                ('supply_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='classification', serialize=False, to='supplies.supplyitem', verbose_name='Item de Insumo')),
+                ('abc_class', models.CharField(choices=[('A', 'A - Alto consumo'), ('B', 'B - Consumo intermediário'), ('C', 'C - Baixo consumo')], max_length=1, verbose_name='Classe ABC')),
+                ('xyz_class', models.CharField(choices=[('X', 'X - Demanda estável'), ('Y', 'Y - Demanda variável'), ('Z', 'Z - Demanda irregular')], max_length=1, verbose_name='Classe XYZ')),
+                ('total_consumption', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Consumo no período')),
+                ('cumulative_share', models.DecimalField(decimal_places=4, max_digits=6, verbose_name='Participação acumulada')),
+                ('coefficient_of_variation', models.DecimalField(blank=True, decimal_places=4, max_digits=10, null=True, verbose_name='Coeficiente de variação')),
+                ('period_start', models.DateField(verbose_name='Início do período')),
+                ('period_end', models.DateField(verbose_name='Fim do período')),
+                ('computed_at', models.DateTimeField(verbose_name='Calculado em')),
+            ],
+            options={
+                'verbose_name': 'Classificação ABC/XYZ',
+                'verbose_name_plural': 'Classificações ABC/XYZ',
+                'indexes': [models.Index(fields=['abc_class', 'xyz_class'], name='supply_class_abc_xyz_idx'), models.Index(fields=['xyz_class'], name='supply_class_xyz_idx')],
+            },
+        ),
+    ]
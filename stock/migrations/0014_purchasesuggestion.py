@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0013_supplyclassification'),
+        ('supplies', '0008_supplybatch_supply_batch_code_upper_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseSuggestion',
+            fields=[
+                ('supply_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='purchase_suggestion', serialize=False, to='supplies.supplyitem', verbose_name='Item de Insumo')),
+                ('average_daily_demand', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Demanda diária prevista')),
+                ('demand_std_dev', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Desvio padrão diário')),
+                ('lead_time_days', models.PositiveIntegerField(verbose_name='Prazo de reposição (dias)')),
+                ('safety_stock', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Estoque de segurança')),
+                ('reorder_point', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Ponto de pedido')),
+                ('available_quantity', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Disponível (estoque − reservado)')),
+                ('suggested_quantity', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Quantidade sugerida')),
+                ('needs_reorder', models.BooleanField(default=False, verbose_name='Comprar')),
+                ('computed_at', models.DateTimeField(verbose_name='Calculado em')),
+            ],
+            options={
+                'verbose_name': 'Sugestão de Compra',
+                'verbose_name_plural': 'Sugestões de Compra',
+                'indexes': [models.Index(fields=['needs_reorder'], name='purchase_sugg_reorder_idx')],
+            },
+        ),
+    ]
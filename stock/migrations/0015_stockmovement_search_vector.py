@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Preenche o documento de busca das movimentações já existentes
+# (mesma composição de stock.models.movement_search_vector)
+BACKFILL_SQL = """
+UPDATE stock_stockmovement AS m
+SET search_vector =
+    setweight(to_tsvector('simple', regexp_replace(COALESCE(m.reference, ''), '[[:punct:]]+', ' ', 'g')), 'A')
+    || setweight(to_tsvector('simple', regexp_replace(COALESCE(si_item.name, sb_item.name, ''), '[[:punct:]]+', ' ', 'g')), 'B')
+    || setweight(to_tsvector('simple', regexp_replace(COALESCE(sb.batch_code, ''), '[[:punct:]]+', ' ', 'g')), 'B')
+    || setweight(to_tsvector('simple', regexp_replace(COALESCE(m.notes, ''), '[[:punct:]]+', ' ', 'g')), 'C')
+FROM stock_stockitem AS si
+LEFT JOIN supplies_supplyitem AS si_item ON si_item.id = si.supply_item_id
+LEFT JOIN supplies_supplybatch AS sb ON sb.id = si.supply_batch_id
+LEFT JOIN supplies_supplyitem AS sb_item ON sb_item.id = sb.supply_item_id
+WHERE si.id = m.stock_item_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0001_initial'),
+        ('stock', '0014_purchasesuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='stock_mov_search_idx'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:43
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def zero_negative_balances(apps, schema_editor):
+    """
+    Saldos negativos impediriam a criação da CHECK: cada um é zerado com uma
+    movimentação de ajuste (erro de inventário), para que a correção fique no razão.
+    """
+    StockItem = apps.get_model("stock", "StockItem")
+    StockMovement = apps.get_model("stock", "StockMovement")
+    negatives = list(StockItem.objects.filter(quantity__lt=0).values_list("id", "quantity"))
+    if not negatives:
+        return
+
+    now = timezone.now()
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            stock_item_id=stock_item_id,
+            movement_type="ajuste",
+            adjustment_reason="erro_inventario",
+            quantity=-quantity,
+            date=now,
+            before_quantity=quantity,
+            after_quantity=0,
+            notes="Saldo negativo zerado na criação da restrição stock_item_quantity_non_negative",
+        )
+        for stock_item_id, quantity in negatives
+    ])
+    StockItem.objects.filter(quantity__lt=0).update(quantity=0, updated_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0001_initial'),
+        ('stock', '0015_stockmovement_search_vector'),
+        ('supplies', '0008_supplybatch_supply_batch_code_upper_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(zero_negative_balances, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='stockitem',
+            constraint=models.CheckConstraint(condition=models.Q(('quantity__gte', 0)), name='stock_item_quantity_non_negative'),
+        ),
+    ]
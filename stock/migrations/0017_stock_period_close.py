@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0016_stockitem_quantity_non_negative'),
+        ('supplies', '0008_supplybatch_supply_batch_code_upper_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockPeriodClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(unique=True, verbose_name='Período (1º dia do mês)')),
+                ('period_end', models.DateField(verbose_name='Fim do período')),
+                ('closed_at', models.DateTimeField(verbose_name='Fechado em')),
+                ('is_valid', models.BooleanField(default=True, help_text='Desmarcado quando o snapshot precisa ser reconstruído (comando rebuild_stock_close).', verbose_name='Válido')),
+                ('balance_count', models.PositiveIntegerField(default=0, verbose_name='Itens no snapshot')),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Fechado por')),
+            ],
+            options={
+                'verbose_name': 'Fechamento de Estoque',
+                'verbose_name_plural': 'Fechamentos de Estoque',
+                'ordering': ['-period'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockClosingBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit_of_measure', models.CharField(choices=[('un', 'Unidade'), ('g', 'Grama'), ('kg', 'Quilograma'), ('ml', 'Mililitro'), ('l', 'Litro'), ('fatia', 'Fatia')], max_length=16, verbose_name='Unidade')),
+                ('opening_balance', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Saldo inicial')),
+                ('inbound_total', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Entradas')),
+                ('outbound_total', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Saídas')),
+                ('adjustment_total', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Ajustes (com sinal)')),
+                ('closing_balance', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Saldo final')),
+                ('movement_count', models.PositiveIntegerField(verbose_name='Movimentações no período')),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closing_balances', to='stock.stocklocation', verbose_name='Local')),
+                ('stock_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closing_balances', to='stock.stockitem', verbose_name='Item de Estoque')),
+                ('supply_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closing_balances', to='supplies.supplyitem', verbose_name='Item de Insumo')),
+                ('period_close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='stock.stockperiodclose', verbose_name='Fechamento')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Fechamento',
+                'verbose_name_plural': 'Saldos de Fechamento',
+                'indexes': [models.Index(fields=['period_close', 'supply_item'], name='stock_close_item_idx')],
+                'unique_together': {('period_close', 'stock_item')},
+            },
+        ),
+    ]
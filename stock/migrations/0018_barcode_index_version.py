@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+# Versão do índice de códigos de barras (stock/services/barcode_index.py), compartilhada
+# entre processos. O nextval inicial faz o primeiro incremento já mudar `last_value`.
+VERSION_SEQUENCE_SQL = """
+CREATE SEQUENCE IF NOT EXISTS stock_barcode_index_version;
+SELECT nextval('stock_barcode_index_version');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0017_stock_period_close'),
+    ]
+
+    operations = [
+        migrations.RunSQL(VERSION_SEQUENCE_SQL, reverse_sql="DROP SEQUENCE IF EXISTS stock_barcode_index_version;"),
+    ]
@@ -1,6 +1,10 @@
 import uuid
 from decimal import Decimal
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Coalesce, Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.utils import timezone
 from simple_history.models import HistoricalRecords
 from commons.enums import UnitOfMeasureEnum
@@ -22,6 +26,9 @@ class StockLocation(models.Model):
     class Meta:
         verbose_name = "Local de Estoque"
         verbose_name_plural = "Locais de Estoque"
+        indexes = [
+            models.Index(OpClass(Upper("name"), name="text_pattern_ops"), name="stock_location_name_upper_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -76,6 +83,10 @@ class StockItem(models.Model):
         verbose_name_plural = "Estoques"
         unique_together = ("supply_batch", "location")  # 🔐 garante que não haja duplicidade de lote em local
         ordering = ["supply_item__name", "supply_batch__expiration_date"]
+        constraints = [
+            # 🔐 Saldo nunca negativo, qualquer que seja o caminho de escrita (ver StockPostingService)
+            models.CheckConstraint(condition=models.Q(quantity__gte=0), name="stock_item_quantity_non_negative"),
+        ]
 
 
     # ----------- Propriedades auxiliares -----------
@@ -162,6 +173,37 @@ class StockItem(models.Model):
             return self.quantity < threshold.min_quantity
         return self.quantity < Decimal("5.0")  # fallback padrão
 
+    def movement_aggregates(self):
+        """
+        Totais de movimentação calculados na hora, em uma única consulta (agregação
+        condicional sobre o índice (stock_item, date)). Não são persistidos: as
+        movimentações também entram por bulk_create (saídas, recebimento, importação) e
+        o consumo dos últimos 30 dias muda com o tempo, então colunas desnormalizadas
+        ficariam defasadas. Usado no cabeçalho do histórico e no bloco de informações do admin.
+        """
+        inbound = [StockMovementType.INBOUND, StockMovementType.PRODUCTION_OUTPUT]
+        outbound = [StockMovementType.OUTBOUND, StockMovementType.PRODUCTION_INPUT]
+        since = timezone.now() - timezone.timedelta(days=30)
+        zero = models.Value(Decimal("0.00"), output_field=models.DecimalField(max_digits=12, decimal_places=2))
+
+        totals = self.movements.aggregate(
+            total_movements=models.Count("id"),
+            total_in=Coalesce(
+                models.Sum("quantity", filter=models.Q(movement_type__in=inbound)), zero
+            ),
+            total_out=Coalesce(
+                models.Sum("quantity", filter=models.Q(movement_type__in=outbound)), zero
+            ),
+            used_30d=Coalesce(
+                models.Sum("quantity", filter=models.Q(movement_type__in=outbound, date__gte=since)), zero
+            ),
+            last_movement_date=models.Max("date"),
+        )
+        totals["average_daily_usage"] = totals.pop("used_30d") / Decimal("30.0")
+        avg = totals["average_daily_usage"]
+        totals["estimated_days_remaining"] = int(self.quantity / avg) if avg > 0 else None
+        return totals
+
     def recalculate_stock(self):
         self.quantity = self.total_in - self.total_out
         self.save()
@@ -210,11 +252,44 @@ class StockAdjustmentReason(models.TextChoices):
     DAMAGE = "avaria", "Avaria"
     THEFT = "furto", "Furto"
     SAMPLE = "amostra", "Amostra Técnica"
+    EXPIRED = "vencimento", "Descarte por Vencimento"
     ADMIN_EDIT = "ajuste_admin", "Ajuste Manual via Admin"
     OTHER = "outro", "Outro"
 
 from django.core.exceptions import ValidationError
 
+# Configuração de texto da busca: sem stemming, para casar códigos e nomes como digitados
+SEARCH_CONFIG = "simple"
+
+
+def _searchable(expression):
+    # Pontuação vira espaço: "NF-12345" é indexado como "nf" + "12345" (e não "nf" + "-12345")
+    return models.Func(
+        expression, models.Value("[[:punct:]]+"), models.Value(" "), models.Value("g"),
+        function="REGEXP_REPLACE", output_field=models.TextField(),
+    )
+
+
+def movement_search_vector():
+    """
+    Documento de busca de uma movimentação: referência (peso A), nome do insumo e
+    código do lote (B) e observações (C). Nome e lote vêm de subconsultas para que a
+    expressão possa ser usada em UPDATE (sem JOIN).
+    """
+    stock_item = StockItem.objects.filter(pk=models.OuterRef("stock_item_id"))
+    item_name = stock_item.annotate(
+        search_name=Coalesce("supply_item__name", "supply_batch__supply_item__name")
+    ).values("search_name")[:1]
+    batch_code = stock_item.values("supply_batch__batch_code")[:1]
+    empty = models.Value("")
+    return (
+        SearchVector(_searchable("reference"), weight="A", config=SEARCH_CONFIG)
+        + SearchVector(_searchable(Coalesce(models.Subquery(item_name), empty)), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(_searchable(Coalesce(models.Subquery(batch_code), empty)), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(_searchable("notes"), weight="C", config=SEARCH_CONFIG)
+    )
+
+
 class StockMovement(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name="movements")
@@ -241,14 +316,22 @@ class StockMovement(models.Model):
 
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
     updated_at = models.DateTimeField("Atualizado em", auto_now=True)
-    history = HistoricalRecords()
+    history = HistoricalRecords(excluded_fields=["search_vector"])
     before_quantity = models.DecimalField("Estoque Antes", max_digits=10, decimal_places=2, null=True, blank=True)
     after_quantity = models.DecimalField("Estoque Depois", max_digits=10, decimal_places=2, null=True, blank=True)
+    # Mantido por save() e pelos receivers de SupplyItem/SupplyBatch (ver stock.services.movement_search)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Movimentação de Estoque"
         verbose_name_plural = "Movimentações de Estoque"
         ordering = ["-date"]
+        indexes = [
+            # 📜 Histórico paginado por (date, id) de cada item
+            models.Index(fields=["stock_item", "-date", "-id"], name="stock_mov_item_date_idx"),
+            # 🔎 Busca textual (referência, observações, insumo e lote)
+            GinIndex(fields=["search_vector"], name="stock_mov_search_idx"),
+        ]
 
     def __str__(self):
         return f"{self.get_movement_type_display()} de {self.quantity} {self.stock_item.unit_of_measure} - {self.stock_item.object_name}"
@@ -272,8 +355,26 @@ class StockMovement(models.Model):
             StockMovementType.TRANSFER
         ]
 
+    def _check_open_period(self, deleting=False):
+        """
+        Bloqueia lançar, alterar ou excluir movimentações em período fechado: vale a data
+        nova e, em alterações e exclusões, a data gravada no banco.
+        """
+        locked_until = StockPeriodClose.locked_until()
+        if not locked_until:
+            return
+        dates = [] if deleting else [self.date]
+        if not self._state.adding:
+            dates.append(StockMovement.objects.filter(pk=self.pk).values_list("date", flat=True).first())
+        if any(moment and timezone.localdate(moment) <= locked_until for moment in dates):
+            action = "excluir" if deleting else "lançar ou alterar"
+            raise ValidationError({
+                "date": f"Período fechado até {locked_until:%d/%m/%Y}: não é possível {action} movimentações nessa data."
+            })
+
     def clean(self):
         super().clean()
+        self._check_open_period()
         if self.is_outbound and self.stock_item:
             available_qty = self.stock_item.quantity
             if self.quantity > available_qty:
@@ -285,13 +386,19 @@ class StockMovement(models.Model):
                 })
 
     def save(self, *args, **kwargs):
+        self._check_open_period()
         if not self.pk and self.stock_item:  # somente no create
             self.before_quantity = self.stock_item.quantity
         super().save(*args, **kwargs)
+        changes = {"search_vector": movement_search_vector()}
         if self.stock_item:
             self.after_quantity = self.stock_item.quantity
-            StockMovement.objects.filter(pk=self.pk).update(after_quantity=self.after_quantity)
+            changes["after_quantity"] = self.after_quantity
+        StockMovement.objects.filter(pk=self.pk).update(**changes)
 
+    def delete(self, *args, **kwargs):
+        self._check_open_period(deleting=True)
+        return super().delete(*args, **kwargs)
 
     @property
     def location_display(self):
@@ -330,3 +437,247 @@ class StockThreshold(models.Model):
 
     def __str__(self):
         return f"Alerta para {self.supply_item.name} ({self.min_quantity})"
+
+
+# ----------------------------------
+# Reservas para ordens de produção
+# ----------------------------------
+class StockReservationStatus(models.TextChoices):
+    ACTIVE = "ativa", "Ativa"
+    RELEASED = "liberada", "Liberada"
+    CONSUMED = "consumida", "Consumida"
+
+
+class StockReservation(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    production_order = models.ForeignKey(
+        "production.ProductionOrder",
+        on_delete=models.CASCADE,
+        related_name="stock_reservations",
+        verbose_name="Ordem de Produção"
+    )
+    supply_item = models.ForeignKey(
+        SupplyItem,
+        on_delete=models.CASCADE,
+        related_name="stock_reservations",
+        verbose_name="Item de Insumo"
+    )
+    quantity = models.DecimalField("Quantidade reservada", max_digits=10, decimal_places=2)
+    status = models.CharField(
+        "Status", max_length=16,
+        choices=StockReservationStatus.choices,
+        default=StockReservationStatus.ACTIVE
+    )
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "Reserva de Estoque"
+        verbose_name_plural = "Reservas de Estoque"
+        unique_together = ("production_order", "supply_item")
+        indexes = [
+            models.Index(fields=["production_order", "status"], name="stock_resv_order_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"Reserva de {self.quantity} - {self.supply_item.name} ({self.get_status_display()})"
+
+
+class StockReservationTotal(models.Model):
+    """
+    Total reservado (reservas ativas) por item de insumo, mantido pelo
+    StockReservationService a cada criação/liberação/consumo de reservas.
+    """
+    supply_item = models.OneToOneField(
+        SupplyItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="reservation_total",
+        verbose_name="Item de Insumo"
+    )
+    reserved_quantity = models.DecimalField("Quantidade reservada", max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "Total Reservado"
+        verbose_name_plural = "Totais Reservados"
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(reserved_quantity__gte=0),
+                name="stock_reservation_total_non_negative",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.supply_item.name}: {self.reserved_quantity} reservado"
+
+
+# ----------------------------------
+# Classificação ABC / XYZ dos insumos
+# ----------------------------------
+class AbcClass(models.TextChoices):
+    A = "A", "A - Alto consumo"
+    B = "B", "B - Consumo intermediário"
+    C = "C", "C - Baixo consumo"
+
+
+class XyzClass(models.TextChoices):
+    X = "X", "X - Demanda estável"
+    Y = "Y", "Y - Demanda variável"
+    Z = "Z", "Z - Demanda irregular"
+
+
+class SupplyClassification(models.Model):
+    """
+    Classes ABC (participação acumulada no consumo) e XYZ (coeficiente de variação
+    do consumo mensal) de cada insumo. Recalculada em lote por `classify_supplies`.
+    """
+    supply_item = models.OneToOneField(
+        SupplyItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="classification",
+        verbose_name="Item de Insumo"
+    )
+    abc_class = models.CharField("Classe ABC", max_length=1, choices=AbcClass.choices)
+    xyz_class = models.CharField("Classe XYZ", max_length=1, choices=XyzClass.choices)
+    total_consumption = models.DecimalField("Consumo no período", max_digits=14, decimal_places=2)
+    cumulative_share = models.DecimalField("Participação acumulada", max_digits=6, decimal_places=4)
+    coefficient_of_variation = models.DecimalField(
+        "Coeficiente de variação", max_digits=10, decimal_places=4, null=True, blank=True
+    )
+    period_start = models.DateField("Início do período")
+    period_end = models.DateField("Fim do período")
+    computed_at = models.DateTimeField("Calculado em")
+
+    class Meta:
+        verbose_name = "Classificação ABC/XYZ"
+        verbose_name_plural = "Classificações ABC/XYZ"
+        indexes = [
+            models.Index(fields=["abc_class", "xyz_class"], name="supply_class_abc_xyz_idx"),
+            models.Index(fields=["xyz_class"], name="supply_class_xyz_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.supply_item.name}: {self.abc_class}{self.xyz_class}"
+
+
+# ----------------------------------
+# Sugestões de compra (ponto de pedido)
+# ----------------------------------
+class PurchaseSuggestion(models.Model):
+    """
+    Ponto de pedido e quantidade sugerida de compra por insumo, recalculados em
+    lote pelo comando `compute_purchase_suggestions`.
+    """
+    supply_item = models.OneToOneField(
+        SupplyItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="purchase_suggestion",
+        verbose_name="Item de Insumo"
+    )
+    average_daily_demand = models.DecimalField("Demanda diária prevista", max_digits=14, decimal_places=4)
+    demand_std_dev = models.DecimalField("Desvio padrão diário", max_digits=14, decimal_places=4)
+    lead_time_days = models.PositiveIntegerField("Prazo de reposição (dias)")
+    safety_stock = models.DecimalField("Estoque de segurança", max_digits=14, decimal_places=2)
+    reorder_point = models.DecimalField("Ponto de pedido", max_digits=14, decimal_places=2)
+    available_quantity = models.DecimalField("Disponível (estoque − reservado)", max_digits=14, decimal_places=2)
+    suggested_quantity = models.DecimalField("Quantidade sugerida", max_digits=14, decimal_places=2)
+    needs_reorder = models.BooleanField("Comprar", default=False)
+    computed_at = models.DateTimeField("Calculado em")
+
+    class Meta:
+        verbose_name = "Sugestão de Compra"
+        verbose_name_plural = "Sugestões de Compra"
+        indexes = [
+            models.Index(fields=["needs_reorder"], name="purchase_sugg_reorder_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.supply_item.name}: comprar {self.suggested_quantity}"
+
+
+# ----------------------------------
+# Fechamento mensal do estoque
+# ----------------------------------
+class StockPeriodClose(models.Model):
+    """
+    Fechamento de um mês: congela os saldos por item de estoque (StockClosingBalance)
+    e bloqueia movimentações com data até o fim do período fechado.
+    """
+    period = models.DateField("Período (1º dia do mês)", unique=True)
+    period_end = models.DateField("Fim do período")
+    closed_at = models.DateTimeField("Fechado em")
+    closed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        verbose_name="Fechado por"
+    )
+    is_valid = models.BooleanField(
+        "Válido", default=True,
+        help_text="Desmarcado quando o snapshot precisa ser reconstruído (comando rebuild_stock_close)."
+    )
+    balance_count = models.PositiveIntegerField("Itens no snapshot", default=0)
+
+    class Meta:
+        verbose_name = "Fechamento de Estoque"
+        verbose_name_plural = "Fechamentos de Estoque"
+        ordering = ["-period"]
+
+    def __str__(self):
+        return f"Fechamento {self.period:%m/%Y}"
+
+    @classmethod
+    def locked_until(cls):
+        """
+        Último dia bloqueado para movimentações (fim do último período fechado). Lido do
+        banco a cada chamada — uma linha pelo índice único de `period` — para que um
+        fechamento feito em outro processo valha imediatamente em todos os workers.
+        """
+        return cls.objects.order_by("-period").values_list("period_end", flat=True).first()
+
+
+class StockClosingBalance(models.Model):
+    """
+    Linha imutável do snapshot: saldo de abertura, totais do mês e saldo de
+    fechamento de um item de estoque (item + lote + local) no período.
+    """
+    period_close = models.ForeignKey(
+        StockPeriodClose, on_delete=models.CASCADE, related_name="balances", verbose_name="Fechamento"
+    )
+    stock_item = models.ForeignKey(
+        StockItem, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="closing_balances", verbose_name="Item de Estoque"
+    )
+    supply_item = models.ForeignKey(
+        SupplyItem, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="closing_balances", verbose_name="Item de Insumo"
+    )
+    location = models.ForeignKey(
+        StockLocation, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="closing_balances", verbose_name="Local"
+    )
+    unit_of_measure = models.CharField("Unidade", max_length=16, choices=UnitOfMeasureEnum.choices)
+    opening_balance = models.DecimalField("Saldo inicial", max_digits=14, decimal_places=2)
+    inbound_total = models.DecimalField("Entradas", max_digits=14, decimal_places=2)
+    outbound_total = models.DecimalField("Saídas", max_digits=14, decimal_places=2)
+    adjustment_total = models.DecimalField("Ajustes (com sinal)", max_digits=14, decimal_places=2)
+    closing_balance = models.DecimalField("Saldo final", max_digits=14, decimal_places=2)
+    movement_count = models.PositiveIntegerField("Movimentações no período")
+
+    class Meta:
+        verbose_name = "Saldo de Fechamento"
+        verbose_name_plural = "Saldos de Fechamento"
+        unique_together = ("period_close", "stock_item")
+        indexes = [
+            models.Index(fields=["period_close", "supply_item"], name="stock_close_item_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.period_close} - {self.stock_item_id}: {self.closing_balance}"
+
+    def save(self, *args, **kwargs):
+        # Snapshot imutável: só é gravado pelo fechamento (bulk_create) e substituído pelo rebuild
+        if not self._state.adding:
+            raise ValidationError("Saldos de fechamento não podem ser alterados; reconstrua o fechamento.")
+        super().save(*args, **kwargs)
@@ -0,0 +1,78 @@
+# stock/services/barcode_index.py
+
+import threading
+from django.db import connection, transaction
+from supplies.models import SupplyItem
+
+# Sequência do Postgres (migração 0018): a versão é compartilhada por todos os processos
+# sem depender do cache, e ler `last_value` não trava nem entra em transação
+VERSION_SEQUENCE = "stock_barcode_index_version"
+
+
+def normalize_code(code) -> str:
+    """Mesma normalização do SKU em SupplyItem.save(): sem espaços e em maiúsculas."""
+    return str(code or "").strip().upper().replace(" ", "")
+
+
+class BarcodeIndex:
+    """
+    Índice em memória (por processo) de código de barras/SKU → insumo.
+
+    Carregado com uma única consulta e consultado com um acesso a dict por leitura.
+    Alterações em SupplyItem incrementam uma versão no banco (após o commit); cada
+    processo compara a versão uma vez por requisição (`ensure_fresh`) e recarrega se
+    estiver defasado. A carga é preguiçosa: acontece na primeira leitura do processo.
+    """
+
+    def __init__(self):
+        self._entries = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_version():
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT last_value FROM {VERSION_SEQUENCE}")
+            return cursor.fetchone()[0]
+
+    def warm(self):
+        # Versão lida antes das linhas: uma alteração durante a carga deixa o índice
+        # com a versão antiga e a próxima requisição recarrega
+        version = self.current_version()
+        entries = {}
+        rows = SupplyItem.objects.values_list("id", "sku", "barcode", "name", "unit_of_measure", "is_active")
+        for item_id, sku, barcode, name, unit, is_active in rows.iterator(chunk_size=5000):
+            entry = {"id": item_id, "sku": sku, "name": name, "unit_of_measure": unit, "is_active": is_active}
+            entries[normalize_code(sku)] = entry
+            if barcode:
+                # Código de barras tem prioridade sobre um SKU igual de outro item
+                entries[normalize_code(barcode)] = entry
+        with self._lock:
+            self._entries, self._version = entries, version
+        return entries
+
+    def ensure_fresh(self):
+        if self._entries is None or self.current_version() != self._version:
+            self.warm()
+
+    def lookup(self, code):
+        # Cópia local: um invalidate() de outra thread pode zerar `_entries` no meio
+        entries = self._entries
+        if entries is None:
+            entries = self.warm()
+        return entries.get(normalize_code(code))
+
+    def invalidate(self):
+        """Marca os índices de todos os processos como defasados (chamar após o commit)."""
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT nextval('{VERSION_SEQUENCE}')")
+        with self._lock:
+            self._entries = None
+
+
+barcode_index = BarcodeIndex()
+
+
+def invalidate_barcode_index(sender, **kwargs):
+    """Receiver de post_save/post_delete de SupplyItem: invalida quando a alteração é visível."""
+    transaction.on_commit(barcode_index.invalidate)
@@ -0,0 +1,111 @@
+# stock/services/classification.py
+
+from decimal import Decimal
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from stock.models import SupplyClassification, AbcClass, XyzClass
+from stock.services.demand import closed_months, load_outflow_matrix
+
+DEFAULT_MONTHS = 24
+
+# Limites da participação acumulada *antes* do item: A até 80%, B até 95%
+ABC_THRESHOLDS = (0.80, 0.95)
+# Limites do coeficiente de variação mensal: X até 0,5, Y até 1,0
+XYZ_THRESHOLDS = (0.5, 1.0)
+
+SAVE_BATCH_SIZE = 2000
+
+
+def classify(matrix, units):
+    """
+    Classificação vetorizada.
+
+    - ABC: itens ordenados por consumo (decrescente) dentro de cada unidade de medida;
+      a classe vem da participação acumulada dos itens anteriores.
+    - XYZ: coeficiente de variação (desvio padrão / média) do consumo mensal.
+    Retorna (abc, xyz, totais, participação acumulada, cv).
+    """
+    totals = matrix.sum(axis=1)
+    n_items = len(totals)
+    if n_items == 0:
+        empty = np.array([], dtype=object)
+        return empty, empty, totals, totals, totals
+
+    # --- ABC (por unidade, para não somar kg com unidades) ---
+    _, unit_codes = np.unique(units.astype(str), return_inverse=True)
+    order = np.lexsort((-totals, unit_codes))
+    sorted_totals = totals[order]
+    sorted_units = unit_codes[order]
+
+    running = np.cumsum(sorted_totals)
+    group_start = np.r_[True, sorted_units[1:] != sorted_units[:-1]]
+    start_positions = np.flatnonzero(group_start)
+    group_of = np.cumsum(group_start) - 1
+    offset = (running - sorted_totals)[start_positions][group_of]
+    group_total = np.add.reduceat(sorted_totals, start_positions)[group_of]
+
+    cumulative = running - offset
+    previous = cumulative - sorted_totals
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(group_total > 0, cumulative / group_total, 0.0)
+        previous_share = np.where(group_total > 0, previous / group_total, 1.0)
+
+    sorted_abc = np.select(
+        [sorted_totals <= 0, previous_share < ABC_THRESHOLDS[0], previous_share < ABC_THRESHOLDS[1]],
+        [AbcClass.C, AbcClass.A, AbcClass.B],
+        default=AbcClass.C,
+    ).astype(object)
+
+    abc = np.empty(n_items, dtype=object)
+    abc[order] = sorted_abc
+    cumulative_share = np.empty(n_items, dtype=np.float64)
+    cumulative_share[order] = share
+
+    # --- XYZ ---
+    mean = matrix.mean(axis=1)
+    std = matrix.std(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(mean > 0, std / mean, np.nan)
+    xyz = np.select(
+        [np.isnan(cv), cv <= XYZ_THRESHOLDS[0], cv <= XYZ_THRESHOLDS[1]],
+        [XyzClass.Z, XyzClass.X, XyzClass.Y],
+        default=XyzClass.Z,
+    ).astype(object)
+
+    return abc, xyz, totals, cumulative_share, cv
+
+
+@transaction.atomic
+def run_classification(months=DEFAULT_MONTHS, today=None) -> int:
+    """Recalcula e grava a classificação ABC/XYZ de todos os insumos."""
+    period_start, period_end = closed_months(months, today)
+    ids, units, matrix = load_outflow_matrix(period_start, period_end)
+    abc, xyz, totals, shares, cv = classify(matrix, units)
+
+    now = timezone.now()
+    objects = [
+        SupplyClassification(
+            supply_item_id=item_id,
+            abc_class=abc[index],
+            xyz_class=xyz[index],
+            total_consumption=Decimal(f"{totals[index]:.2f}"),
+            cumulative_share=Decimal(f"{shares[index]:.4f}"),
+            coefficient_of_variation=None if np.isnan(cv[index]) else Decimal(f"{min(cv[index], 999999):.4f}"),
+            period_start=period_start,
+            period_end=period_end,
+            computed_at=now,
+        )
+        for index, item_id in enumerate(ids)
+    ]
+    SupplyClassification.objects.bulk_create(
+        objects,
+        batch_size=SAVE_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["supply_item"],
+        update_fields=[
+            "abc_class", "xyz_class", "total_consumption", "cumulative_share",
+            "coefficient_of_variation", "period_start", "period_end", "computed_at",
+        ],
+    )
+    return len(objects)
@@ -0,0 +1,244 @@
+# stock/services/closing.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Q, Sum, Value, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from commons.pagination import keyset_page
+from stock.models import (
+    StockItem, StockMovement, StockMovementType, StockPeriodClose, StockClosingBalance
+)
+from stock.services.demand import start_of_day
+from stock.services.ledger import SIGNED_QUANTITY
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+_DECIMAL = DecimalField(max_digits=14, decimal_places=2)
+_ZERO = Value(Decimal("0.00"), output_field=_DECIMAL)
+
+INBOUND_TYPES = [StockMovementType.INBOUND, StockMovementType.PRODUCTION_OUTPUT]
+OUTBOUND_TYPES = [StockMovementType.OUTBOUND, StockMovementType.PRODUCTION_INPUT, StockMovementType.TRANSFER]
+
+
+class ClosingError(ValueError):
+    pass
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def month_end(day):
+    return next_month(day) - timedelta(days=1)
+
+
+def _opening_balances(period, previous_close):
+    """Saldo de abertura por item: do snapshot anterior, ou do razão inteiro na primeira vez."""
+    if previous_close is not None and previous_close.is_valid:
+        return dict(previous_close.balances.values_list("stock_item_id", "closing_balance"))
+    rows = (
+        StockMovement.objects.filter(date__lt=start_of_day(period))
+        .values("stock_item_id")
+        .annotate(balance=Sum(SIGNED_QUANTITY))
+        .values_list("stock_item_id", "balance")
+    )
+    return dict(rows)
+
+
+def compute_balances(period, previous_close=None):
+    """
+    Saldos do mês de `period` por item de estoque: saldo inicial + uma consulta agrupada
+    com os totais do mês (entradas, saídas, ajustes com sinal). Retorna objetos não salvos.
+    """
+    period_end = month_end(period)
+    opening = _opening_balances(period, previous_close)
+
+    adjustments = Q(movement_type=StockMovementType.ADJUSTMENT)
+    totals = {
+        row["stock_item_id"]: row
+        for row in (
+            StockMovement.objects.filter(
+                date__gte=start_of_day(period),
+                date__lt=start_of_day(period_end + timedelta(days=1)),
+            )
+            .values("stock_item_id")
+            .annotate(
+                inbound=Coalesce(Sum("quantity", filter=Q(movement_type__in=INBOUND_TYPES)), _ZERO),
+                outbound=Coalesce(Sum("quantity", filter=Q(movement_type__in=OUTBOUND_TYPES)), _ZERO),
+                adjustment=Coalesce(Sum(SIGNED_QUANTITY, filter=adjustments), _ZERO),
+                net=Coalesce(Sum(SIGNED_QUANTITY), _ZERO),
+                movement_count=Count("id"),
+            )
+        )
+    }
+
+    stock_item_ids = {pk for pk, balance in opening.items() if balance} | set(totals)
+    items = {
+        row["id"]: row
+        for row in StockItem.objects.filter(pk__in=stock_item_ids)
+        .annotate(resolved_supply_item_id=Coalesce("supply_item_id", "supply_batch__supply_item_id"))
+        .values("id", "resolved_supply_item_id", "location_id", "unit_of_measure")
+    }
+
+    zero = Decimal("0.00")
+    balances = []
+    for stock_item_id in stock_item_ids:
+        item = items.get(stock_item_id)
+        if item is None:
+            continue
+        row = totals.get(stock_item_id, {})
+        opening_balance = opening.get(stock_item_id) or zero
+        balances.append(StockClosingBalance(
+            stock_item_id=stock_item_id,
+            supply_item_id=item["resolved_supply_item_id"],
+            location_id=item["location_id"],
+            unit_of_measure=item["unit_of_measure"],
+            opening_balance=opening_balance,
+            inbound_total=row.get("inbound", zero),
+            outbound_total=row.get("outbound", zero),
+            adjustment_total=row.get("adjustment", zero),
+            closing_balance=opening_balance + row.get("net", zero),
+            movement_count=row.get("movement_count", 0),
+        ))
+    return balances
+
+
+@transaction.atomic
+def close_period(period=None, user=None) -> StockPeriodClose:
+    """
+    Fecha o mês de `period` (padrão: mês anterior). Os fechamentos são sequenciais:
+    só fecha o mês seguinte ao último fechado, e nunca o mês corrente.
+    """
+    today = timezone.localdate()
+    period = month_start(period or (month_start(today) - timedelta(days=1)))
+    if period >= month_start(today):
+        raise ClosingError("Só é possível fechar meses já encerrados.")
+
+    last_close = StockPeriodClose.objects.select_for_update().order_by("-period").first()
+    if last_close is not None:
+        if period <= last_close.period:
+            raise ClosingError(f"{period:%m/%Y} já está fechado.")
+        if period != next_month(last_close.period):
+            raise ClosingError(f"Feche antes {next_month(last_close.period):%m/%Y}.")
+
+    balances = compute_balances(period, previous_close=last_close)
+    close = StockPeriodClose.objects.create(
+        period=period,
+        period_end=month_end(period),
+        closed_at=timezone.now(),
+        closed_by=user,
+        balance_count=len(balances),
+    )
+    for balance in balances:
+        balance.period_close = close
+    StockClosingBalance.objects.bulk_create(balances, batch_size=2000)
+    return close
+
+
+@transaction.atomic
+def rebuild_close(period, cascade=True) -> list:
+    """
+    Reconstrói o snapshot de `period` a partir do fechamento anterior (ou do razão) e,
+    com `cascade`, os fechamentos seguintes, já que cada um parte do saldo do anterior.
+    """
+    period = month_start(period)
+    closes = list(
+        StockPeriodClose.objects.select_for_update()
+        .filter(period__gte=period)
+        .order_by("period")
+    )
+    if not closes or closes[0].period != period:
+        raise ClosingError(f"{period:%m/%Y} não está fechado.")
+    if not cascade:
+        closes = closes[:1]
+
+    previous = StockPeriodClose.objects.filter(period__lt=period).order_by("-period").first()
+    for close in closes:
+        balances = compute_balances(close.period, previous_close=previous)
+        close.balances.all().delete()
+        for balance in balances:
+            balance.period_close = close
+        StockClosingBalance.objects.bulk_create(balances, batch_size=2000)
+        close.balance_count = len(balances)
+        close.is_valid = True
+        close.save(update_fields=["balance_count", "is_valid"])
+        previous = close
+    return closes
+
+
+def closing_balances_page(period, supply_item_id=None, location_id=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Saldos de um fechamento lidos direto do snapshot (sem tocar no razão)."""
+    close = StockPeriodClose.objects.filter(period=month_start(period)).first()
+    if close is None:
+        raise ClosingError(f"{period:%m/%Y} não está fechado.")
+
+    queryset = close.balances.all()
+    if supply_item_id:
+        queryset = queryset.filter(supply_item_id=supply_item_id)
+    if location_id:
+        queryset = queryset.filter(location_id=location_id)
+    queryset = queryset.values(
+        "id", "stock_item_id", "supply_item_id", "supply_item__name", "location__name",
+        "unit_of_measure", "opening_balance", "inbound_total", "outbound_total",
+        "adjustment_total", "closing_balance", "movement_count",
+    )
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    rows, next_cursor = keyset_page(queryset, ["id"], cursor=cursor, limit=limit)
+
+    def text(value):
+        return None if value is None else str(value)
+
+    return {
+        "period": close.period.strftime("%Y-%m"),
+        "closed_at": close.closed_at.isoformat(),
+        "is_valid": close.is_valid,
+        "results": [
+            {
+                "stock_item_id": text(row["stock_item_id"]),
+                "supply_item_id": text(row["supply_item_id"]),
+                "supply_item_name": row["supply_item__name"],
+                "location": row["location__name"],
+                "unit_of_measure": row["unit_of_measure"],
+                "opening_balance": str(row["opening_balance"]),
+                "inbound_total": str(row["inbound_total"]),
+                "outbound_total": str(row["outbound_total"]),
+                "adjustment_total": str(row["adjustment_total"]),
+                "closing_balance": str(row["closing_balance"]),
+                "movement_count": row["movement_count"],
+            }
+            for row in rows
+        ],
+        "next": next_cursor,
+    }
+
+
+def parse_period(value):
+    """Converte 'AAAA-MM' no primeiro dia do mês; levanta ClosingError se inválido."""
+    try:
+        year, month = str(value).split("-")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        raise ClosingError("Período deve estar no formato AAAA-MM.")
+
+
+def list_closes():
+    return [
+        {
+            "period": close["period"].strftime("%Y-%m"),
+            "period_end": close["period_end"].isoformat(),
+            "closed_at": close["closed_at"].isoformat(),
+            "closed_by": close["closed_by__username"],
+            "is_valid": close["is_valid"],
+            "balance_count": close["balance_count"],
+        }
+        for close in StockPeriodClose.objects.values(
+            "period", "period_end", "closed_at", "closed_by__username", "is_valid", "balance_count"
+        )
+    ]
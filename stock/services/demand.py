@@ -0,0 +1,106 @@
+# stock/services/demand.py
+
+from datetime import date, datetime, time, timedelta
+import numpy as np
+from django.db.models import DateField, Func, Sum, Value, FloatField, IntegerField
+from django.db.models.functions import Cast, Coalesce, ExtractMonth, ExtractYear, TruncDate
+from django.utils import timezone
+from stock.models import StockMovement, StockMovementType
+from supplies.models import SupplyItem
+
+# Movimentações que representam consumo do insumo (transferências não contam)
+CONSUMPTION_TYPES = [StockMovementType.OUTBOUND, StockMovementType.PRODUCTION_INPUT]
+
+MONTH = "month"
+ITERATOR_CHUNK_SIZE = 2000
+
+
+def month_index(day) -> int:
+    return day.year * 12 + day.month - 1
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def closed_months(months, today=None):
+    """Período de `months` meses fechados, terminando no último dia do mês anterior."""
+    today = today or timezone.localdate()
+    start_index = month_index(today) - months
+    period_start = date(start_index // 12, start_index % 12 + 1, 1)
+    period_end = today.replace(day=1) - timedelta(days=1)
+    return period_start, period_end
+
+
+def closed_weeks(weeks, today=None):
+    """Período de `weeks` semanas completas, terminando ontem."""
+    today = today or timezone.localdate()
+    period_end = today - timedelta(days=1)
+    period_start = period_end - timedelta(days=weeks * 7 - 1)
+    return period_start, period_end
+
+
+def _bucket_expression(period_start, bucket):
+    """
+    Índice inteiro do período de cada movimentação, calculado no banco. Tudo pelo dia
+    local (fuso do projeto): dias desde `period_start` (date − date = inteiro no
+    Postgres) divididos inteiramente por `bucket`.
+    """
+    if bucket == MONTH:
+        return ExtractYear("date") * 12 + ExtractMonth("date") - 1 - month_index(period_start)
+    days = Func(
+        TruncDate("date"), Value(period_start, output_field=DateField()),
+        template="(%(expressions)s)", arg_joiner=" - ", output_field=IntegerField(),
+    )
+    return days / Value(bucket)
+
+
+def load_outflow_matrix(period_start, period_end, bucket=MONTH, movement_types=CONSUMPTION_TYPES):
+    """
+    Consumo de cada insumo por período em uma única consulta agrupada.
+
+    `bucket` é "month" ou um número de dias (ex.: 7 para semanas a partir de
+    `period_start`). Retorna (ids, unidades, matriz) com uma linha por insumo e uma
+    coluna por período; insumos sem consumo entram com a linha zerada.
+    `movement_types` restringe os tipos de saída considerados.
+    """
+    items = list(SupplyItem.objects.order_by("id").values_list("id", "unit_of_measure"))
+    ids = [item_id for item_id, _ in items]
+    units = np.array([unit for _, unit in items], dtype=object)
+    position = {item_id: index for index, item_id in enumerate(ids)}
+
+    if bucket == MONTH:
+        n_buckets = month_index(period_end) - month_index(period_start) + 1
+    else:
+        n_buckets = -(-((period_end - period_start).days + 1) // bucket)
+    matrix = np.zeros((len(ids), n_buckets), dtype=np.float64)
+
+    rows = (
+        StockMovement.objects
+        .filter(
+            movement_type__in=movement_types,
+            date__gte=start_of_day(period_start),
+            date__lt=start_of_day(period_end + timedelta(days=1)),
+        )
+        .annotate(
+            item_id=Coalesce("stock_item__supply_item_id", "stock_item__supply_batch__supply_item_id"),
+            # Índice inteiro vindo do banco: evita converter 1M+ datas em Python
+            bucket=_bucket_expression(period_start, bucket),
+        )
+        .values_list("item_id", "bucket")
+        .annotate(total=Cast(Sum("quantity"), FloatField()))
+        .order_by()
+    )
+
+    row_index, col_index, totals = [], [], []
+    for item_id, column, total in rows.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        index = position.get(item_id)
+        if index is None or not 0 <= column < n_buckets:
+            continue
+        row_index.append(index)
+        col_index.append(column)
+        totals.append(total)
+
+    if totals:
+        np.add.at(matrix, (np.array(row_index), np.array(col_index)), np.array(totals))
+    return ids, units, matrix
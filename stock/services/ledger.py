@@ -0,0 +1,244 @@
+# stock/services/ledger.py
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db.models import Case, When, F, Q, Sum, Value, Window, DecimalField
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.core.exceptions import ValidationError
+from commons.ids import parse_uuid
+from commons.pagination import InvalidCursor, encode_cursor, decode_cursor, clean_cursor_values, keyset_filter
+from stock.models import StockMovement, StockMovementType
+from stock.services.demand import start_of_day
+
+LEDGER_ORDERING = ["date", "id"]
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 2000
+
+_DECIMAL = DecimalField(max_digits=14, decimal_places=2)
+
+# Quantidade com sinal de cada movimentação:
+#   + entradas e produto acabado
+#   - saídas, consumo de produção e transferências (mesma regra de StockMovement.is_outbound)
+#   ajustes: + quando há destino, - quando há apenas origem (como gera o StockOrchestrator)
+SIGNED_QUANTITY = Case(
+    When(
+        movement_type__in=[StockMovementType.INBOUND, StockMovementType.PRODUCTION_OUTPUT],
+        then=F("quantity"),
+    ),
+    When(
+        movement_type__in=[
+            StockMovementType.OUTBOUND,
+            StockMovementType.PRODUCTION_INPUT,
+            StockMovementType.TRANSFER,
+        ],
+        then=-F("quantity"),
+    ),
+    When(
+        movement_type=StockMovementType.ADJUSTMENT,
+        source_location__isnull=False,
+        destination_location__isnull=True,
+        then=-F("quantity"),
+    ),
+    default=F("quantity"),
+    output_field=_DECIMAL,
+)
+
+
+class LedgerError(ValueError):
+    pass
+
+
+def parse_moment(value):
+    """Parâmetro de período: data/hora ISO 8601 ou só a data (AAAA-MM-DD); None sem valor."""
+    if not value:
+        return None
+    try:
+        # parse_date primeiro: parse_datetime também aceita "AAAA-MM-DD" (vira meia-noite)
+        moment = parse_date(value) or parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise LedgerError(f"Data inválida: {value} (use AAAA-MM-DD ou ISO 8601).")
+    return moment
+
+
+def _lower_bound(date_from):
+    """Início do período: uma data vale a partir da meia-noite local."""
+    if not date_from or isinstance(date_from, datetime):
+        return timezone.make_aware(date_from) if date_from and timezone.is_naive(date_from) else date_from
+    return start_of_day(date_from)
+
+
+def ledger_queryset(stock_item_id=None, supply_item_id=None, date_to=None):
+    """
+    Movimentações do extrato (de um item de estoque ou de todo um item de insumo).
+    `date_to` só com a data inclui o dia inteiro; com hora, até aquele instante.
+    """
+    if stock_item_id:
+        stock_item_id = parse_uuid(stock_item_id, LedgerError, "stock_item_id inválido.")
+        queryset = StockMovement.objects.filter(stock_item_id=stock_item_id)
+    elif supply_item_id:
+        supply_item_id = parse_uuid(supply_item_id, LedgerError, "supply_item_id inválido.")
+        queryset = StockMovement.objects.filter(
+            Q(stock_item__supply_item_id=supply_item_id)
+            | Q(stock_item__supply_item__isnull=True, stock_item__supply_batch__supply_item_id=supply_item_id)
+        )
+    else:
+        raise LedgerError("Informe stock_item_id ou supply_item_id.")
+
+    if isinstance(date_to, datetime):
+        queryset = queryset.filter(date__lte=timezone.make_aware(date_to) if timezone.is_naive(date_to) else date_to)
+    elif date_to:
+        queryset = queryset.filter(date__lt=start_of_day(date_to + timedelta(days=1)))
+    return queryset
+
+
+def opening_balance(queryset, date_from) -> Decimal:
+    """Saldo anterior ao período: um único SUM no banco sobre as movimentações antes de `date_from`."""
+    if not date_from:
+        return Decimal("0.00")
+    total = queryset.filter(date__lt=date_from).aggregate(
+        total=Coalesce(Sum(SIGNED_QUANTITY), Value(Decimal("0.00")), output_field=_DECIMAL)
+    )["total"]
+    return total
+
+
+def _cursor_signature(stock_item_id, supply_item_id, date_from):
+    """Filtros que definem o saldo corrente: o cursor de um extrato não serve para outro."""
+    if stock_item_id:
+        owner = ["stock_item", str(parse_uuid(stock_item_id, LedgerError, "stock_item_id inválido."))]
+    else:
+        owner = ["supply_item", str(parse_uuid(supply_item_id, LedgerError, "supply_item_id inválido."))]
+    payload = json.dumps([*owner, date_from.isoformat() if date_from else ""])
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def _decode_ledger_cursor(cursor, signature, queryset):
+    """(after, saldo) do cursor; cursor ilegível, de outro extrato ou com saldo não numérico é LedgerError."""
+    try:
+        values = decode_cursor(cursor)
+        if values is None:
+            return None, None
+        if len(values) != 4 or values[0] != signature:
+            raise InvalidCursor("Cursor inválido para este extrato.")
+        after = clean_cursor_values(queryset, LEDGER_ORDERING, values[1:3])
+        balance = _DECIMAL.to_python(values[3])
+    except ValidationError:
+        raise LedgerError("Cursor inválido.")
+    except InvalidCursor as exc:
+        raise LedgerError(str(exc))
+    if balance is None:
+        raise LedgerError("Cursor inválido.")
+    return after, balance
+
+
+def _page_rows(queryset, after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Linhas ordenadas por (date, id) com saldo acumulado calculado por SUM() OVER (...).
+    O saldo é relativo ao início do recorte; quem chama soma o saldo de abertura.
+    """
+    if after:
+        queryset = queryset.filter(keyset_filter(LEDGER_ORDERING, after))
+    return (
+        queryset
+        .annotate(
+            signed_quantity=SIGNED_QUANTITY,
+            running_total=Window(
+                expression=Sum(SIGNED_QUANTITY),
+                order_by=[F("date").asc(), F("id").asc()],
+                frame=RowRange(start=None, end=0),
+            ),
+        )
+        .order_by(*LEDGER_ORDERING)
+        .values(
+            "id", "date", "movement_type", "quantity", "signed_quantity", "running_total",
+            "stock_item_id", "reference", "after_quantity",
+        )[:limit]
+    )
+
+
+def _serialize(row, base_balance):
+    return {
+        "id": str(row["id"]),
+        "date": row["date"].isoformat(),
+        "movement_type": row["movement_type"],
+        "stock_item_id": str(row["stock_item_id"]),
+        "quantity": str(row["quantity"]),
+        "signed_quantity": str(row["signed_quantity"]),
+        "balance": str(base_balance + row["running_total"]),
+        "recorded_after_quantity": None if row["after_quantity"] is None else str(row["after_quantity"]),
+        "reference": row["reference"],
+    }
+
+
+def ledger_page(stock_item_id=None, supply_item_id=None, date_from=None, date_to=None,
+                cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Página do extrato com saldo corrente calculado no banco.
+
+    O cursor carrega (date, id, saldo) da última linha, junto com a assinatura dos
+    filtros (item e início do período): a página seguinte só precisa do SUM em janela
+    das próprias linhas, sem recalcular o histórico anterior.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    queryset = ledger_queryset(stock_item_id, supply_item_id, date_to)
+    date_from = _lower_bound(date_from)
+    signature = _cursor_signature(stock_item_id, supply_item_id, date_from)
+
+    after, base_balance = _decode_ledger_cursor(cursor, signature, queryset)
+    opening = None
+    if after is None:
+        opening = base_balance = opening_balance(queryset, date_from)
+
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+
+    rows = list(_page_rows(queryset, after=after, limit=limit + 1))
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    results = [_serialize(row, base_balance) for row in rows]
+    next_cursor = None
+    if has_next and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor([signature, last["date"], last["id"], base_balance + last["running_total"]])
+
+    return {
+        "opening_balance": None if opening is None else str(opening),
+        "results": results,
+        "next": next_cursor,
+    }
+
+
+def iter_ledger(stock_item_id=None, supply_item_id=None, date_from=None, date_to=None,
+                chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Todas as linhas do extrato em blocos por chave, com memória constante.
+    Usado pela exportação em streaming: os parâmetros são validados (LedgerError) e o
+    saldo de abertura calculado já na chamada, antes de a resposta começar a ser enviada.
+    """
+    queryset = ledger_queryset(stock_item_id, supply_item_id, date_to)
+    date_from = _lower_bound(date_from)
+    balance = opening_balance(queryset, date_from)
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+
+    def rows_in_chunks(balance):
+        after = None
+        while True:
+            rows = list(_page_rows(queryset, after=after, limit=chunk_size))
+            if not rows:
+                return
+            for row in rows:
+                yield _serialize(row, balance)
+            last = rows[-1]
+            balance += last["running_total"]
+            after = [last["date"], last["id"]]
+
+    return rows_in_chunks(balance)
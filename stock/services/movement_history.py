@@ -0,0 +1,62 @@
+# stock/services/movement_history.py
+
+from django.utils import timezone
+from commons.pagination import keyset_page
+from stock.models import StockMovement, StockMovementType
+
+HISTORY_ORDERING = ["-date", "-id"]
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def _location_display(row):
+    source = row["source_location__name"]
+    destination = row["destination_location__name"]
+    if source and destination:
+        return f"{source} → {destination}"
+    elif source:
+        return f"{source} → [Saída]"
+    elif destination:
+        return f"[Entrada] → {destination}"
+    return "-"
+
+
+def movement_history_page(stock_item_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Página do histórico de movimentações de um item de estoque, mais recentes primeiro.
+
+    Usa paginação por chave em (date, id): cada página custa o mesmo que a primeira,
+    independentemente de quantas movimentações o item já acumulou.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    queryset = (
+        StockMovement.objects
+        .filter(stock_item_id=stock_item_id)
+        .values(
+            "id", "date", "movement_type", "quantity",
+            "before_quantity", "after_quantity",
+            "source_location__name", "destination_location__name",
+            "reference", "notes",
+        )
+    )
+    rows, next_cursor = keyset_page(queryset, HISTORY_ORDERING, cursor=cursor, limit=limit)
+    labels = dict(StockMovementType.choices)
+
+    return {
+        "results": [
+            {
+                "id": str(row["id"]),
+                "date": timezone.localtime(row["date"]).strftime("%d/%m/%Y %H:%M"),
+                "movement_type": row["movement_type"],
+                "movement_type_display": labels.get(row["movement_type"], row["movement_type"]),
+                "quantity": str(row["quantity"]),
+                "before_quantity": None if row["before_quantity"] is None else str(row["before_quantity"]),
+                "after_quantity": None if row["after_quantity"] is None else str(row["after_quantity"]),
+                "location": _location_display(row),
+                "reference": row["reference"],
+                "notes": row["notes"],
+            }
+            for row in rows
+        ],
+        "next": next_cursor,
+    }
@@ -0,0 +1,104 @@
+# stock/services/movement_search.py
+
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
+from stock.models import StockMovement, StockMovementType, SEARCH_CONFIG, movement_search_vector
+
+SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
+REFRESH_CHUNK_SIZE = 5000
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_search_query(term):
+    """
+    Converte o texto digitado em uma consulta full-text: todas as palavras precisam
+    aparecer, cada uma como prefixo (`nf-12` casa com "NF-1234"). Retorna None se vazio.
+    """
+    tokens = _TOKEN_RE.findall((term or "").lower())
+    if not tokens:
+        return None
+    return SearchQuery(" & ".join(f"{token}:*" for token in tokens), search_type="raw", config=SEARCH_CONFIG)
+
+
+def search_movements_queryset(queryset, term):
+    """Filtra pelo índice GIN e anota `search_rank` (relevância ponderada)."""
+    query = build_search_query(term)
+    if query is None:
+        return queryset
+    return queryset.filter(search_vector=query).annotate(search_rank=SearchRank(F("search_vector"), query))
+
+
+def search_movements(term, limit=SEARCH_LIMIT):
+    """Movimentações mais relevantes para o termo (empate: mais recentes primeiro)."""
+    limit = max(1, min(int(limit), MAX_SEARCH_LIMIT))
+    if build_search_query(term) is None:
+        return []
+    labels = dict(StockMovementType.choices)
+    rows = (
+        search_movements_queryset(StockMovement.objects.all(), term)
+        .order_by("-search_rank", "-date", "-id")
+        .values(
+            "id", "date", "movement_type", "quantity", "reference", "notes", "search_rank",
+            "stock_item_id", "stock_item__supply_item__name", "stock_item__supply_batch__batch_code",
+        )[:limit]
+    )
+    return [
+        {
+            "id": str(row["id"]),
+            "date": row["date"].isoformat(),
+            "movement_type": row["movement_type"],
+            "movement_type_display": labels.get(row["movement_type"], row["movement_type"]),
+            "quantity": str(row["quantity"]),
+            "stock_item_id": str(row["stock_item_id"]),
+            "supply_item_name": row["stock_item__supply_item__name"],
+            "batch_code": row["stock_item__supply_batch__batch_code"],
+            "reference": row["reference"],
+            "notes": row["notes"],
+            "rank": round(row["search_rank"], 4),
+        }
+        for row in rows
+    ]
+
+
+def refresh_search_vectors(queryset=None, chunk_size=REFRESH_CHUNK_SIZE) -> int:
+    """Recalcula o documento de busca das movimentações em blocos de `chunk_size` ids."""
+    queryset = StockMovement.objects.all() if queryset is None else queryset
+    ids = queryset.order_by("id").values_list("id", flat=True)
+    updated, last_id = 0, None
+    while True:
+        chunk = ids.filter(id__gt=last_id) if last_id else ids
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return updated
+        updated += StockMovement.objects.filter(id__in=chunk).update(search_vector=movement_search_vector())
+        last_id = chunk[-1]
+
+
+# ---------------------------------------------
+# Receivers: renomear insumo/lote atualiza a busca
+# ---------------------------------------------
+
+def remember_search_fields(sender, instance, **kwargs):
+    """pre_save de SupplyItem/SupplyBatch: guarda se o texto indexado mudou."""
+    field = "name" if sender._meta.model_name == "supplyitem" else "batch_code"
+    if instance._state.adding or not instance.pk:
+        instance._search_text_changed = False
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    instance._search_text_changed = previous != getattr(instance, field)
+
+
+def refresh_related_movements(sender, instance, created, **kwargs):
+    """post_save de SupplyItem/SupplyBatch: reindexa só as movimentações afetadas."""
+    if created or not getattr(instance, "_search_text_changed", False):
+        return
+    if sender._meta.model_name == "supplyitem":
+        movements = StockMovement.objects.filter(
+            Q(stock_item__supply_item=instance) | Q(stock_item__supply_batch__supply_item=instance)
+        )
+    else:
+        movements = StockMovement.objects.filter(stock_item__supply_batch=instance)
+    refresh_search_vectors(movements)
@@ -0,0 +1,189 @@
+# stock/services/posting.py
+
+import uuid
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When, DecimalField
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history
+from production.models import ProductionOrder
+from stock.models import StockItem, StockMovement, StockMovementType
+from stock.services.movement_search import refresh_search_vectors
+
+OUTBOUND_TYPES = (StockMovementType.OUTBOUND, StockMovementType.PRODUCTION_INPUT)
+MAX_LINES = 200
+
+_DECIMAL = DecimalField(max_digits=10, decimal_places=2)
+
+
+class PostingError(ValueError):
+    pass
+
+
+class _InsufficientStock(Exception):
+    pass
+
+
+def _parse_line(line):
+    try:
+        quantity = Decimal(str(line.get("quantity"))).quantize(Decimal("0.01"))
+        if not quantity.is_finite():
+            raise PostingError("Quantidade inválida.")
+    except (InvalidOperation, TypeError, AttributeError):
+        raise PostingError("Quantidade inválida.")
+    if quantity <= 0:
+        raise PostingError("Quantidade deve ser maior que zero.")
+
+    movement_type = line.get("movement_type") or StockMovementType.OUTBOUND
+    if movement_type not in OUTBOUND_TYPES:
+        raise PostingError(f"Tipo de saída inválido: {movement_type}.")
+    try:
+        stock_item_id = uuid.UUID(str(line.get("stock_item_id")))
+    except ValueError:
+        raise PostingError("stock_item_id inválido.")
+    production_order_id = line.get("production_order_id") or None
+    if production_order_id is not None:
+        try:
+            production_order_id = uuid.UUID(str(production_order_id))
+        except ValueError:
+            raise PostingError("production_order_id inválido.")
+
+    return {
+        "stock_item_id": stock_item_id,
+        "quantity": quantity,
+        "movement_type": movement_type,
+        "reference": str(line.get("reference") or "")[:100],
+        "notes": str(line.get("notes") or ""),
+        "production_order_id": production_order_id,
+    }
+
+
+class StockPostingService:
+    """
+    Baixa de estoque sem ler-conferir-gravar: o saldo é decrementado por um UPDATE
+    condicional (`quantity >= pedido`) e a CHECK `stock_item_quantity_non_negative`
+    garante que nenhum outro caminho deixe o saldo negativo.
+    """
+
+    @staticmethod
+    def post_outbound(stock_item_id, quantity, movement_type=StockMovementType.OUTBOUND, **extra) -> dict:
+        """Atalho para uma única linha (mesmo resultado estruturado de `post_outbound_many`)."""
+        return StockPostingService.post_outbound_many([{
+            "stock_item_id": stock_item_id,
+            "quantity": quantity,
+            "movement_type": movement_type,
+            **extra,
+        }])
+
+    @staticmethod
+    def post_outbound_many(lines) -> dict:
+        """
+        Lança várias saídas de uma vez, tudo ou nada.
+
+        Um único UPDATE decrementa todos os itens; se alguma linha não tiver saldo,
+        nada é gravado e o retorno traz `error="insufficient_stock"` com o pedido e o
+        disponível de cada item em falta. Em caso de sucesso, retorna as movimentações.
+        Entradas inválidas levantam PostingError.
+        """
+        if not isinstance(lines, list) or not lines:
+            raise PostingError("Envie ao menos uma linha de saída.")
+        if len(lines) > MAX_LINES:
+            raise PostingError(f"Máximo de {MAX_LINES} linhas por lançamento.")
+        parsed = [_parse_line(line) for line in lines]
+        StockPostingService._check_orders(parsed)
+
+        requested = defaultdict(Decimal)
+        for line in parsed:
+            requested[line["stock_item_id"]] += line["quantity"]
+
+        try:
+            with transaction.atomic():
+                condition = Q()
+                for stock_item_id, quantity in requested.items():
+                    condition |= Q(pk=stock_item_id, quantity__gte=quantity)
+                decrement = Case(
+                    *[When(pk=stock_item_id, then=Value(quantity)) for stock_item_id, quantity in requested.items()],
+                    output_field=_DECIMAL,
+                )
+                updated = StockItem.objects.filter(condition).update(
+                    quantity=F("quantity") - decrement, updated_at=timezone.now()
+                )
+                if updated != len(requested):
+                    raise _InsufficientStock()
+
+                # Linhas já travadas pelo UPDATE: o saldo lido aqui é o resultado dele
+                stock_items = StockItem.objects.in_bulk(list(requested))
+                movements = StockPostingService._build_movements(parsed, requested, stock_items)
+                bulk_create_with_history(movements, StockMovement)
+                refresh_search_vectors(StockMovement.objects.filter(pk__in=[movement.pk for movement in movements]))
+        except _InsufficientStock:
+            return StockPostingService._shortage_result(requested)
+
+        return {
+            "ok": True,
+            "movements": [
+                {
+                    "id": str(movement.pk),
+                    "stock_item_id": str(movement.stock_item_id),
+                    "movement_type": movement.movement_type,
+                    "quantity": str(movement.quantity),
+                    "before_quantity": str(movement.before_quantity),
+                    "after_quantity": str(movement.after_quantity),
+                }
+                for movement in movements
+            ],
+        }
+
+    @staticmethod
+    def _check_orders(parsed):
+        """Ordens de produção informadas precisam existir (uma consulta para todas)."""
+        order_ids = {line["production_order_id"] for line in parsed if line["production_order_id"]}
+        if not order_ids:
+            return
+        missing = order_ids - set(ProductionOrder.objects.filter(pk__in=order_ids).values_list("pk", flat=True))
+        if missing:
+            raise PostingError(f"Ordem de produção não encontrada: {', '.join(sorted(str(pk) for pk in missing))}.")
+
+    @staticmethod
+    def _build_movements(parsed, requested, stock_items):
+        # Saldo antes de todas as linhas = saldo atual + total baixado; cada linha desconta o seu
+        balance = {pk: stock_item.quantity + requested[pk] for pk, stock_item in stock_items.items()}
+        now = timezone.now()
+        movements = []
+        for line in parsed:
+            stock_item = stock_items[line["stock_item_id"]]
+            before = balance[line["stock_item_id"]]
+            after = before - line["quantity"]
+            balance[line["stock_item_id"]] = after
+            movements.append(StockMovement(
+                stock_item=stock_item,
+                movement_type=line["movement_type"],
+                quantity=line["quantity"],
+                date=now,
+                source_location_id=stock_item.location_id,
+                reference=line["reference"],
+                notes=line["notes"],
+                production_order_id=line["production_order_id"],
+                before_quantity=before,
+                after_quantity=after,
+            ))
+        return movements
+
+    @staticmethod
+    def _shortage_result(requested):
+        available = dict(StockItem.objects.filter(pk__in=list(requested)).values_list("pk", "quantity"))
+        return {
+            "ok": False,
+            "error": "insufficient_stock",
+            "shortages": [
+                {
+                    "stock_item_id": str(stock_item_id),
+                    "requested": str(quantity),
+                    "available": str(available[stock_item_id]) if stock_item_id in available else None,
+                }
+                for stock_item_id, quantity in requested.items()
+                if available.get(stock_item_id, Decimal("0.00")) < quantity
+            ],
+        }
+
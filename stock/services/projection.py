@@ -0,0 +1,276 @@
+# stock/services/projection.py
+
+from datetime import date, timedelta
+import numpy as np
+from django.core.cache import cache
+from django.db.models import F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+from commons.ids import parse_uuid
+from commons.units import convert
+from production.models import ProductionOrder
+from stock.models import StockItem, StockMovementType
+from stock.services.demand import closed_weeks, load_outflow_matrix
+from stock.services.requirements import OPEN_ORDER_STATUSES, explode
+from stock.services.replenishment import replenishment_settings
+from supplies.models import SupplyBatch, SupplyItem
+
+DEFAULT_HORIZON_DAYS = 14
+MAX_HORIZON_DAYS = 90
+BASELINE_CACHE_KEY = "stock:projection:baseline:{day}:{weeks}"
+
+# Consumo de base = saídas avulsas (vendas, uso interno). O consumo das ordens de
+# produção entra pelas fichas técnicas, então PRODUCTION_INPUT fica fora para não contar duas vezes.
+BASELINE_TYPES = [StockMovementType.OUTBOUND]
+
+
+class ProjectionError(ValueError):
+    pass
+
+
+class _ItemIndex:
+    """Posição de cada insumo na matriz, criada sob demanda conforme os dados chegam."""
+
+    def __init__(self):
+        self.position = {}
+
+    def __getitem__(self, item_id):
+        index = self.position.get(item_id)
+        if index is None:
+            index = self.position[item_id] = len(self.position)
+        return index
+
+    @property
+    def ids(self):
+        return list(self.position)
+
+
+def _as_date(value):
+    try:
+        return value if isinstance(value, date) else date.fromisoformat(str(value))
+    except ValueError:
+        raise ProjectionError(f"Data inválida: {value} (use AAAA-MM-DD).")
+
+
+def baseline_daily_demand(today=None):
+    """
+    Consumo diário médio de cada insumo fora das ordens de produção, das últimas
+    `HISTORY_WEEKS` semanas. Calculado uma vez por dia e mantido em cache.
+    """
+    today = today or timezone.localdate()
+    weeks = replenishment_settings()["HISTORY_WEEKS"]
+    key = BASELINE_CACHE_KEY.format(day=today.isoformat(), weeks=weeks)
+    baseline = cache.get(key)
+    if baseline is None:
+        period_start, period_end = closed_weeks(weeks, today)
+        ids, _, weekly = load_outflow_matrix(period_start, period_end, bucket=7, movement_types=BASELINE_TYPES)
+        daily = weekly.mean(axis=1) / 7 if weekly.size else np.zeros(len(ids))
+        baseline = {item_id: float(value) for item_id, value in zip(ids, daily) if value > 0}
+        cache.set(key, baseline, timeout=86400)
+    return baseline
+
+
+def _load_inputs(today, horizon, scenario):
+    """
+    Monta as entradas da simulação (uma consulta para cada fonte) como listas de
+    (linha, dia, quantidade), já aplicando o cenário hipotético.
+    """
+    end = today + timedelta(days=horizon)
+    index = _ItemIndex()
+
+    def day_of(value):
+        # Atrasados contam hoje; datas além do horizonte são descartadas pelo chamador
+        return max((value - today).days, 0)
+
+    # Estoque atual, separado por validade (lotes vencidos já não contam)
+    on_hand, expiring = [], []
+    rows = list(
+        StockItem.objects.filter(quantity__gt=0)
+        .annotate(
+            item_id=Coalesce("supply_item_id", "supply_batch__supply_item_id"),
+            expiration=F("supply_batch__expiration_date"),
+            item_unit=Coalesce("supply_item__unit_of_measure", "supply_batch__supply_item__unit_of_measure"),
+            density=Coalesce("supply_item__density_g_per_ml", "supply_batch__supply_item__density_g_per_ml"),
+            unit_weight=Coalesce("supply_item__unit_weight_g", "supply_batch__supply_item__unit_weight_g"),
+            stock_unit=Coalesce(NullIf("unit_of_measure", Value("")), "item_unit"),
+        )
+        .filter(item_id__isnull=False)
+        .values_list("item_id", "expiration", "stock_unit", "item_unit", "density", "unit_weight")
+        .annotate(total=Cast(Sum("quantity"), FloatField()))
+        .order_by()
+    )
+    # Saldos registrados em outra unidade passam para a unidade do insumo (uma passada)
+    totals = []
+    if rows:
+        _, _, stock_units, item_units, density, unit_weight, quantities = zip(*rows)
+        totals = np.nan_to_num(convert(quantities, stock_units, item_units, density, unit_weight)).tolist()
+    for (item_id, expiration, *_), total in zip(rows, totals):
+        if expiration is not None and expiration <= today:
+            continue
+        row = index[item_id]
+        on_hand.append((row, total))
+        if expiration is not None and expiration < end:
+            expiring.append((row, (expiration - today).days, total))
+
+    # Lotes cadastrados e ainda não lançados no estoque, na data prevista de chegada
+    inbound = []
+    batches = (
+        SupplyBatch.objects.filter(stock_entry_created=False, is_active=True, quantity__gt=0)
+        .exclude(expected_date__gte=end)
+        .annotate(quantity_float=Cast("quantity", FloatField()))
+        .values_list("supply_item_id", "expected_date", "expiration_date", "quantity_float")
+    )
+    for item_id, expected, expiration, quantity in batches:
+        row = index[item_id]
+        day = day_of(expected or today)
+        inbound.append((row, day, quantity))
+        if expiration < end:
+            expiring.append((row, max((expiration - today).days, day), quantity))
+
+    # Ordens de produção abertas: necessidade da ficha técnica na data programada.
+    # Explodida aqui (e não lida das reservas) para valer também para ordens que ainda
+    # não foram sincronizadas com StockReservationService.
+    excluded = {parse_uuid(order_id, ProjectionError) for order_id in scenario.get("exclude_orders", [])}
+    moved = {parse_uuid(order_id, ProjectionError): _as_date(day) for order_id, day in scenario.get("reschedule", {}).items()}
+    demand = []
+    orders = ProductionOrder.objects.filter(status__in=OPEN_ORDER_STATUSES).exclude(pk__in=excluded)
+    orders = orders.filter(Q(scheduled_date__lt=end) | Q(pk__in=moved)) if moved else orders.filter(scheduled_date__lt=end)
+    scheduled_dates = dict(orders.values_list("id", "scheduled_date").order_by())
+    order_ids, item_ids, matrix, _ = explode(orders)
+    rows = [index[item_id] for item_id in item_ids]
+    for order_row, order_id in enumerate(order_ids):
+        scheduled = moved.get(order_id, scheduled_dates[order_id])
+        if scheduled >= end:
+            continue
+        for column in np.flatnonzero(matrix[order_row]):
+            demand.append((rows[column], day_of(scheduled), float(matrix[order_row, column])))
+
+    # Cenário: ordens e recebimentos hipotéticos
+    for order in scenario.get("orders", []):
+        scheduled = _as_date(order.get("scheduled_date"))
+        if scheduled >= end:
+            continue
+        for item_id, quantity in (order.get("requirements") or {}).items():
+            demand.append((index[parse_uuid(item_id, ProjectionError)], day_of(scheduled), float(quantity)))
+    for receipt in scenario.get("receipts", []):
+        expected = _as_date(receipt.get("date"))
+        if expected < end:
+            item_id = parse_uuid(receipt.get("supply_item_id"), ProjectionError)
+            inbound.append((index[item_id], day_of(expected), float(receipt.get("quantity"))))
+
+    factor = float(scenario.get("baseline_factor", 1))
+    baseline = {index[item_id]: daily * factor for item_id, daily in baseline_daily_demand(today).items()}
+    return index.ids, on_hand, inbound, expiring, demand, baseline
+
+
+def _scatter(shape, entries):
+    matrix = np.zeros(shape, dtype=np.float64)
+    if entries:
+        rows, days, quantities = zip(*entries)
+        np.add.at(matrix, (np.array(rows), np.array(days)), np.array(quantities, dtype=np.float64))
+    return matrix
+
+
+def roll_forward(on_hand, inbound, expiring, demand):
+    """
+    Projeta o saldo de todos os itens ao fim de cada dia (matriz item × dia) em uma passada.
+
+    O consumo segue FEFO: o lote que vence primeiro é usado primeiro, então a perda por
+    vencimento até o dia d é o quanto do estoque vencido até d excede o consumo até a
+    véspera — acumulado com máximo corrido, pois perda não volta.
+    """
+    consumed = np.cumsum(demand, axis=1)
+    consumed_before = np.concatenate([np.zeros((demand.shape[0], 1)), consumed[:, :-1]], axis=1)
+    lost = np.maximum.accumulate(np.maximum(np.cumsum(expiring, axis=1) - consumed_before, 0), axis=1)
+    balance = on_hand[:, None] + np.cumsum(inbound, axis=1) - consumed - lost
+
+    short = balance < -1e-9
+    has_stockout = short.any(axis=1)
+    return {
+        "balance": balance,
+        "expired": lost[:, -1],
+        "has_stockout": has_stockout,
+        "stockout_day": np.where(has_stockout, short.argmax(axis=1), -1),
+        "shortfall": np.maximum(-balance.min(axis=1), 0),
+    }
+
+
+def simulate(horizon_days=DEFAULT_HORIZON_DAYS, scenario=None, item_ids=None, only_shortages=True, today=None) -> dict:
+    """
+    Simula o estoque dos próximos `horizon_days` dias: estoque atual + lotes a receber
+    − vencimentos − ordens de produção programadas − consumo de base.
+
+    `scenario` (opcional) altera a programação sem gravar nada:
+      - "orders": [{"scheduled_date", "requirements": {supply_item_id: quantidade}}]
+      - "receipts": [{"supply_item_id", "date", "quantity"}]
+      - "reschedule": {production_order_id: nova_data}
+      - "exclude_orders": [production_order_id, ...]
+      - "baseline_factor": multiplicador do consumo de base
+    Retorna, por item, a data de ruptura e a falta no horizonte; `item_ids` inclui a
+    série diária de saldo desses itens.
+    """
+    if not 1 <= horizon_days <= MAX_HORIZON_DAYS:
+        raise ProjectionError(f"Horizonte deve estar entre 1 e {MAX_HORIZON_DAYS} dias.")
+    scenario = scenario or {}
+    if not isinstance(scenario, dict):
+        raise ProjectionError("Cenário inválido.")
+    today = today or timezone.localdate()
+
+    try:
+        ids, on_hand, inbound, expiring, demand, baseline = _load_inputs(today, horizon_days, scenario)
+    except ProjectionError:
+        raise
+    except (TypeError, ValueError, AttributeError):
+        raise ProjectionError("Cenário inválido.")
+
+    shape = (len(ids), horizon_days)
+    on_hand_vector = np.zeros(len(ids), dtype=np.float64)
+    if on_hand:
+        rows, totals = zip(*on_hand)
+        np.add.at(on_hand_vector, np.array(rows), np.array(totals))
+    demand_matrix = _scatter(shape, demand)
+    if baseline:
+        rows = np.fromiter(baseline.keys(), dtype=np.int64)
+        demand_matrix[rows, :] += np.fromiter(baseline.values(), dtype=np.float64)[:, None]
+
+    result = roll_forward(on_hand_vector, _scatter(shape, inbound), _scatter(shape, expiring), demand_matrix)
+
+    selected = np.flatnonzero(result["has_stockout"]) if only_shortages else np.flatnonzero(
+        on_hand_vector + demand_matrix.sum(axis=1) > 0
+    )
+    selected = selected[np.argsort(result["stockout_day"][selected] % (horizon_days + 1), kind="stable")]
+    names = dict(
+        SupplyItem.objects.filter(pk__in=[ids[row] for row in selected]).values_list("id", "name")
+    ) if len(selected) else {}
+
+    series_rows = {}
+    wanted = {parse_uuid(item_id, ProjectionError) for item_id in (item_ids or [])}
+    for row, item_id in enumerate(ids):
+        if item_id in wanted:
+            series_rows[item_id] = row
+
+    def day(offset):
+        return (today + timedelta(days=int(offset))).isoformat()
+
+    return {
+        "start": today.isoformat(),
+        "end": day(horizon_days - 1),
+        "items_simulated": len(ids),
+        "items_with_stockout": int(result["has_stockout"].sum()),
+        "results": [
+            {
+                "supply_item_id": str(ids[row]),
+                "name": names.get(ids[row]),
+                "on_hand": round(float(on_hand_vector[row]), 2),
+                "demand": round(float(demand_matrix[row].sum()), 2),
+                "expired": round(float(result["expired"][row]), 2),
+                "stockout_date": day(result["stockout_day"][row]) if result["has_stockout"][row] else None,
+                "shortfall": round(float(result["shortfall"][row]), 2),
+            }
+            for row in selected
+        ],
+        "series": {
+            str(item_id): [round(float(value), 2) for value in result["balance"][row]]
+            for item_id, row in series_rows.items()
+        },
+    }
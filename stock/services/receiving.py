@@ -0,0 +1,182 @@
+# stock/services/receiving.py
+
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import IntegrityError, transaction
+from simple_history.utils import bulk_create_with_history
+from commons.export import touch_updated_at
+from stock.models import StockItem, StockLocation, StockMovement, StockMovementType
+from stock.services.barcode_index import barcode_index, normalize_code
+from stock.services.movement_search import refresh_search_vectors
+from supplies.models import SupplyBatch, SupplyItem
+
+MAX_SCANS = 500
+
+
+class ReceivingError(ValueError):
+    pass
+
+
+class ReceivingConflict(ReceivingError):
+    """Outro recebimento gravou o mesmo lote entre a verificação e a gravação."""
+
+
+def _parse_scan(scan):
+    """Valida uma leitura e resolve o insumo pelo índice em memória. Retorna (dados, erro)."""
+    if not isinstance(scan, dict):
+        return None, "Leitura inválida."
+
+    code = normalize_code(scan.get("barcode") or scan.get("sku"))
+    batch_code = str(scan.get("batch_code") or "").strip()
+    if not code:
+        return None, "Informe barcode ou sku."
+    if not batch_code:
+        return None, "Informe batch_code."
+
+    try:
+        quantity = Decimal(str(scan.get("quantity"))).quantize(Decimal("0.01"))
+    except (InvalidOperation, TypeError):
+        return None, "Quantidade inválida."
+    if not quantity.is_finite() or quantity <= 0:
+        return None, "Quantidade deve ser maior que zero."
+
+    try:
+        expiration_date = date.fromisoformat(str(scan.get("expiration_date")))
+    except ValueError:
+        return None, "expiration_date deve estar no formato AAAA-MM-DD."
+
+    item = barcode_index.lookup(code)
+    if item is None:
+        return None, f"Código {code} não encontrado."
+    if not item["is_active"]:
+        return None, f"Insumo {item['name']} está inativo."
+
+    return {
+        "item": item,
+        "batch_code": batch_code,
+        "expiration_date": expiration_date,
+        "quantity": quantity,
+    }, None
+
+
+def receive_scans(scans, location_id=None, reference=""):
+    """
+    Recebimento em lote a partir de leituras de código de barras.
+
+    Cada leitura = {barcode|sku, batch_code, expiration_date, quantity}. As leituras do
+    mesmo insumo/lote são somadas. Lotes, itens de estoque e movimentações de entrada são
+    criados com bulk_create (sem o caminho lote a lote do StockOrchestrator).
+    Leituras com problema não impedem as demais e voltam em `errors` com o índice original.
+    """
+    if not isinstance(scans, list) or not scans:
+        raise ReceivingError("Envie uma lista de leituras em 'scans'.")
+    if len(scans) > MAX_SCANS:
+        raise ReceivingError(f"Máximo de {MAX_SCANS} leituras por envio.")
+
+    locations = StockLocation.objects.filter(is_active=True)
+    location = locations.filter(pk=location_id).first() if location_id else locations.first()
+    if location is None:
+        raise ReceivingError("Local de estoque não encontrado ou inativo.")
+
+    barcode_index.ensure_fresh()
+
+    errors = []
+    grouped = {}
+    for index, scan in enumerate(scans):
+        parsed, error = _parse_scan(scan)
+        if error:
+            errors.append({"index": index, "error": error})
+            continue
+        key = (parsed["item"]["id"], parsed["batch_code"])
+        current = grouped.get(key)
+        if current is None:
+            grouped[key] = {**parsed, "indexes": [index]}
+        elif current["expiration_date"] != parsed["expiration_date"]:
+            errors.append({"index": index, "error": "Mesmo lote com validades diferentes."})
+        else:
+            current["quantity"] += parsed["quantity"]
+            current["indexes"].append(index)
+
+    try:
+        entries, batches, stock_items = _create_entries(grouped, errors, location, reference)
+    except IntegrityError:
+        # Unicidade (insumo, lote) ou (lote, local) violada por um recebimento concorrente
+        raise ReceivingConflict(
+            "Outro recebimento gravou um destes lotes ao mesmo tempo; envie novamente "
+            "para ver quais já estão cadastrados."
+        )
+
+    return {
+        "location": location.name,
+        "received": [
+            {
+                "indexes": entry["indexes"],
+                "supply_item_id": str(entry["item"]["id"]),
+                "sku": entry["item"]["sku"],
+                "name": entry["item"]["name"],
+                "batch_id": batch.pk,
+                "batch_code": entry["batch_code"],
+                "stock_item_id": str(stock_item.pk),
+                "quantity": str(entry["quantity"]),
+            }
+            for entry, batch, stock_item in zip(entries, batches, stock_items)
+        ],
+        "errors": sorted(errors, key=lambda error: error["index"]),
+    }
+
+
+@transaction.atomic
+def _create_entries(grouped, errors, location, reference):
+    """Grava lotes, itens de estoque e entradas das leituras agrupadas; descarta lotes já cadastrados."""
+    # Lotes já cadastrados: uma consulta para todos os pares (insumo, lote)
+    existing = set(
+        SupplyBatch.objects.filter(
+            supply_item_id__in={item_id for item_id, _ in grouped},
+            batch_code__in={batch_code for _, batch_code in grouped},
+        ).values_list("supply_item_id", "batch_code")
+    )
+    for key in [key for key in grouped if key in existing]:
+        entry = grouped.pop(key)
+        errors.extend(
+            {"index": index, "error": f"Lote {entry['batch_code']} já cadastrado para {entry['item']['name']}."}
+            for index in entry["indexes"]
+        )
+
+    entries = list(grouped.values())
+    batches = SupplyBatch.objects.bulk_create([
+        SupplyBatch(
+            supply_item_id=entry["item"]["id"],
+            batch_code=entry["batch_code"],
+            expiration_date=entry["expiration_date"],
+            quantity=entry["quantity"],
+            stock_entry_created=True,
+        )
+        for entry in entries
+    ])
+    stock_items = StockItem.objects.bulk_create([
+        StockItem(
+            supply_item_id=entry["item"]["id"],
+            supply_batch=batch,
+            location=location,
+            quantity=entry["quantity"],
+            unit_of_measure=entry["item"]["unit_of_measure"],
+        )
+        for entry, batch in zip(entries, batches)
+    ])
+    movements = bulk_create_with_history([
+        StockMovement(
+            stock_item=stock_item,
+            movement_type=StockMovementType.INBOUND,
+            quantity=entry["quantity"],
+            destination_location=location,
+            reference=reference or f"Lote {entry['batch_code']}",
+            notes="Entrada via recebimento por código de barras",
+            before_quantity=Decimal("0.00"),
+            after_quantity=entry["quantity"],
+        )
+        for entry, stock_item in zip(entries, stock_items)
+    ], StockMovement)
+    refresh_search_vectors(StockMovement.objects.filter(pk__in=[movement.pk for movement in movements]))
+    # bulk_create não dispara os receivers: lotes novos marcam o insumo para a exportação incremental
+    touch_updated_at(SupplyItem, {entry["item"]["id"] for entry in entries})
+    return entries, batches, stock_items
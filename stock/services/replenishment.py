@@ -0,0 +1,147 @@
+# stock/services/replenishment.py
+
+from decimal import Decimal
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from stock.models import PurchaseSuggestion, StockThreshold
+from stock.services.demand import closed_weeks, load_outflow_matrix
+from stock.services.reservations import StockReservationService
+from supplies.models import SupplyItem
+
+DEFAULTS = {
+    "LEAD_TIME_DAYS": 7,
+    "REVIEW_PERIOD_DAYS": 7,
+    "SERVICE_LEVEL_Z": 1.65,
+    "HISTORY_WEEKS": 13,
+    "SMOOTHING_ALPHA": 0.3,
+}
+
+SAVE_BATCH_SIZE = 2000
+
+
+def replenishment_settings(**overrides):
+    """Parâmetros de `settings.STOCK_REPLENISHMENT`, com sobrescritas pontuais (ex.: opções do comando)."""
+    config = {**DEFAULTS, **getattr(settings, "STOCK_REPLENISHMENT", {})}
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    return config
+
+
+def _available_quantities(ids):
+    """Estoque disponível (em estoque − reservado) de todos os insumos em uma única consulta."""
+    rows = (
+        StockReservationService.annotate_availability(SupplyItem.objects.all())
+        .annotate(available_float=Cast("available", FloatField()))
+        .values_list("id", "available_float")
+    )
+    available = dict(rows)
+    return np.array([available.get(item_id, 0.0) for item_id in ids], dtype=np.float64)
+
+
+def compute_reorder_points(weekly, available, config):
+    """
+    Cálculo vetorizado para todos os itens (uma linha da matriz por item).
+
+    - previsão: média exponencialmente ponderada do consumo semanal (semanas recentes pesam mais);
+    - variabilidade: desvio padrão semanal convertido para diário (÷ √7);
+    - estoque de segurança = z · σ_diário · √prazo;
+    - ponto de pedido = demanda diária · prazo + estoque de segurança;
+    - sugestão = (ponto de pedido + demanda do período de revisão) − disponível, quando o
+      disponível chega ao ponto de pedido.
+    """
+    n_weeks = weekly.shape[1]
+    alpha = config["SMOOTHING_ALPHA"]
+    lead_time = config["LEAD_TIME_DAYS"]
+    review = config["REVIEW_PERIOD_DAYS"]
+
+    weights = alpha * (1 - alpha) ** np.arange(n_weeks - 1, -1, -1, dtype=np.float64)
+    weights /= weights.sum()
+    daily_demand = (weekly @ weights) / 7
+    daily_std = weekly.std(axis=1, ddof=1 if n_weeks > 1 else 0) / np.sqrt(7)
+
+    safety_stock = config["SERVICE_LEVEL_Z"] * daily_std * np.sqrt(lead_time)
+    reorder_point = daily_demand * lead_time + safety_stock
+    order_up_to = reorder_point + daily_demand * review
+
+    suggested = np.where(
+        (daily_demand > 0) & (available <= reorder_point),
+        np.ceil(np.maximum(order_up_to - available, 0) * 100) / 100,
+        0.0,
+    )
+    return {
+        "daily_demand": daily_demand,
+        "daily_std": daily_std,
+        "safety_stock": safety_stock,
+        "reorder_point": reorder_point,
+        "suggested": suggested,
+    }
+
+
+def _decimal(value, places=2):
+    return Decimal(f"{value:.{places}f}")
+
+
+@transaction.atomic
+def run_replenishment(update_thresholds=False, today=None, **overrides) -> dict:
+    """
+    Recalcula as sugestões de compra de todos os insumos e grava em PurchaseSuggestion.
+    Com `update_thresholds=True`, o ponto de pedido passa a ser o `min_quantity` de StockThreshold.
+    """
+    config = replenishment_settings(**overrides)
+    period_start, period_end = closed_weeks(config["HISTORY_WEEKS"], today)
+    ids, _, weekly = load_outflow_matrix(period_start, period_end, bucket=7)
+    available = _available_quantities(ids)
+    result = compute_reorder_points(weekly, available, config)
+
+    now = timezone.now()
+    suggestions = [
+        PurchaseSuggestion(
+            supply_item_id=item_id,
+            average_daily_demand=_decimal(result["daily_demand"][index], 4),
+            demand_std_dev=_decimal(result["daily_std"][index], 4),
+            lead_time_days=config["LEAD_TIME_DAYS"],
+            safety_stock=_decimal(result["safety_stock"][index]),
+            reorder_point=_decimal(result["reorder_point"][index]),
+            available_quantity=_decimal(available[index]),
+            suggested_quantity=_decimal(result["suggested"][index]),
+            needs_reorder=bool(result["suggested"][index] > 0),
+            computed_at=now,
+        )
+        for index, item_id in enumerate(ids)
+    ]
+    PurchaseSuggestion.objects.bulk_create(
+        suggestions,
+        batch_size=SAVE_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["supply_item"],
+        update_fields=[
+            "average_daily_demand", "demand_std_dev", "lead_time_days", "safety_stock",
+            "reorder_point", "available_quantity", "suggested_quantity", "needs_reorder", "computed_at",
+        ],
+    )
+
+    thresholds = 0
+    if update_thresholds:
+        # Só itens com consumo: os demais mantêm o mínimo digitado manualmente
+        thresholds_to_save = [
+            StockThreshold(supply_item_id=suggestion.supply_item_id, min_quantity=suggestion.reorder_point)
+            for suggestion in suggestions
+            if suggestion.average_daily_demand > 0
+        ]
+        StockThreshold.objects.bulk_create(
+            thresholds_to_save,
+            batch_size=SAVE_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["supply_item"],
+            update_fields=["min_quantity"],
+        )
+        thresholds = len(thresholds_to_save)
+
+    return {
+        "items": len(suggestions),
+        "to_reorder": int(np.count_nonzero(result["suggested"] > 0)),
+        "thresholds_updated": thresholds,
+    }
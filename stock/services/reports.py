@@ -0,0 +1,221 @@
+# stock/services/reports.py
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+from stock.models import StockItem, StockMovement, StockMovementType, StockAdjustmentReason
+from supplies.models import SupplyCategory
+
+# Faixas de idade (dias desde a primeira entrada no estoque): (chave, mínimo, máximo)
+AGING_BUCKETS = [
+    ("0_7", 0, 7),
+    ("8_30", 8, 30),
+    ("31_90", 31, 90),
+    ("90_plus", 91, None),
+]
+
+# Faixas de validade (dias até vencer)
+EXPIRATION_BUCKETS = [
+    ("0_7", 0, 7),
+    ("8_30", 8, 30),
+    ("31_90", 31, 90),
+    ("90_plus", 91, None),
+]
+
+GROUP_BY_FIELDS = {
+    "location": "location__name",
+    "category": "supply_item__category",
+}
+
+LOSS_MONTHS = 12
+
+INBOUND_TYPES = [StockMovementType.INBOUND, StockMovementType.PRODUCTION_OUTPUT]
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _bucket_aggregates(prefix, field, buckets, today, as_datetime=False, past=True):
+    """
+    Monta SUM/COUNT condicionais para cada faixa. `past=True` conta dias para trás
+    (idade), `past=False` conta dias à frente (validade).
+    """
+    aggregates = {}
+    for key, low, high in buckets:
+        if past:
+            upper = today - timedelta(days=low)
+            lower = today - timedelta(days=high) if high is not None else None
+        else:
+            lower = today + timedelta(days=low)
+            upper = today + timedelta(days=high) if high is not None else None
+
+        condition = Q()
+        if as_datetime:
+            # Intervalo [lower 00:00, upper+1 00:00) no fuso local — aproveita índice em datetime
+            if lower is not None:
+                condition &= Q(**{f"{field}__gte": _start_of_day(lower)})
+            if upper is not None:
+                condition &= Q(**{f"{field}__lt": _start_of_day(upper + timedelta(days=1))})
+        else:
+            if lower is not None:
+                condition &= Q(**{f"{field}__gte": lower})
+            if upper is not None:
+                condition &= Q(**{f"{field}__lte": upper})
+
+        aggregates[f"{prefix}_{key}_qty"] = Sum("quantity", filter=condition)
+        aggregates[f"{prefix}_{key}_items"] = Count("id", filter=condition)
+    return aggregates
+
+
+def _group_label(group_by, value):
+    if group_by == "category":
+        return SupplyCategory(value).label if value in SupplyCategory.values else "Indefinido"
+    return value or "Indefinido"
+
+
+def _money(value):
+    return str(value or Decimal("0.00"))
+
+
+def build_aging_report(group_by="location", today=None, months=LOSS_MONTHS):
+    """
+    Relatório de idade e validade do estoque, agrupado por local ou categoria.
+
+    - idade/validade: uma única consulta agrupada (SUM/COUNT com FILTER) sobre StockItem.
+      A idade conta da data da primeira movimentação de entrada do item (a data do
+      recebimento, que pode ser retroativa), e não da criação do registro;
+    - perdas por vencimento: duas consultas agrupadas por mês — saldo ainda em estoque
+      de lotes vencidos (por mês de validade) e ajustes com motivo "vencimento".
+    As quantidades são separadas por unidade de medida.
+    """
+    if group_by not in GROUP_BY_FIELDS:
+        raise ValueError(f"Agrupamento inválido: {group_by}")
+    today = today or timezone.localdate()
+    group_field = GROUP_BY_FIELDS[group_by]
+
+    aggregates = {}
+    aggregates.update(_bucket_aggregates("age", "received_at", AGING_BUCKETS, today, as_datetime=True))
+    aggregates.update(_bucket_aggregates(
+        "exp", "supply_batch__expiration_date", EXPIRATION_BUCKETS, today, past=False
+    ))
+    expired = Q(supply_batch__expiration_date__lt=today)
+    no_date = Q(supply_batch__expiration_date__isnull=True)
+    aggregates.update({
+        "exp_expired_qty": Sum("quantity", filter=expired),
+        "exp_expired_items": Count("id", filter=expired),
+        "exp_no_date_qty": Sum("quantity", filter=no_date),
+        "exp_no_date_items": Count("id", filter=no_date),
+        "total_qty": Sum("quantity"),
+        "total_items": Count("id"),
+    })
+
+    first_inbound = (
+        StockMovement.objects.filter(stock_item=OuterRef("pk"), movement_type__in=INBOUND_TYPES)
+        .order_by("date")
+        .values("date")[:1]
+    )
+    rows = (
+        StockItem.objects.filter(quantity__gt=0)
+        # Itens sem entrada registrada (ex.: cadastrados direto) caem na data de criação
+        .annotate(received_at=Coalesce(Subquery(first_inbound), "created_at"))
+        .values(group_field, "unit_of_measure")
+        .annotate(**aggregates)
+        .order_by(group_field, "unit_of_measure")
+    )
+
+    groups = []
+    for row in rows:
+        aging = {
+            key: {"quantity": _money(row[f"age_{key}_qty"]), "items": row[f"age_{key}_items"]}
+            for key, _, _ in AGING_BUCKETS
+        }
+        expiration = {
+            key: {"quantity": _money(row[f"exp_{key}_qty"]), "items": row[f"exp_{key}_items"]}
+            for key in ["expired"] + [k for k, _, _ in EXPIRATION_BUCKETS] + ["no_date"]
+        }
+        groups.append({
+            "key": row[group_field],
+            "label": _group_label(group_by, row[group_field]),
+            "unit_of_measure": row["unit_of_measure"],
+            "total_quantity": _money(row["total_qty"]),
+            "total_items": row["total_items"],
+            "aging": aging,
+            "expiration": expiration,
+        })
+
+    return {
+        "date": today.isoformat(),
+        "group_by": group_by,
+        "groups": groups,
+        "expiry_losses": build_expiry_losses(today, months),
+    }
+
+
+def build_expiry_losses(today=None, months=LOSS_MONTHS):
+    """Quantidade perdida por vencimento em cada mês (últimos `months` meses)."""
+    today = today or timezone.localdate()
+    year, month = today.year, today.month - (months - 1)
+    while month <= 0:
+        month += 12
+        year -= 1
+    first_month = date(year, month, 1)
+
+    losses = defaultdict(lambda: {"expired_on_hand": Decimal("0.00"), "written_off": Decimal("0.00")})
+
+    on_hand = (
+        StockItem.objects.filter(
+            quantity__gt=0,
+            supply_batch__expiration_date__lt=today,
+            supply_batch__expiration_date__gte=first_month,
+        )
+        .annotate(month=TruncMonth("supply_batch__expiration_date"))
+        .values("month", "unit_of_measure")
+        .annotate(total=Sum("quantity"))
+    )
+    for row in on_hand:
+        losses[(row["month"], row["unit_of_measure"])]["expired_on_hand"] += row["total"]
+
+    written_off = (
+        StockMovement.objects.filter(
+            movement_type=StockMovementType.ADJUSTMENT,
+            adjustment_reason=StockAdjustmentReason.EXPIRED,
+            date__gte=_start_of_day(first_month),
+        )
+        .annotate(month=TruncMonth("date"))
+        .values("month", "stock_item__unit_of_measure")
+        .annotate(total=Sum("quantity"))
+    )
+    for row in written_off:
+        month = row["month"].date() if isinstance(row["month"], datetime) else row["month"]
+        losses[(month, row["stock_item__unit_of_measure"])]["written_off"] += row["total"]
+
+    return [
+        {
+            "month": month.strftime("%Y-%m"),
+            "unit_of_measure": unit,
+            "expired_on_hand": str(values["expired_on_hand"]),
+            "written_off": str(values["written_off"]),
+            "total": str(values["expired_on_hand"] + values["written_off"]),
+        }
+        for (month, unit), values in sorted(losses.items(), key=lambda entry: (entry[0][0], entry[0][1]))
+    ]
+
+
+def get_aging_report(group_by="location", months=LOSS_MONTHS):
+    """
+    Versão em cache do relatório: uma geração por dia e parâmetros.
+    A chave inclui a data, então o cache "vira" sozinho à meia-noite.
+    """
+    today = timezone.localdate()
+    key = f"stock:aging-report:{today.isoformat()}:{group_by}:{months}"
+    report = cache.get(key)
+    if report is None:
+        report = build_aging_report(group_by=group_by, today=today, months=months)
+        seconds_left = int((_start_of_day(today + timedelta(days=1)) - timezone.now()).total_seconds())
+        cache.set(key, report, timeout=max(seconds_left, 60))
+    return report
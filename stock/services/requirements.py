@@ -0,0 +1,180 @@
+# stock/services/requirements.py
+
+import logging
+from datetime import date, timedelta
+import numpy as np
+from django.db.models import FloatField, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+from cakes.models import CakeRecipeLine
+from commons.units import convert
+from production.models import ProductionOrder, ProductionOrderStatus
+from stock.models import StockItem
+from supplies.models import SupplyItem
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERIOD_DAYS = 7
+MAX_PERIOD_DAYS = 92
+OPEN_ORDER_STATUSES = [ProductionOrderStatus.PLANNED, ProductionOrderStatus.IN_PROGRESS]
+
+
+class RequirementError(ValueError):
+    pass
+
+
+def _codes(values):
+    """Posição de cada valor na lista de distintos (ordem de chegada): (distintos, códigos)."""
+    position = {}
+    codes = np.fromiter((position.setdefault(value, len(position)) for value in values), dtype=np.int64, count=len(values))
+    return list(position), codes
+
+
+def explode(orders):
+    """
+    Explode as ordens de produção nas fichas técnicas dos bolos.
+
+    Duas consultas estreitas — as ordens e as linhas das receitas dos bolos envolvidos —
+    em vez do produto ordem × linha: cada receita vira uma linha da matriz receita × insumo
+    (quantidade por bolo) e a necessidade de cada ordem é essa linha vezes a quantidade.
+    A receita do tamanho da ordem tem prioridade sobre a padrão (sem tamanho).
+    Retorna (ids das ordens explodidas, ids dos insumos, matriz ordem × insumo, ids das
+    ordens sem ficha técnica). As quantidades estão na unidade de cada insumo.
+    """
+    order_rows = list(orders.values_list("id", "cake_id", "size", "quantity").order_by())
+    lines = list(
+        CakeRecipeLine.objects.filter(recipe__cake_id__in={cake_id for _, cake_id, _, _ in order_rows})
+        .annotate(per_cake=Cast("quantity", FloatField()) / Cast("recipe__yield_quantity", FloatField()))
+        .values_list(
+            "recipe__cake_id", "recipe__size", "supply_item_id", "per_cake", "unit_of_measure",
+            "supply_item__unit_of_measure", "supply_item__density_g_per_ml", "supply_item__unit_weight_g",
+        )
+    ) if order_rows else []
+    if not lines:
+        return [], [], np.zeros((0, 0)), [order_id for order_id, _, _, _ in order_rows]
+
+    line_recipes, line_sizes, line_items, per_cake, line_units, item_units, density, unit_weight = zip(*lines)
+    per_cake = convert(per_cake, line_units, item_units, density, unit_weight)
+    unconvertible = np.isnan(per_cake)
+    if unconvertible.any():
+        # clean() impede na gravação, mas a densidade/peso do insumo pode ter sido apagada depois
+        logger.warning("%d linha(s) de ficha técnica sem conversão para a unidade do insumo foram ignoradas.", unconvertible.sum())
+        per_cake = np.where(unconvertible, 0.0, per_cake)
+    recipe_keys, recipe_codes = _codes(list(zip(line_recipes, line_sizes)))
+    item_ids, item_codes = _codes(line_items)
+    recipe_matrix = np.zeros((len(recipe_keys), len(item_ids)), dtype=np.float64)
+    np.add.at(recipe_matrix, (recipe_codes, item_codes), per_cake)
+
+    # Receita de cada ordem: a do tamanho, senão a padrão, senão nenhuma (-1)
+    position = {key: code for code, key in enumerate(recipe_keys)}
+    order_recipe = np.fromiter(
+        (position.get((cake_id, size), position.get((cake_id, None), -1)) for _, cake_id, size, _ in order_rows),
+        dtype=np.int64, count=len(order_rows),
+    )
+    quantities = np.fromiter((quantity for _, _, _, quantity in order_rows), dtype=np.float64, count=len(order_rows))
+    found = order_recipe >= 0
+    matrix = quantities[found, None] * recipe_matrix[order_recipe[found]]
+
+    order_ids = [row[0] for row in order_rows]
+    return (
+        [order_id for order_id, ok in zip(order_ids, found) if ok],
+        item_ids,
+        matrix,
+        [order_id for order_id, ok in zip(order_ids, found) if not ok],
+    )
+
+
+def requirements_by_order(orders) -> dict:
+    """{order_id: {supply_item_id: quantidade}} — o formato de StockReservationService.reserve()."""
+    order_ids, item_ids, matrix, _ = explode(orders)
+    return {
+        order_id: {item_ids[column]: round(float(matrix[row, column]), 2) for column in np.flatnonzero(matrix[row])}
+        for row, order_id in enumerate(order_ids)
+    }
+
+
+def on_hand_by_item(item_ids, today=None):
+    """
+    Saldo físico por insumo, na unidade do insumo, em uma consulta (lotes vencidos não
+    contam). Os totais vêm agrupados por unidade do estoque e são convertidos de uma vez.
+    """
+    today = today or timezone.localdate()
+    rows = list(
+        StockItem.objects.filter(quantity__gt=0)
+        .annotate(
+            item_id=Coalesce("supply_item_id", "supply_batch__supply_item_id"),
+            item_unit=Coalesce("supply_item__unit_of_measure", "supply_batch__supply_item__unit_of_measure"),
+            density=Coalesce("supply_item__density_g_per_ml", "supply_batch__supply_item__density_g_per_ml"),
+            unit_weight=Coalesce("supply_item__unit_weight_g", "supply_batch__supply_item__unit_weight_g"),
+            stock_unit=Coalesce(NullIf("unit_of_measure", Value("")), "item_unit"),
+        )
+        .filter(item_id__in=item_ids)
+        .exclude(supply_batch__expiration_date__lte=today)
+        .values_list("item_id", "stock_unit", "item_unit", "density", "unit_weight")
+        .annotate(total=Cast(Sum("quantity"), FloatField()))
+        .order_by()
+    )
+    position = {item_id: index for index, item_id in enumerate(item_ids)}
+    on_hand = np.zeros(len(item_ids), dtype=np.float64)
+    if rows:
+        row_items, stock_units, item_units, density, unit_weight, totals = zip(*rows)
+        converted = convert(totals, stock_units, item_units, density, unit_weight)
+        np.add.at(on_hand, [position[item_id] for item_id in row_items], np.nan_to_num(converted))
+    return on_hand
+
+
+def _as_date(value, default):
+    if value in (None, ""):
+        return default
+    try:
+        return value if isinstance(value, date) else date.fromisoformat(str(value))
+    except ValueError:
+        raise RequirementError(f"Data inválida: {value} (use AAAA-MM-DD).")
+
+
+def shortfall(start=None, end=None, statuses=None, only_shortages=True, today=None) -> dict:
+    """
+    Necessidade de insumos das ordens abertas programadas entre `start` e `end`
+    (padrão: os próximos 7 dias) comparada ao saldo em estoque.
+    """
+    today = today or timezone.localdate()
+    start = _as_date(start, today)
+    end = _as_date(end, start + timedelta(days=DEFAULT_PERIOD_DAYS - 1))
+    if end < start:
+        raise RequirementError("A data final deve ser igual ou posterior à inicial.")
+    if (end - start).days >= MAX_PERIOD_DAYS:
+        raise RequirementError(f"Período máximo de {MAX_PERIOD_DAYS} dias.")
+
+    orders = ProductionOrder.objects.filter(
+        scheduled_date__range=(start, end), status__in=statuses or OPEN_ORDER_STATUSES,
+    )
+    order_ids, item_ids, matrix, missing = explode(orders)
+    required = matrix.sum(axis=0)
+    on_hand = on_hand_by_item(item_ids, today)
+    missing_quantity = np.maximum(required - on_hand, 0)
+
+    selected = np.flatnonzero(missing_quantity > 1e-9) if only_shortages else np.arange(len(item_ids))
+    selected = selected[np.argsort(-missing_quantity[selected], kind="stable")]
+    items = {
+        item.pk: item
+        for item in SupplyItem.objects.filter(pk__in=[item_ids[column] for column in selected]).only("name", "unit_of_measure")
+    } if len(selected) else {}
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "orders": len(order_ids) + len(missing),
+        "orders_without_recipe": [str(order_id) for order_id in missing],
+        "items_with_shortfall": int((missing_quantity > 1e-9).sum()),
+        "results": [
+            {
+                "supply_item_id": str(item_ids[column]),
+                "name": items[item_ids[column]].name,
+                "unit_of_measure": items[item_ids[column]].unit_of_measure,
+                "required": round(float(required[column]), 2),
+                "on_hand": round(float(on_hand[column]), 2),
+                "shortfall": round(float(missing_quantity[column]), 2),
+            }
+            for column in selected
+        ],
+    }
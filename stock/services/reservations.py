@@ -0,0 +1,281 @@
+# stock/services/reservations.py
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Sum, Value, OuterRef, Subquery, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from commons.ids import parse_uuid
+from production.models import ProductionOrder, ProductionOrderStatus
+from stock.models import (
+    StockItem, StockReservation, StockReservationStatus, StockReservationTotal
+)
+from stock.services.requirements import OPEN_ORDER_STATUSES, requirements_by_order
+from supplies.models import SupplyItem
+
+_DECIMAL = DecimalField(max_digits=14, decimal_places=2)
+_ZERO = Value(Decimal("0.00"), output_field=_DECIMAL)
+
+
+class StockReservationService:
+    """
+    Reservas de insumos para ordens de produção planejadas.
+
+    Todas as operações recebem várias ordens de uma vez e atualizam os totais
+    por item (StockReservationTotal) com deltas, travando só as linhas afetadas.
+    """
+
+    @staticmethod
+    def _apply_deltas(deltas):
+        deltas = {item_id: delta for item_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        StockReservationTotal.objects.bulk_create(
+            [StockReservationTotal(supply_item_id=item_id) for item_id in deltas],
+            ignore_conflicts=True,
+        )
+        # Ordem fixa de travamento para evitar deadlock entre transações concorrentes
+        totals = list(
+            StockReservationTotal.objects.select_for_update()
+            .filter(supply_item_id__in=deltas)
+            .order_by("supply_item_id")
+        )
+        now = timezone.now()
+        for total in totals:
+            total.reserved_quantity += deltas[total.supply_item_id]
+            total.updated_at = now
+        StockReservationTotal.objects.bulk_update(totals, ["reserved_quantity", "updated_at"])
+
+    @staticmethod
+    @transaction.atomic
+    def reserve(requirements_by_order) -> int:
+        """
+        Cria ou ajusta as reservas de cada ordem.
+
+        `requirements_by_order` = {order_id: {supply_item_id: quantidade}}. A chamada é
+        idempotente: a reserva da ordem passa a ser exatamente o informado e itens que
+        deixaram de constar são liberados.
+        """
+        requirements = {
+            parse_uuid(order_id): {parse_uuid(item_id): Decimal(qty) for item_id, qty in items.items()}
+            for order_id, items in requirements_by_order.items()
+        }
+        if not requirements:
+            return 0
+
+        existing = {
+            (r.production_order_id, r.supply_item_id): r
+            for r in StockReservation.objects.select_for_update().filter(production_order_id__in=requirements)
+        }
+
+        now = timezone.now()
+        deltas = defaultdict(Decimal)
+        to_create, to_update = [], []
+
+        for order_id, items in requirements.items():
+            for item_id, quantity in items.items():
+                reservation = existing.pop((order_id, item_id), None)
+                if reservation is None:
+                    to_create.append(StockReservation(
+                        production_order_id=order_id, supply_item_id=item_id, quantity=quantity
+                    ))
+                    deltas[item_id] += quantity
+                    continue
+
+                if reservation.status == StockReservationStatus.ACTIVE:
+                    deltas[item_id] += quantity - reservation.quantity
+                else:
+                    deltas[item_id] += quantity
+                reservation.quantity = quantity
+                reservation.status = StockReservationStatus.ACTIVE
+                reservation.updated_at = now
+                to_update.append(reservation)
+
+        # Itens que não fazem mais parte da necessidade da ordem
+        for reservation in existing.values():
+            if reservation.status == StockReservationStatus.ACTIVE:
+                deltas[reservation.supply_item_id] -= reservation.quantity
+                reservation.status = StockReservationStatus.RELEASED
+                reservation.updated_at = now
+                to_update.append(reservation)
+
+        StockReservation.objects.bulk_create(to_create)
+        StockReservation.objects.bulk_update(to_update, ["quantity", "status", "updated_at"])
+        StockReservationService._apply_deltas(deltas)
+        return len(to_create) + len(to_update)
+
+    @staticmethod
+    def _close(order_ids, new_status) -> int:
+        active = StockReservation.objects.select_for_update().filter(
+            production_order_id__in=[parse_uuid(order_id) for order_id in order_ids],
+            status=StockReservationStatus.ACTIVE,
+        )
+        locked_ids = list(active.values_list("id", flat=True))
+        if not locked_ids:
+            return 0
+
+        totals = (
+            StockReservation.objects.filter(id__in=locked_ids)
+            .values("supply_item_id")
+            .annotate(total=Sum("quantity"))
+        )
+        deltas = {row["supply_item_id"]: -row["total"] for row in totals}
+
+        updated = StockReservation.objects.filter(id__in=locked_ids).update(
+            status=new_status, updated_at=timezone.now()
+        )
+        StockReservationService._apply_deltas(deltas)
+        return updated
+
+    @staticmethod
+    @transaction.atomic
+    def release(order_ids) -> int:
+        """Libera as reservas ativas das ordens (ex.: ordem cancelada)."""
+        return StockReservationService._close(order_ids, StockReservationStatus.RELEASED)
+
+    @staticmethod
+    @transaction.atomic
+    def consume(order_ids) -> int:
+        """Marca como consumidas as reservas ativas das ordens (ex.: ordem concluída)."""
+        return StockReservationService._close(order_ids, StockReservationStatus.CONSUMED)
+
+    @staticmethod
+    def sync_order_status(order_ids, new_status) -> int:
+        """
+        Ajusta as reservas após a mudança de status das ordens:
+        concluída → consome, cancelada → libera; planejada/em execução mantêm a reserva.
+        """
+        if new_status == ProductionOrderStatus.COMPLETED:
+            return StockReservationService.consume(order_ids)
+        if new_status == ProductionOrderStatus.CANCELLED:
+            return StockReservationService.release(order_ids)
+        return 0
+
+    @staticmethod
+    @transaction.atomic
+    def sync_orders(order_ids) -> int:
+        """
+        Alinha as reservas das ordens ao estado atual, em lote: as abertas reservam a
+        necessidade da ficha técnica (uma explosão para todas), as concluídas consomem
+        e as canceladas liberam. Ordens abertas sem ficha técnica liberam o que tinham.
+        """
+        by_status = defaultdict(list)
+        for order_id, status in ProductionOrder.objects.filter(pk__in=order_ids).values_list("id", "status"):
+            by_status[status].append(order_id)
+
+        changed = 0
+        open_ids = [order_id for status in OPEN_ORDER_STATUSES for order_id in by_status[status]]
+        if open_ids:
+            requirements = {order_id: {} for order_id in open_ids}
+            requirements.update(requirements_by_order(ProductionOrder.objects.filter(pk__in=open_ids)))
+            changed += StockReservationService.reserve(requirements)
+        for status in (ProductionOrderStatus.COMPLETED, ProductionOrderStatus.CANCELLED):
+            if by_status[status]:
+                changed += StockReservationService.sync_order_status(by_status[status], status)
+        return changed
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild_totals() -> int:
+        """
+        Recalcula StockReservationTotal a partir das reservas ativas (ex.: após exclusões
+        em cascata ou cargas diretas no banco). Retorna quantos totais foram corrigidos.
+        """
+        active = dict(
+            StockReservation.objects.filter(status=StockReservationStatus.ACTIVE)
+            .order_by().values("supply_item_id").annotate(total=Sum("quantity"))
+            .values_list("supply_item_id", "total")
+        )
+        totals = {
+            total.supply_item_id: total
+            for total in StockReservationTotal.objects.select_for_update().order_by("supply_item_id")
+        }
+        StockReservationTotal.objects.bulk_create(
+            [StockReservationTotal(supply_item_id=item_id) for item_id in active.keys() - totals.keys()],
+            ignore_conflicts=True,
+        )
+        if active.keys() - totals.keys():
+            totals = {
+                total.supply_item_id: total
+                for total in StockReservationTotal.objects.select_for_update().order_by("supply_item_id")
+            }
+
+        now = timezone.now()
+        drifted = []
+        for item_id, total in totals.items():
+            expected = active.get(item_id, Decimal("0.00"))
+            if total.reserved_quantity != expected:
+                total.reserved_quantity = expected
+                total.updated_at = now
+                drifted.append(total)
+        StockReservationTotal.objects.bulk_update(drifted, ["reserved_quantity", "updated_at"])
+        return len(drifted)
+
+    @staticmethod
+    def annotate_availability(queryset):
+        """Anota `on_hand`, `reserved` e `available` em um queryset de SupplyItem."""
+        on_hand = (
+            StockItem.objects.filter(supply_item=OuterRef("pk"))
+            .order_by()
+            .values("supply_item")
+            .annotate(total=Sum("quantity"))
+            .values("total")
+        )
+        return (
+            queryset
+            .annotate(
+                on_hand=Coalesce(Subquery(on_hand, output_field=_DECIMAL), _ZERO),
+                reserved=Coalesce(F("reservation_total__reserved_quantity"), _ZERO),
+            )
+            .annotate(available=F("on_hand") - F("reserved"))
+        )
+
+    @staticmethod
+    def available_to_promise(supply_item_ids):
+        """
+        Disponível para promessa (em estoque − reservado) de cada item, em uma única consulta.
+        O custo depende só da quantidade de itens pedidos, não do número de ordens abertas.
+        """
+        rows = StockReservationService.annotate_availability(
+            SupplyItem.objects.filter(pk__in=supply_item_ids)
+        ).values("id", "on_hand", "reserved", "available")
+        return {row["id"]: row for row in rows}
+
+
+# ---------------------------------------------
+# Receivers: ciclo de vida das ordens de produção
+# ---------------------------------------------
+
+# Campos da ordem que mudam a necessidade de insumos ou o destino das reservas
+RESERVATION_FIELDS = ("cake_id", "size", "quantity", "scheduled_date", "status")
+
+
+def remember_order_state(sender, instance, **kwargs):
+    """pre_save de ProductionOrder: guarda se algo que afeta as reservas mudou."""
+    if instance._state.adding:
+        instance._reservation_changed = True
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list(*RESERVATION_FIELDS).first()
+    instance._reservation_changed = previous != tuple(getattr(instance, field) for field in RESERVATION_FIELDS)
+
+
+def sync_order_reservations(sender, instance, **kwargs):
+    """post_save de ProductionOrder: cria/reprograma, consome ou libera as reservas."""
+    if getattr(instance, "_reservation_changed", True):
+        StockReservationService.sync_orders([instance.pk])
+
+
+def release_order_reservations(sender, instance, **kwargs):
+    """pre_delete de ProductionOrder: tira as reservas dos totais antes da exclusão em cascata."""
+    StockReservationService.release([instance.pk])
+
+
+def sync_recipe_reservations(sender, instance, **kwargs):
+    """post_save/post_delete de CakeRecipe/CakeRecipeLine: reexplode as ordens abertas do bolo."""
+    recipe_id = instance.pk if sender._meta.model_name == "cakerecipe" else instance.recipe_id
+    order_ids = ProductionOrder.objects.filter(
+        cake__recipes__id=recipe_id, status__in=OPEN_ORDER_STATUSES,
+    ).values_list("id", flat=True)
+    StockReservationService.sync_orders(list(order_ids))
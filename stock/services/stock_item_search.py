@@ -0,0 +1,51 @@
+# stock/services/stock_item_search.py
+
+from django.db.models import Q, F, Value
+from django.db.models.functions import Coalesce, NullIf
+from stock.models import StockItem
+
+PICKER_LIMIT = 20
+
+# Campos pesquisáveis por prefixo (cobertos pelos índices UPPER(...) text_pattern_ops)
+SEARCH_FIELDS = (
+    "supply_item__name",
+    "supply_batch__batch_code",
+    "location__name",
+)
+
+
+def stock_item_label(row) -> str:
+    """Mesmo formato de `StockItem.__str__`, montado a partir de uma linha de `.values()`."""
+    return (
+        f"{row['item_name'] or '-'} | {row['batch'] or ''} | "
+        f"{row['quantity']} {row['unit'] or ''} @ {row['location_name']}"
+    )
+
+
+def search_stock_items(term: str, limit: int = PICKER_LIMIT):
+    """
+    Busca itens de estoque para o seletor do admin.
+
+    Cada palavra do termo precisa casar (prefixo, sem diferenciar maiúsculas) com o nome
+    do insumo, o código do lote ou o local. Retorna no máximo `limit` linhas, com o
+    rótulo montado a partir de uma única consulta com JOINs.
+    """
+    queryset = StockItem.objects.all()
+    for token in (term or "").split():
+        token_filter = Q()
+        for field in SEARCH_FIELDS:
+            token_filter |= Q(**{f"{field}__istartswith": token})
+        queryset = queryset.filter(token_filter)
+
+    rows = (
+        queryset
+        .annotate(
+            item_name=Coalesce("supply_item__name", "supply_batch__supply_item__name"),
+            batch=F("supply_batch__batch_code"),
+            unit=Coalesce(NullIf("unit_of_measure", Value("")), "supply_item__unit_of_measure"),
+            location_name=F("location__name"),
+        )
+        .order_by("item_name", "supply_batch__expiration_date", "id")
+        .values("id", "item_name", "batch", "quantity", "unit", "location_name")[:limit]
+    )
+    return [{"id": str(row["id"]), "text": stock_item_label(row)} for row in rows]
@@ -1,3 +1,409 @@
+import base64
+import json
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cakes.models import Cake, CakeCategory, CakeRecipe, CakeRecipeLine
+from commons.pagination import InvalidCursor, decode_cursor, encode_cursor
+from production.models import ProductionOrder, ProductionOrderStatus
+from stock.models import (
+    StockItem, StockLocation, StockMovement, StockMovementType, StockPeriodClose, StockReservation, StockReservationStatus,
+    StockReservationTotal,
+)
+from stock.services.demand import load_outflow_matrix
+from stock.services.movement_history import movement_history_page
+from stock.services.reports import build_aging_report
+from stock.services.requirements import explode, on_hand_by_item, requirements_by_order, shortfall
+from stock.services.reservations import StockReservationService
+from supplies.models import SupplyBatch, SupplyItem
 
-# Create your tests here.
+
+def forged_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def reserved(item):
+    total = StockReservationTotal.objects.filter(supply_item=item).values_list("reserved_quantity", flat=True).first()
+    return total or Decimal("0")
+
+
+class StockReservationLifecycleTests(TestCase):
+    """As reservas (e os totais por insumo) acompanham o ciclo de vida das ordens de produção."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.flour = SupplyItem.objects.create(sku="FAR", name="Farinha", unit_of_measure="kg", category="base")
+        cls.sugar = SupplyItem.objects.create(sku="ACU", name="Açúcar", unit_of_measure="kg", category="base")
+        cls.cake = Cake.objects.create(name="Bolo de Teste", description="Teste", category=CakeCategory.choices[0][0])
+        cls.recipe = CakeRecipe.objects.create(cake=cls.cake, yield_quantity=1)
+        CakeRecipeLine.objects.create(recipe=cls.recipe, supply_item=cls.flour, quantity=Decimal("0.5"))
+        CakeRecipeLine.objects.create(recipe=cls.recipe, supply_item=cls.sugar, quantity=Decimal("0.2"))
+
+    def create_order(self, quantity=2, **kwargs):
+        return ProductionOrder.objects.create(
+            cake=self.cake, quantity=quantity, scheduled_date=date.today() + timedelta(days=1), **kwargs
+        )
+
+    def test_new_order_reserves_recipe_requirements(self):
+        order = self.create_order(quantity=4)
+        self.assertEqual(order.stock_reservations.filter(status=StockReservationStatus.ACTIVE).count(), 2)
+        self.assertEqual(reserved(self.flour), Decimal("2.00"))
+        self.assertEqual(reserved(self.sugar), Decimal("0.80"))
+
+    def test_quantity_change_adjusts_reservation(self):
+        order = self.create_order(quantity=4)
+        order.quantity = 1
+        order.save()
+        self.assertEqual(reserved(self.flour), Decimal("0.50"))
+        self.assertEqual(order.stock_reservations.count(), 2)
+
+    def test_completed_order_consumes_and_cancelled_releases(self):
+        done, cancelled = self.create_order(), self.create_order()
+        self.assertEqual(reserved(self.flour), Decimal("2.00"))
+        done.status = ProductionOrderStatus.COMPLETED
+        done.save()
+        cancelled.status = ProductionOrderStatus.CANCELLED
+        cancelled.save()
+        self.assertEqual(reserved(self.flour), Decimal("0.00"))
+        self.assertEqual(
+            set(StockReservation.objects.values_list("production_order_id", "status").distinct()),
+            {(done.pk, StockReservationStatus.CONSUMED), (cancelled.pk, StockReservationStatus.RELEASED)},
+        )
+
+    def test_recipe_change_reexplodes_open_orders(self):
+        self.create_order(quantity=2)
+        line = CakeRecipeLine.objects.get(recipe=self.recipe, supply_item=self.sugar)
+        line.delete()
+        self.assertEqual(reserved(self.sugar), Decimal("0.00"))
+        self.assertEqual(reserved(self.flour), Decimal("1.00"))
+
+    def test_deleting_order_releases_totals(self):
+        order = self.create_order()
+        order.delete()
+        self.assertEqual(reserved(self.flour), Decimal("0.00"))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_sync_orders_is_bulk_and_idempotent(self):
+        orders = [self.create_order(quantity=1) for _ in range(10)]
+        # status + explosão (2) + reservas + gravações + totais: não cresce com o número de ordens
+        with self.assertNumQueries(12):
+            StockReservationService.sync_orders([order.pk for order in orders])
+        self.assertEqual(reserved(self.flour), Decimal("5.00"))
+
+    def test_rebuild_totals_fixes_drift(self):
+        self.create_order(quantity=2)
+        StockReservationTotal.objects.filter(supply_item=self.flour).update(reserved_quantity=Decimal("99"))
+        StockReservation.objects.filter(supply_item=self.sugar).delete()
+        self.assertEqual(StockReservationService.rebuild_totals(), 2)
+        self.assertEqual(reserved(self.flour), Decimal("1.00"))
+        self.assertEqual(reserved(self.sugar), Decimal("0.00"))
+
+
+class StockPeriodLockTests(TestCase):
+    """Movimentações com data em período fechado não podem ser lançadas, movidas nem excluídas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        supply = SupplyItem.objects.create(sku="LEI", name="Leite", unit_of_measure="l", category="base")
+        location = StockLocation.objects.create(name="Depósito")
+        cls.stock_item = StockItem.objects.create(
+            supply_item=supply, location=location, quantity=Decimal("100"), unit_of_measure="l"
+        )
+        StockPeriodClose.objects.create(period=date(2024, 1, 1), period_end=date(2024, 1, 31), closed_at=timezone.now())
+
+    def movement(self, day, hour=12):
+        return StockMovement.objects.create(
+            stock_item=self.stock_item, movement_type=StockMovementType.INBOUND, quantity=Decimal("1"),
+            date=timezone.make_aware(datetime.combine(day, datetime.min.time()).replace(hour=hour)),
+        )
+
+    def test_blocks_new_movement_in_closed_period(self):
+        with self.assertRaises(ValidationError):
+            self.movement(date(2024, 1, 31), hour=23)
+        self.movement(date(2024, 2, 1), hour=0)
+
+    def test_blocks_moving_a_closed_movement_out_of_the_period(self):
+        movement = self.movement(date(2024, 2, 10))
+        StockMovement.objects.filter(pk=movement.pk).update(date=timezone.make_aware(datetime(2024, 1, 15, 12)))
+        movement.date = timezone.make_aware(datetime(2024, 2, 15, 12))
+        with self.assertRaises(ValidationError):
+            movement.save()
+
+    def test_blocks_delete_in_closed_period(self):
+        movement = self.movement(date(2024, 2, 10))
+        StockMovement.objects.filter(pk=movement.pk).update(date=timezone.make_aware(datetime(2024, 1, 15, 12)))
+        with self.assertRaises(ValidationError):
+            movement.delete()
+        self.assertTrue(StockMovement.objects.filter(pk=movement.pk).exists())
+        self.movement(date(2024, 2, 11)).delete()
+
+    def test_new_close_applies_without_cache(self):
+        movement = self.movement(date(2024, 2, 10))
+        StockPeriodClose.objects.create(period=date(2024, 2, 1), period_end=date(2024, 2, 29), closed_at=timezone.now())
+        self.assertEqual(StockPeriodClose.locked_until(), date(2024, 2, 29))
+        with self.assertRaises(ValidationError):
+            movement.delete()
+
+
+class OutflowBucketTests(TestCase):
+    """Os períodos do consumo seguem o dia local, não o epoch UTC."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.supply = SupplyItem.objects.create(sku="OVO", name="Ovo", unit_of_measure="un", category="base")
+        location = StockLocation.objects.create(name="Câmara fria")
+        cls.stock_item = StockItem.objects.create(
+            supply_item=cls.supply, location=location, quantity=Decimal("0"), unit_of_measure="un"
+        )
+
+    def outflow(self, moment, quantity):
+        StockMovement.objects.bulk_create([StockMovement(
+            stock_item=self.stock_item, movement_type=StockMovementType.OUTBOUND,
+            quantity=Decimal(quantity), date=timezone.make_aware(moment),
+        )])
+
+    def test_weekly_buckets_use_local_days(self):
+        self.outflow(datetime(2024, 3, 4, 1, 0), "2")    # 01:00 do primeiro dia
+        self.outflow(datetime(2024, 3, 10, 23, 30), "3")  # 23:30 do último dia da 1ª semana
+        self.outflow(datetime(2024, 3, 11, 0, 30), "5")   # 00:30 do primeiro dia da 2ª semana
+        ids, _, matrix = load_outflow_matrix(date(2024, 3, 4), date(2024, 3, 17), bucket=7)
+        self.assertEqual(matrix[ids.index(self.supply.pk)].tolist(), [5.0, 5.0])
+
+
+class StockOutboundProductionOrderTests(TestCase):
+    """production_order_id inválido ou inexistente é erro de entrada (400), não 500."""
+
+    @classmethod
+    def setUpTestData(cls):
+        supply = SupplyItem.objects.create(sku="MAN", name="Manteiga", unit_of_measure="kg", category="base")
+        location = StockLocation.objects.create(name="Depósito")
+        cls.stock_item = StockItem.objects.create(
+            supply_item=supply, location=location, quantity=Decimal("10"), unit_of_measure="kg"
+        )
+        cake = Cake.objects.create(name="Bolo de Manteiga", description="Teste", category=CakeCategory.choices[0][0])
+        cls.order = ProductionOrder.objects.create(cake=cake, quantity=1, scheduled_date=date.today())
+        cls.user = get_user_model().objects.create_user(username="estoque", password="x")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post_line(self, production_order_id=None, quantity="1"):
+        return self.client.post(reverse("stock-outbound"), {"lines": [{
+            "stock_item_id": str(self.stock_item.pk), "quantity": quantity,
+            "movement_type": StockMovementType.PRODUCTION_INPUT, "production_order_id": production_order_id,
+        }]}, format="json")
+
+    def test_rejects_malformed_and_unknown_orders(self):
+        for production_order_id in ("nao-e-uuid", str(uuid.uuid4())):
+            response = self.post_line(production_order_id)
+            self.assertEqual(response.status_code, 400, production_order_id)
+        self.stock_item.refresh_from_db()
+        self.assertEqual(self.stock_item.quantity, Decimal("10"))
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_rejects_non_finite_quantity(self):
+        for quantity in ("NaN", "Infinity"):
+            response = self.post_line(quantity=quantity)
+            self.assertEqual(response.status_code, 400, quantity)
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_links_existing_order(self):
+        response = self.post_line(str(self.order.pk))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(StockMovement.objects.get().production_order_id, self.order.pk)
+
+
+class StockLedgerPeriodTests(TestCase):
+    """Período do extrato: `date_to` só com a data inclui o dia inteiro (horário local)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        supply = SupplyItem.objects.create(sku="CHO", name="Chocolate", unit_of_measure="kg", category="base")
+        location = StockLocation.objects.create(name="Depósito")
+        cls.stock_item = StockItem.objects.create(
+            supply_item=supply, location=location, quantity=Decimal("0"), unit_of_measure="kg"
+        )
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                stock_item=cls.stock_item, movement_type=StockMovementType.INBOUND, quantity=Decimal("1"),
+                date=timezone.make_aware(moment),
+            )
+            for moment in (datetime(2024, 3, 9, 10, 30), datetime(2024, 3, 10, 1, 30), datetime(2024, 3, 10, 23, 30),
+                           datetime(2024, 3, 11, 0, 30))
+        ])
+        cls.user = get_user_model().objects.create_user(username="extrato", password="x")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_date_only_period_covers_whole_local_days(self):
+        response = self.client.get(reverse("stock-ledger"), {
+            "stock_item_id": str(self.stock_item.pk), "date_from": "2024-03-10", "date_to": "2024-03-10",
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["opening_balance"], "1.00")
+        self.assertEqual([row["balance"] for row in data["results"]], ["2.00", "3.00"])
+
+    def test_cursor_is_bound_to_the_statement(self):
+        params = {"stock_item_id": str(self.stock_item.pk), "page_size": 2}
+        first = self.client.get(reverse("stock-ledger"), params).json()
+        second = self.client.get(reverse("stock-ledger"), {**params, "cursor": first["next"]})
+        self.assertEqual([row["balance"] for row in second.json()["results"]], ["3.00", "4.00"])
+
+        other = StockItem.objects.create(
+            supply_item=self.stock_item.supply_item, location=self.stock_item.location, quantity=Decimal("0"),
+            unit_of_measure="kg",
+        )
+        signature, moment, movement_id, _ = decode_cursor(first["next"])
+        for other_params in (
+            {"stock_item_id": str(other.pk), "cursor": first["next"]},
+            {**params, "date_from": "2024-03-10", "cursor": first["next"]},
+            {**params, "cursor": forged_cursor([
+                ["raw", signature], ["dt", moment.isoformat()], ["uuid", str(movement_id)], ["raw", "x"],
+            ])},
+        ):
+            response = self.client.get(reverse("stock-ledger"), other_params)
+            self.assertEqual(response.status_code, 400, other_params)
+
+    def test_export_validates_before_streaming(self):
+        for params in ({"stock_item_id": "nao-e-uuid"}, {"stock_item_id": str(self.stock_item.pk), "date_to": "2024-02-30"}):
+            response = self.client.get(reverse("stock-ledger-export"), params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class StockAgingReportTests(TestCase):
+    """A idade do estoque conta da entrada (data da movimentação), não da criação do registro."""
+
+    def test_aging_uses_inbound_movement_date(self):
+        supply = SupplyItem.objects.create(sku="FAR", name="Farinha", unit_of_measure="kg", category="base")
+        location = StockLocation.objects.create(name="Depósito")
+        received = StockItem.objects.create(supply_item=supply, location=location, quantity=Decimal("10"), unit_of_measure="kg")
+        StockItem.objects.create(supply_item=supply, location=location, quantity=Decimal("5"), unit_of_measure="g")
+        StockMovement.objects.bulk_create([StockMovement(
+            stock_item=received, movement_type=StockMovementType.INBOUND, quantity=Decimal("10"),
+            date=timezone.now() - timedelta(days=40),
+        )])
+        groups = {group["unit_of_measure"]: group["aging"] for group in build_aging_report("location")["groups"]}
+        self.assertEqual(groups["kg"]["31_90"]["items"], 1)
+        self.assertEqual(groups["kg"]["0_7"]["items"], 0)
+        # Sem entrada registrada: cai na data de criação
+        self.assertEqual(groups["g"]["0_7"]["items"], 1)
+
+
+class MovementHistoryCursorTests(TestCase):
+    """Cursor forjado no histórico de movimentações é InvalidCursor (400), não erro do banco."""
+
+    @classmethod
+    def setUpTestData(cls):
+        supply = SupplyItem.objects.create(sku="LEI", name="Leite", unit_of_measure="l", category="base")
+        location = StockLocation.objects.create(name="Depósito")
+        cls.stock_item = StockItem.objects.create(supply_item=supply, location=location, quantity=Decimal("3"), unit_of_measure="l")
+        StockMovement.objects.bulk_create([
+            StockMovement(stock_item=cls.stock_item, movement_type=StockMovementType.INBOUND, quantity=Decimal("1"))
+            for _ in range(3)
+        ])
+
+    def test_next_cursor_round_trips(self):
+        page = movement_history_page(self.stock_item.pk, limit=2)
+        self.assertEqual(len(movement_history_page(self.stock_item.pk, cursor=page["next"], limit=2)["results"]), 1)
+
+    def test_forged_cursors(self):
+        forged = [
+            "não-é-base64",
+            forged_cursor({"a": 1}),
+            forged_cursor([["raw", {"date": 1}], ["raw", [1]]]),
+            forged_cursor([["raw", "ontem"], ["uuid", str(uuid.uuid4())]]),
+            forged_cursor([["dt", timezone.now().isoformat()], ["raw", "nao-e-uuid"]]),
+            forged_cursor([["dec", "abc"], ["uuid", str(uuid.uuid4())]]),
+            encode_cursor([timezone.now()]),
+        ]
+        for cursor in forged:
+            with self.assertRaises(InvalidCursor, msg=cursor):
+                movement_history_page(self.stock_item.pk, cursor=cursor)
+
+
+class StockRequirementTests(TestCase):
+    """
+    Explosão das ordens nas fichas técnicas contra uma BOM pequena calculada à mão:
+    receita padrão com rendimento 2, receita do tamanho "grande" com prioridade,
+    conversão de unidades, ordem sem ficha técnica e lote vencido fora do saldo.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date(2024, 5, 6)
+        cls.flour = SupplyItem.objects.create(sku="FAR", name="Farinha", unit_of_measure="kg", category="base")
+        cls.milk = SupplyItem.objects.create(sku="LEI", name="Leite", unit_of_measure="l", category="base")
+        cls.egg = SupplyItem.objects.create(sku="OVO", name="Ovo", unit_of_measure="un", category="base")
+        cake = Cake.objects.create(name="Bolo de Leite", description="Teste", category=CakeCategory.choices[0][0])
+        plain = Cake.objects.create(name="Bolo sem ficha", description="Teste", category=CakeCategory.choices[0][0])
+
+        # Padrão: rende 2 bolos → 0,5 kg de farinha e 0,25 l de leite por bolo
+        default = CakeRecipe.objects.create(cake=cake, yield_quantity=2)
+        CakeRecipeLine.objects.create(recipe=default, supply_item=cls.flour, quantity=Decimal("1"), unit_of_measure="kg")
+        CakeRecipeLine.objects.create(recipe=default, supply_item=cls.milk, quantity=Decimal("500"), unit_of_measure="ml")
+        # Grande: 1,2 kg de farinha (em gramas) e 6 ovos por bolo
+        large = CakeRecipe.objects.create(cake=cake, size="grande", yield_quantity=1)
+        CakeRecipeLine.objects.create(recipe=large, supply_item=cls.flour, quantity=Decimal("1200"), unit_of_measure="g")
+        CakeRecipeLine.objects.create(recipe=large, supply_item=cls.egg, quantity=Decimal("6"), unit_of_measure="un")
+
+        def order(cake, quantity, size=None, status=ProductionOrderStatus.PLANNED):
+            return ProductionOrder.objects.create(
+                cake=cake, quantity=quantity, size=size, scheduled_date=cls.today, status=status,
+            )
+
+        cls.default_order = order(cake, 4)              # farinha 2, leite 1
+        cls.large_order = order(cake, 1, "grande")      # farinha 1,2, ovos 6
+        cls.small_order = order(cake, 2, "pequeno")     # sem receita do tamanho: padrão → farinha 1, leite 0,5
+        cls.plain_order = order(plain, 3)               # sem ficha técnica
+        order(cake, 10, status=ProductionOrderStatus.COMPLETED)
+
+        location = StockLocation.objects.create(name="Depósito")
+        expired = SupplyBatch.objects.create(
+            supply_item=cls.flour, batch_code="V1", quantity=Decimal("10"), expiration_date=cls.today - timedelta(days=1),
+        )
+        for supply, quantity, unit, batch in (
+            (cls.flour, "1", "kg", None),
+            (cls.flour, "500", "g", None),
+            (cls.flour, "10", "kg", expired),
+            (cls.milk, "2", "l", None),
+        ):
+            StockItem.objects.create(
+                supply_item=supply, supply_batch=batch, location=location, quantity=Decimal(quantity), unit_of_measure=unit,
+            )
+
+    def test_explode_matrix(self):
+        orders = ProductionOrder.objects.filter(status=ProductionOrderStatus.PLANNED)
+        order_ids, item_ids, matrix, missing = explode(orders)
+        self.assertEqual(missing, [self.plain_order.pk])
+        required = dict(zip(item_ids, matrix.sum(axis=0).round(6).tolist()))
+        self.assertEqual(required, {self.flour.pk: 4.2, self.milk.pk: 1.5, self.egg.pk: 6.0})
+
+        by_order = requirements_by_order(orders)
+        self.assertEqual(set(by_order), {self.default_order.pk, self.large_order.pk, self.small_order.pk})
+        self.assertEqual(by_order[self.large_order.pk], {self.flour.pk: 1.2, self.egg.pk: 6.0})
+        self.assertEqual(by_order[self.small_order.pk], {self.flour.pk: 1.0, self.milk.pk: 0.5})
+
+    def test_on_hand_converts_units_and_skips_expired_batches(self):
+        on_hand = on_hand_by_item([self.flour.pk, self.milk.pk, self.egg.pk], today=self.today)
+        self.assertEqual(on_hand.round(6).tolist(), [1.5, 2.0, 0.0])
+
+    def test_shortfall(self):
+        result = shortfall(start=self.today, end=self.today, today=self.today)
+        self.assertEqual(result["orders"], 4)
+        self.assertEqual(result["orders_without_recipe"], [str(self.plain_order.pk)])
+        self.assertEqual(
+            [(row["name"], row["required"], row["on_hand"], row["shortfall"]) for row in result["results"]],
+            [("Ovo", 6.0, 0.0, 6.0), ("Farinha", 4.2, 1.5, 2.7)],
+        )
+        everything = shortfall(start=self.today, end=self.today, only_shortages=False, today=self.today)
+        self.assertEqual({row["name"]: row["shortfall"] for row in everything["results"]}["Leite"], 0.0)
@@ -0,0 +1,28 @@
+from django.urls import path
+from stock.views import (
+    StockLedgerView,
+    StockLedgerExportView,
+    StockAvailabilityView,
+    StockAgingReportView,
+    StockMovementSearchView,
+    StockReceivingView,
+    StockOutboundView,
+    StockClosingListView,
+    StockClosingBalancesView,
+    StockProjectionView,
+    StockRequirementsView,
+)
+
+urlpatterns = [
+    path("closings/", StockClosingListView.as_view(), name="stock-closing-list"),
+    path("closings/<str:period>/", StockClosingBalancesView.as_view(), name="stock-closing-balances"),
+    path("ledger/", StockLedgerView.as_view(), name="stock-ledger"),
+    path("ledger/export/", StockLedgerExportView.as_view(), name="stock-ledger-export"),
+    path("availability/", StockAvailabilityView.as_view(), name="stock-availability"),
+    path("movements/search/", StockMovementSearchView.as_view(), name="stock-movement-search"),
+    path("outbound/", StockOutboundView.as_view(), name="stock-outbound"),
+    path("projection/", StockProjectionView.as_view(), name="stock-projection"),
+    path("receiving/", StockReceivingView.as_view(), name="stock-receiving"),
+    path("requirements/", StockRequirementsView.as_view(), name="stock-requirements"),
+    path("reports/aging/", StockAgingReportView.as_view(), name="stock-aging-report"),
+]
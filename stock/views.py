@@ -1,3 +1,415 @@
-from django.shortcuts import render
 
-# Create your views here.
+from django.core.exceptions import ValidationError
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from commons.export import export_response
+from commons.pagination import InvalidCursor
+from stock.services.ledger import ledger_page, iter_ledger, parse_moment, LedgerError, DEFAULT_PAGE_SIZE
+from stock.services.reservations import StockReservationService
+from stock.services.movement_search import search_movements, SEARCH_LIMIT
+from stock.services.reports import get_aging_report, GROUP_BY_FIELDS, LOSS_MONTHS
+from stock.services.posting import StockPostingService, PostingError, MAX_LINES
+from stock.services.receiving import receive_scans, ReceivingConflict, ReceivingError, MAX_SCANS
+from stock.services.projection import simulate, ProjectionError, DEFAULT_HORIZON_DAYS, MAX_HORIZON_DAYS
+from stock.services.requirements import shortfall, RequirementError, DEFAULT_PERIOD_DAYS, MAX_PERIOD_DAYS
+from stock.services.closing import closing_balances_page, list_closes, parse_period, ClosingError
+
+
+LEDGER_PARAMETERS = [
+    openapi.Parameter("stock_item_id", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="ID do item de estoque"),
+    openapi.Parameter("supply_item_id", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="ID do item de insumo (todos os lotes/locais)"),
+    openapi.Parameter("date_from", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Início do período (ISO 8601)"),
+    openapi.Parameter("date_to", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Fim do período (ISO 8601)"),
+]
+
+
+class StockLedgerView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Extrato de estoque com saldo corrente",
+        operation_description=(
+            "Lista as movimentações em ordem cronológica com o saldo acumulado calculado no banco "
+            "(SUM em janela). Paginação por cursor: use o valor de `next` no parâmetro `cursor`."
+        ),
+        manual_parameters=LEDGER_PARAMETERS + [
+            openapi.Parameter("cursor", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+        tags=["stock"]
+    )
+    def get(self, request):
+        params = request.query_params
+        page_size = params.get("page_size", "")
+        try:
+            page = ledger_page(
+                stock_item_id=params.get("stock_item_id"),
+                supply_item_id=params.get("supply_item_id"),
+                date_from=parse_moment(params.get("date_from")),
+                date_to=parse_moment(params.get("date_to")),
+                cursor=params.get("cursor"),
+                limit=int(page_size) if page_size.isdigit() else DEFAULT_PAGE_SIZE,
+            )
+        except (LedgerError, ValidationError) as exc:
+            return Response({"detail": " ".join(getattr(exc, "messages", [str(exc)]))}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(page)
+
+
+class StockLedgerExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Exportar extrato de estoque (CSV em streaming)",
+        operation_description="Gera o extrato completo do período em CSV, lido do banco em blocos.",
+        manual_parameters=LEDGER_PARAMETERS,
+        tags=["stock"]
+    )
+    def get(self, request):
+        params = request.query_params
+        if not params.get("stock_item_id") and not params.get("supply_item_id"):
+            return Response({"detail": "Informe stock_item_id ou supply_item_id."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Valida tudo antes do streaming: depois do primeiro byte não há como responder 400
+            rows = iter_ledger(
+                stock_item_id=params.get("stock_item_id"),
+                supply_item_id=params.get("supply_item_id"),
+                date_from=parse_moment(params.get("date_from")),
+                date_to=parse_moment(params.get("date_to")),
+            )
+        except LedgerError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        columns = [
+            "date", "movement_type", "stock_item_id", "quantity", "signed_quantity",
+            "balance", "recorded_after_quantity", "reference", "id",
+        ]
+        return export_response(rows, "csv", columns, "extrato_estoque")
+
+
+class StockAvailabilityView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Disponibilidade de insumos (estoque − reservas)",
+        operation_description="Retorna, para cada item informado, o estoque físico, o total reservado por ordens de produção e o disponível.",
+        manual_parameters=[
+            openapi.Parameter(
+                "supply_item_id", openapi.IN_QUERY, type=openapi.TYPE_ARRAY,
+                items=openapi.Items(type=openapi.TYPE_STRING), collection_format="multi",
+                description="IDs dos itens de insumo (repetir o parâmetro)"
+            ),
+        ],
+        tags=["stock"]
+    )
+    def get(self, request):
+        ids = request.query_params.getlist("supply_item_id")
+        if not ids:
+            return Response({"detail": "Informe ao menos um supply_item_id."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows = StockReservationService.available_to_promise(ids)
+        except ValidationError as exc:
+            return Response({"detail": " ".join(exc.messages)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "results": [
+                {
+                    "supply_item_id": str(row["id"]),
+                    "on_hand": str(row["on_hand"]),
+                    "reserved": str(row["reserved"]),
+                    "available": str(row["available"]),
+                }
+                for row in rows.values()
+            ]
+        })
+
+
+class StockAgingReportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Relatório de idade, validade e perdas do estoque",
+        operation_description=(
+            "Quantidades por faixa de idade (0–7, 8–30, 31–90, 90+ dias desde a entrada) e de validade, "
+            "agrupadas por local ou categoria, além das perdas por vencimento em cada mês. "
+            "Calculado por consultas agrupadas e mantido em cache até o fim do dia."
+        ),
+        manual_parameters=[
+            openapi.Parameter("group_by", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(GROUP_BY_FIELDS)),
+            openapi.Parameter("months", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Meses no histórico de perdas"),
+        ],
+        tags=["stock"]
+    )
+    def get(self, request):
+        group_by = request.query_params.get("group_by", "location")
+        if group_by not in GROUP_BY_FIELDS:
+            return Response(
+                {"detail": f"group_by deve ser um de: {', '.join(GROUP_BY_FIELDS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        months = request.query_params.get("months", "")
+        months = min(int(months), 36) if months.isdigit() and int(months) > 0 else LOSS_MONTHS
+        return Response(get_aging_report(group_by=group_by, months=months))
+
+
+class StockMovementSearchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Busca textual de movimentações",
+        operation_description=(
+            "Busca por referência, observações, nome do insumo e código do lote usando o índice "
+            "full-text. Todas as palavras precisam aparecer (como prefixo); resultados ordenados por relevância."
+        ),
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Máximo 200"),
+        ],
+        tags=["stock"]
+    )
+    def get(self, request):
+        term = request.query_params.get("q", "")
+        limit = request.query_params.get("limit", "")
+        limit = int(limit) if limit.isdigit() else SEARCH_LIMIT
+        return Response({"results": search_movements(term, limit=limit)})
+
+
+class StockReceivingView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Recebimento em lote por código de barras",
+        operation_description=(
+            f"Recebe até {MAX_SCANS} leituras (barcode ou sku, batch_code, expiration_date, quantity), "
+            "resolve os códigos pelo índice em memória e cria lotes, itens de estoque e entradas em lote. "
+            "Leituras com erro são devolvidas em `errors` sem impedir as demais."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["scans"],
+            properties={
+                "location_id": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                "reference": openapi.Schema(type=openapi.TYPE_STRING, description="Ex.: número da nota fiscal"),
+                "scans": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            "barcode": openapi.Schema(type=openapi.TYPE_STRING),
+                            "sku": openapi.Schema(type=openapi.TYPE_STRING),
+                            "batch_code": openapi.Schema(type=openapi.TYPE_STRING),
+                            "expiration_date": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+                            "quantity": openapi.Schema(type=openapi.TYPE_NUMBER),
+                        },
+                    ),
+                ),
+            },
+        ),
+        responses={201: "Leituras recebidas", 400: "Nenhuma leitura válida", 409: "Lote gravado por um recebimento concorrente"},
+        tags=["stock"]
+    )
+    def post(self, request):
+        try:
+            result = receive_scans(
+                request.data.get("scans"),
+                location_id=request.data.get("location_id"),
+                reference=str(request.data.get("reference") or "")[:100],
+            )
+        except ReceivingConflict as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_409_CONFLICT)
+        except (ReceivingError, ValidationError) as exc:
+            return Response({"detail": " ".join(getattr(exc, "messages", [str(exc)]))}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_status = status.HTTP_201_CREATED if result["received"] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
+
+
+class StockOutboundView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Lançar saídas de estoque",
+        operation_description=(
+            f"Baixa até {MAX_LINES} linhas de uma vez (tudo ou nada). O saldo é decrementado por um UPDATE "
+            "condicional no banco; sem saldo suficiente, nada é gravado e a resposta 409 traz "
+            "`error=insufficient_stock` com o pedido e o disponível de cada item."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["lines"],
+            properties={
+                "lines": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        required=["stock_item_id", "quantity"],
+                        properties={
+                            "stock_item_id": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                            "quantity": openapi.Schema(type=openapi.TYPE_NUMBER),
+                            "movement_type": openapi.Schema(type=openapi.TYPE_STRING, enum=["saida", "insumo_producao"]),
+                            "production_order_id": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                            "reference": openapi.Schema(type=openapi.TYPE_STRING),
+                            "notes": openapi.Schema(type=openapi.TYPE_STRING),
+                        },
+                    ),
+                ),
+            },
+        ),
+        responses={201: "Saídas lançadas", 400: "Requisição inválida", 409: "Estoque insuficiente"},
+        tags=["stock"]
+    )
+    def post(self, request):
+        try:
+            result = StockPostingService.post_outbound_many(request.data.get("lines"))
+        except PostingError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_status = status.HTTP_201_CREATED if result["ok"] else status.HTTP_409_CONFLICT
+        return Response(result, status=response_status)
+
+
+class StockClosingListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Fechamentos mensais de estoque",
+        operation_description="Meses fechados, do mais recente ao mais antigo, com a situação do snapshot.",
+        tags=["stock"]
+    )
+    def get(self, request):
+        return Response({"results": list_closes()})
+
+
+class StockClosingBalancesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Saldos de um fechamento mensal",
+        operation_description=(
+            "Saldo inicial, entradas, saídas, ajustes e saldo final por item de estoque no mês, "
+            "lidos do snapshot gravado no fechamento (sem recalcular o razão). Paginação por cursor."
+        ),
+        manual_parameters=[
+            openapi.Parameter("supply_item_id", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("location_id", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("cursor", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Máximo 1000"),
+        ],
+        tags=["stock"]
+    )
+    def get(self, request, period):
+        limit = request.query_params.get("limit", "")
+        try:
+            return Response(closing_balances_page(
+                parse_period(period),
+                supply_item_id=request.query_params.get("supply_item_id"),
+                location_id=request.query_params.get("location_id"),
+                cursor=request.query_params.get("cursor"),
+                **({"limit": int(limit)} if limit.isdigit() else {}),
+            ))
+        except (ClosingError, InvalidCursor, ValidationError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class StockProjectionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @staticmethod
+    def _run(request, scenario=None):
+        horizon = request.query_params.get("horizon", "")
+        item_ids = [value for value in request.query_params.get("item_ids", "").split(",") if value]
+        try:
+            result = simulate(
+                horizon_days=int(horizon) if horizon.isdigit() else DEFAULT_HORIZON_DAYS,
+                scenario=scenario,
+                item_ids=item_ids,
+                only_shortages=request.query_params.get("all") not in ("1", "true"),
+            )
+        except ProjectionError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    projection_parameters = [
+        openapi.Parameter("horizon", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description=f"Dias (padrão {DEFAULT_HORIZON_DAYS}, máximo {MAX_HORIZON_DAYS})"),
+        openapi.Parameter("item_ids", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="IDs de insumos (separados por vírgula) para incluir a série diária de saldo"),
+        openapi.Parameter("all", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description="Inclui itens sem ruptura"),
+    ]
+
+    @swagger_auto_schema(
+        operation_summary="Projeção de estoque (programação atual)",
+        operation_description=(
+            "Simula o saldo diário de todos os insumos: estoque atual + lotes a receber − vencimentos "
+            "− ordens de produção programadas − consumo de base. Retorna a data de ruptura e a falta de cada item."
+        ),
+        manual_parameters=projection_parameters,
+        tags=["stock"]
+    )
+    def get(self, request):
+        return self._run(request)
+
+    @swagger_auto_schema(
+        operation_summary="Projeção de estoque com cenário (what-if)",
+        operation_description=(
+            "Mesma simulação do GET aplicando um cenário que não é gravado: ordens e recebimentos "
+            "hipotéticos, ordens remarcadas ou excluídas e multiplicador do consumo de base."
+        ),
+        manual_parameters=projection_parameters,
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "orders": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                        "scheduled_date": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+                        "requirements": openapi.Schema(type=openapi.TYPE_OBJECT, description="{supply_item_id: quantidade}"),
+                    }),
+                ),
+                "receipts": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                        "supply_item_id": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                        "date": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+                        "quantity": openapi.Schema(type=openapi.TYPE_NUMBER),
+                    }),
+                ),
+                "reschedule": openapi.Schema(type=openapi.TYPE_OBJECT, description="{production_order_id: nova_data}"),
+                "exclude_orders": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING)),
+                "baseline_factor": openapi.Schema(type=openapi.TYPE_NUMBER),
+            },
+        ),
+        tags=["stock"]
+    )
+    def post(self, request):
+        return self._run(request, scenario=request.data)
+
+
+class StockRequirementsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Necessidade de insumos das ordens de produção (explosão da ficha técnica)",
+        operation_description=(
+            "Explode as ordens abertas do período nas fichas técnicas dos bolos (receita do tamanho da "
+            "ordem ou a padrão) e compara o total de cada insumo com o saldo em estoque."
+        ),
+        manual_parameters=[
+            openapi.Parameter("start", openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, description="Início (padrão: hoje)"),
+            openapi.Parameter("end", openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, description=f"Fim (padrão: {DEFAULT_PERIOD_DAYS} dias; máximo {MAX_PERIOD_DAYS})"),
+            openapi.Parameter("all", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description="Inclui itens sem falta"),
+        ],
+        tags=["stock"]
+    )
+    def get(self, request):
+        try:
+            result = shortfall(
+                start=request.query_params.get("start"),
+                end=request.query_params.get("end"),
+                only_shortages=request.query_params.get("all") not in ("1", "true"),
+            )
+        except RequirementError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
@@ -1,14 +1,17 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 import datetime
 from .models import SupplyItem, SupplyBatch, SupplyImage, SupplyNutritionInfo, SupplyIngredientDetail
 from commons.enums import get_unit_description
-from django.db.models import Min
+from commons.images import variant_url
+from django.db.models import Min, OuterRef, Subquery
 from django.utils import timezone
 from django.urls import path
-from supplies.dashboards.views import supplies_dashboard
+from supplies.dashboards.views import supplies_dashboard, supplies_timeline_data
 from stock.services.orchestrator import StockOrchestrator
+from supplies.services.search import search_supplies_queryset, order_by_relevance
 from django.db.models import Sum
 
 
@@ -30,25 +33,36 @@ class ExpirationStatusFilter(admin.SimpleListFilter):
             ("no_date", "– Sem Data"),
         ]
 
+    # Campo de data filtrado; o changelist de itens usa a validade anotada em get_queryset
+    field_name = "expiration_date"
+
     def queryset(self, request, queryset):
         today = timezone.now().date()
         value = self.value()
+        field = self.field_name
 
         if value == "expired":
-            return queryset.filter(expiration_date__lt=today)
+            return queryset.filter(**{f"{field}__lt": today})
         elif value == "expiring_today":
-            return queryset.filter(expiration_date=today)
+            return queryset.filter(**{field: today})
         elif value == "expiring_7":
-            return queryset.filter(expiration_date__gt=today, expiration_date__lte=today + datetime.timedelta(days=7))
+            return queryset.filter(**{f"{field}__gt": today, f"{field}__lte": today + datetime.timedelta(days=7)})
         elif value == "expiring_30":
-            return queryset.filter(expiration_date__gt=today + datetime.timedelta(days=7), expiration_date__lte=today + datetime.timedelta(days=30))
+            return queryset.filter(**{
+                f"{field}__gt": today + datetime.timedelta(days=7),
+                f"{field}__lte": today + datetime.timedelta(days=30),
+            })
         elif value == "valid_long":
-            return queryset.filter(expiration_date__gt=today + datetime.timedelta(days=30))
+            return queryset.filter(**{f"{field}__gt": today + datetime.timedelta(days=30)})
         elif value == "no_date":
-            return queryset.filter(expiration_date__isnull=True)
+            return queryset.filter(**{f"{field}__isnull": True})
 
         return queryset
 
+
+class SupplyItemExpirationStatusFilter(ExpirationStatusFilter):
+    field_name = "next_expiration_annotated"
+
 # ----------------------
 # Inline de lotes
 # ----------------------
@@ -120,7 +134,7 @@ class SupplyImageInline(admin.TabularInline):
         if obj.image:
             return format_html(
                 '<img src="{}" width="100" style="border-radius: 4px; border: 1px solid #ccc;" />',
-                obj.image.url
+                variant_url(obj.image, "thumb")
             )
         return format_html('<span style="opacity: 0.5;">Sem imagem</span>')
     preview.short_description = "Visualização"
@@ -197,9 +211,13 @@ class SupplyItemAdmin(admin.ModelAdmin):
         "is_active",
         ("ingredient_detail__contains_gluten", admin.BooleanFieldListFilter),
         ("ingredient_detail__is_vegan", admin.BooleanFieldListFilter),
-        ExpirationStatusFilter, 
+        SupplyItemExpirationStatusFilter,
+        ("classification__abc_class", admin.ChoicesFieldListFilter),
+        ("classification__xyz_class", admin.ChoicesFieldListFilter),
     ]
     search_fields = ["name", "sku", "barcode"]
+    # Um-para-um e capa por JOIN; validade anotada em get_queryset (sem consultas por linha)
+    list_select_related = ["nutrition_info", "ingredient_detail", "cover_image"]
     readonly_fields = ["created_at", "updated_at", "preview_image", "preview_grid"]
     ordering = ["name"]
     inlines = [ReadOnlyBatchInline, SupplyImageInline, SupplyNutritionInline, SupplyIngredientDetailInline  ]
@@ -213,6 +231,10 @@ class SupplyItemAdmin(admin.ModelAdmin):
                 "regulatory_code", "tags"
             )
         }),
+        ("⚖️ Conversão de Unidades", {
+            "fields": ("density_g_per_ml", "unit_weight_g"),
+            "classes": ("collapse",)
+        }),
         ("📸 Galeria do Produto", {
             "fields": ("preview_image", "preview_grid"),
             "classes": ("collapse",)
@@ -230,6 +252,22 @@ class SupplyItemAdmin(admin.ModelAdmin):
     )
 
 
+    def get_queryset(self, request):
+        next_expiration = SupplyBatch.objects.filter(
+            supply_item=OuterRef("pk"), expiration_date__isnull=False
+        ).order_by("expiration_date").values("expiration_date")[:1]
+        return super().get_queryset(request).annotate(next_expiration_annotated=Subquery(next_expiration))
+
+    def get_search_results(self, request, queryset, search_term):
+        # Busca sem acentos pelos índices full-text/trigramas em vez de ILIKE em cada coluna de search_fields
+        if not search_term.strip():
+            return queryset, False
+        queryset = search_supplies_queryset(queryset, search_term)
+        if ORDER_VAR not in request.GET:
+            # Sem ordenação escolhida pelo usuário: mais relevantes primeiro
+            queryset = order_by_relevance(queryset)
+        return queryset, False
+
     def desativar_itens(self, request, queryset):
         queryset.update(is_active=False)
     desativar_itens.short_description = "Desativar itens selecionados"
@@ -239,14 +277,14 @@ class SupplyItemAdmin(admin.ModelAdmin):
     unit_description_display.short_description = "Descrição da Unidade"
 
     def get_cover_image(self, obj):
-        return obj.images.filter(is_cover=True).first() or obj.images.first()
+        return obj.cover_image
 
     def preview_image(self, obj):
         image = self.get_cover_image(obj)
         if image:
             return format_html(
                 '<img src="{}" width="400" style="border-radius: 8px; border: 1px solid #ccc;" />',
-                image.image.url
+                variant_url(image.image, "medium")
             )
         return format_html('<span style="opacity: 0.5;">Sem imagem</span>')
     preview_image.short_description = "Imagem Principal"
@@ -272,7 +310,7 @@ class SupplyItemAdmin(admin.ModelAdmin):
             img = images_by_type.get(key)
             if img:
                 td_class = "cover" if img.is_cover else ""
-                html += f'''<td class="{td_class}"><a href="{img.image.url}" target="_blank"><img src="{img.image.url}" alt="{img.image_type}" title="{img.get_image_type_display()}" /></a></td>'''
+                html += f'''<td class="{td_class}"><a href="{img.image.url}" target="_blank"><img src="{variant_url(img.image, "thumb")}" alt="{img.image_type}" title="{img.get_image_type_display()}" /></a></td>'''
             else:
                 html += '<td><span style="opacity: 0.3;">–</span></td>'
 
@@ -285,7 +323,7 @@ class SupplyItemAdmin(admin.ModelAdmin):
         if image:
             return format_html(
                 '<img src="{}" width="60" height="60" style="object-fit: cover; border-radius: 6px;" />',
-                image.image.url
+                variant_url(image.image, "thumb")
             )
         return "-"
     thumbnail.short_description = "Imagem"
@@ -310,10 +348,17 @@ class SupplyItemAdmin(admin.ModelAdmin):
         return "-"
     ingredient_summary.short_description = "Ingredientes"
 
+    @staticmethod
+    def _next_expiration(obj):
+        # Anotado em get_queryset; fora do changelist (ex.: formulário), consulta o modelo
+        if hasattr(obj, "next_expiration_annotated"):
+            return obj.next_expiration_annotated
+        return obj.next_expiration()
+
     def expiration_warning(self, obj):
-        next_exp = obj.next_expiration()
-        
-        if obj.has_expiration() and next_exp:
+        next_exp = self._next_expiration(obj)
+
+        if next_exp:
             today = timezone.now().date()  # ← ADICIONE ESTA LINHA
             days_left = (next_exp - today).days
             exp_date_str = next_exp.strftime("%d/%m/%Y") 
@@ -353,14 +398,16 @@ class SupplyItemAdmin(admin.ModelAdmin):
 
 
     expiration_warning.short_description = "Validade"
+    expiration_warning.admin_order_field = "next_expiration_annotated"
 
 
     def next_expiration_date(self, obj):
-        next_exp = obj.next_expiration()
+        next_exp = self._next_expiration(obj)
         if next_exp:
             return next_exp.strftime("%d/%m/%Y")
         return "-"
     next_expiration_date.short_description = "Próx. Vencimento"
+    next_expiration_date.admin_order_field = "next_expiration_annotated"
 
     def has_allergens(self, obj):
         if hasattr(obj, "ingredient_detail"):
@@ -386,6 +433,10 @@ class SupplyItemAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('dashboard/', self.admin_site.admin_view(supplies_dashboard), name='supplies-dashboard'),
+            path(
+                'dashboard/timeline/', self.admin_site.admin_view(supplies_timeline_data),
+                name='supplies-dashboard-timeline',
+            ),
         ]
         return custom_urls + urls
 
@@ -1,6 +1,43 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 
 
 class SuppliesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'supplies'
+
+    def ready(self):
+        from commons.images import delete_image_variants, generate_image_variants, refresh_cover_image
+        from supplies.models import (
+            SupplyItem, SupplyBatch, SupplyImage, SupplyIngredientDetail, SupplyNutritionInfo, SupplyProductTag,
+        )
+        from supplies.services.dashboard import invalidate_dashboard
+        from supplies.services.export import touch_supply_item, touch_supply_items_of_tag, touch_tagged_supply_items
+        from supplies.services.tags import invalidate_tag_facets
+
+        # Snapshot do painel de insumos
+        for model in (SupplyItem, SupplyBatch):
+            post_save.connect(invalidate_dashboard, sender=model, dispatch_uid=f"supplies_dashboard_save_{model.__name__}")
+            post_delete.connect(invalidate_dashboard, sender=model, dispatch_uid=f"supplies_dashboard_delete_{model.__name__}")
+
+        # Miniaturas das imagens
+        post_save.connect(generate_image_variants, sender=SupplyImage, dispatch_uid="supplies_image_variants_save")
+        post_delete.connect(delete_image_variants, sender=SupplyImage, dispatch_uid="supplies_image_variants_delete")
+
+        # Ponteiro de capa do dono (cover_image)
+        post_save.connect(refresh_cover_image, sender=SupplyImage, dispatch_uid="supplies_cover_image_save")
+        post_delete.connect(refresh_cover_image, sender=SupplyImage, dispatch_uid="supplies_cover_image_delete")
+
+        # Facetas de tags (contagens por filtro em cache)
+        for model in (SupplyItem, SupplyProductTag):
+            post_save.connect(invalidate_tag_facets, sender=model, dispatch_uid=f"supplies_tag_facets_save_{model.__name__}")
+            post_delete.connect(invalidate_tag_facets, sender=model, dispatch_uid=f"supplies_tag_facets_delete_{model.__name__}")
+        m2m_changed.connect(invalidate_tag_facets, sender=SupplyItem.tags.through, dispatch_uid="supplies_tag_facets_m2m")
+
+        # Exportação incremental: alterações nos filhos atualizam o updated_at do insumo
+        for model in (SupplyBatch, SupplyNutritionInfo, SupplyIngredientDetail, SupplyImage):
+            post_save.connect(touch_supply_item, sender=model, dispatch_uid=f"supplies_export_touch_save_{model.__name__}")
+            post_delete.connect(touch_supply_item, sender=model, dispatch_uid=f"supplies_export_touch_delete_{model.__name__}")
+        m2m_changed.connect(touch_tagged_supply_items, sender=SupplyItem.tags.through, dispatch_uid="supplies_export_touch_tags")
+        post_save.connect(touch_supply_items_of_tag, sender=SupplyProductTag, dispatch_uid="supplies_export_touch_tag_save")
+        pre_delete.connect(touch_supply_items_of_tag, sender=SupplyProductTag, dispatch_uid="supplies_export_touch_tag_delete")
@@ -1,10 +1,11 @@
 # supplies/dashboards/urls.py
 
 from django.urls import path
-from .views import supplies_dashboard
+from .views import supplies_dashboard, supplies_timeline_data
 
 app_name = "supplies_dashboard"
 
 urlpatterns = [
     path("admin/supplies/dashboard/", supplies_dashboard, name="dashboard"),
+    path("admin/supplies/dashboard/timeline/", supplies_timeline_data, name="timeline"),
 ]
@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand
+from cakes.models import CakeImage
+from commons.images import generate_variants
+from supplies.models import SupplyImage
+
+MODELS = {"supplies": SupplyImage, "cakes": CakeImage}
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as versões reduzidas (thumb, medium, large em WebP e JPEG) das imagens de "
+        "insumos e bolos já gravadas em media/. Só cria as que faltam, salvo com --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", choices=list(MODELS), help="Padrão: todos.")
+        parser.add_argument("--force", action="store_true", help="Regera mesmo os derivados existentes.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        names = [options["model"]] if options["model"] else list(MODELS)
+        images = files = 0
+        for name in names:
+            queryset = MODELS[name].objects.exclude(image="").exclude(image__isnull=True).only("id", "image")
+            for image in queryset.iterator(chunk_size=500):
+                written = generate_variants(image.image, force=options["force"])
+                images += 1
+                files += written
+                if options["verbosity"] > 1 and written:
+                    self.stdout.write(f"{image.image.name}: {written} arquivo(s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {images} imagens verificadas, {files} derivados gerados em {time.monotonic() - started:.1f}s."
+        ))
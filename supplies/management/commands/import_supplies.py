@@ -0,0 +1,84 @@
+import csv
+import json
+import time
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from supplies.services.importer import (
+    ImportValidationError, IMPORT_CHUNK_SIZE, import_supplies, row_from_flat
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa insumos (com lote opcional) de um arquivo CSV ou NDJSON em blocos; "
+        "cada bloco é gravado em uma transação com bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Arquivo .csv ou .ndjson/.jsonl")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Padrão: pela extensão do arquivo.")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument("--location", help="ID do local de estoque para as entradas dos lotes.")
+        parser.add_argument("--delimiter", default=",", help="Separador do CSV.")
+        parser.add_argument(
+            "--strict", action="store_true",
+            help="Interrompe no primeiro bloco com linhas inválidas (padrão: importa as válidas e lista os erros).",
+        )
+
+    def _records(self, handle, file_format, delimiter):
+        if file_format == "csv":
+            yield from csv.DictReader(handle, delimiter=delimiter)
+            return
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                raise CommandError(f"Linha {line_number}: JSON inválido.")
+            if not isinstance(record, dict):
+                raise CommandError(f"Linha {line_number}: cada linha deve ser um objeto JSON.")
+            yield record
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        path = options["path"]
+        file_format = options["format"] or ("csv" if path.lower().endswith(".csv") else "ndjson")
+        chunk_size = max(1, options["chunk_size"])
+        totals = {"created": 0, "batches": 0, "stock_entries": 0, "invalid": 0}
+
+        try:
+            handle = open(path, newline="", encoding="utf-8-sig")
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with handle:
+            records = self._records(handle, file_format, options["delimiter"])
+            offset = 0
+            while True:
+                chunk = [row_from_flat(record) for record in islice(records, chunk_size)]
+                if not chunk:
+                    break
+                try:
+                    result = import_supplies(chunk, location_id=options["location"], skip_invalid=not options["strict"])
+                except ImportValidationError as exc:
+                    self._report(exc.errors, offset)
+                    raise CommandError(f"Importação interrompida: {exc}")
+
+                self._report(result["errors"], offset)
+                for key in ("created", "batches", "stock_entries"):
+                    totals[key] += result[key]
+                totals["invalid"] += len(result["errors"])
+                offset += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {totals['created']} insumos, {totals['batches']} lotes e {totals['stock_entries']} entradas de estoque "
+            f"importados em {time.monotonic() - started:.1f}s ({totals['invalid']} linha(s) inválida(s))."
+        ))
+
+    def _report(self, errors, offset):
+        for error in errors:
+            # Linha do arquivo (1 = primeiro registro, sem contar o cabeçalho do CSV)
+            line = "-" if error["index"] is None else offset + error["index"] + 1
+            details = "; ".join(f"{field}: {message}" for field, message in error["errors"].items())
+            self.stderr.write(f"Linha {line}: {details}")
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from supplies.models import SupplyItem
+from supplies.services.search import refresh_search_vectors, REFRESH_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Recalcula o índice de busca textual dos insumos (ex.: após cargas com bulk_create)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=REFRESH_CHUNK_SIZE)
+        parser.add_argument("--only-missing", action="store_true", help="Só insumos sem índice.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        queryset = SupplyItem.objects.all()
+        if options["only_missing"]:
+            queryset = queryset.filter(search_vector__isnull=True)
+        total = refresh_search_vectors(queryset, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} insumos reindexados em {time.monotonic() - started:.1f}s."
+        ))
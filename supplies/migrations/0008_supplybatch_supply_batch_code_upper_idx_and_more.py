@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:25
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplies', '0007_supplybatch_is_active'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supplybatch',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('batch_code'), name='text_pattern_ops'), name='supply_batch_code_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supplyitem',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='supply_item_name_upper_idx'),
+        ),
+    ]
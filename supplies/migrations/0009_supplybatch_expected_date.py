@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplies', '0008_supplybatch_supply_batch_code_upper_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplybatch',
+            name='expected_date',
+            field=models.DateField(blank=True, help_text='Para lotes ainda não lançados no estoque: data prevista de chegada (usada na projeção de estoque).', null=True, verbose_name='Previsão de entrada'),
+        ),
+    ]
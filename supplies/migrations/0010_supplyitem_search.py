@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:54
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+import django.db.models.functions.text
+import supplies.models
+from django.db import migrations
+
+
+# unaccent() é STABLE (depende do dicionário); o wrapper IMMUTABLE com o dicionário
+# fixo permite indexar a expressão (ver supplies.models.ImmutableUnaccent)
+UNACCENT_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION supply_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+"""
+
+# Preenche o documento de busca dos insumos já existentes
+# (mesma composição de supplies.models.supply_search_vector)
+BACKFILL_SQL = """
+UPDATE supplies_supplyitem
+SET search_vector =
+    setweight(to_tsvector('simple', COALESCE(supply_unaccent(name), '')), 'A')
+    || setweight(to_tsvector('simple', COALESCE(sku, '')), 'A')
+    || setweight(to_tsvector('simple', COALESCE(barcode, '')), 'A')
+    || setweight(to_tsvector('simple', COALESCE(supply_unaccent(description), '')), 'C');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplies', '0009_supplybatch_expected_date'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.UnaccentExtension(),
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.RunSQL(UNACCENT_FUNCTION_SQL, reverse_sql="DROP FUNCTION IF EXISTS supply_unaccent(text);"),
+        migrations.AddField(
+            model_name='supplyitem',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='supplyitem',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='supply_item_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supplyitem',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower(supplies.models.ImmutableUnaccent('name')), name='gin_trgm_ops'), name='supply_item_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supplyitem',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['sku'], name='supply_item_sku_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplies', '0010_supplyitem_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supplyitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['name', 'id'], name='supply_item_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supplyitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['updated_at', 'id'], name='supply_item_active_updated_idx'),
+        ),
+    ]
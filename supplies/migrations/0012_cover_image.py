@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def keep_single_cover(apps, schema_editor):
+    """Antes da restrição: donos com várias capas ficam só com a mais recente."""
+    SupplyImage = apps.get_model("supplies", "SupplyImage")
+    repeated = (
+        SupplyImage.objects.filter(is_cover=True)
+        .values("supply_item_id").annotate(total=Count("id")).filter(total__gt=1)
+        .values_list("supply_item_id", flat=True)
+    )
+    for owner_id in repeated:
+        covers = SupplyImage.objects.filter(supply_item_id=owner_id, is_cover=True).order_by("-pk")
+        SupplyImage.objects.filter(pk__in=list(covers.values_list("pk", flat=True)[1:])).update(is_cover=False)
+
+
+def fill_cover_image(apps, schema_editor):
+    SupplyItem = apps.get_model("supplies", "SupplyItem")
+    SupplyImage = apps.get_model("supplies", "SupplyImage")
+    SupplyItem.objects.update(cover_image_id=Subquery(
+        SupplyImage.objects.filter(supply_item_id=OuterRef("pk")).order_by("-is_cover", "pk").values("pk")[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplies', '0011_supplyitem_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_single_cover, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='supplyimage',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_cover', True)), fields=('supply_item',), name='supply_image_single_cover'),
+        ),
+        migrations.AddField(
+            model_name='supplyitem',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='supplies.supplyimage', verbose_name='Imagem de capa'),
+        ),
+        migrations.RunPython(fill_cover_image, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:14
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplies', '0012_cover_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplyitem',
+            name='density_g_per_ml',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text='Permite converter entre massa e volume (ex.: leite ≈ 1,03).', max_digits=8, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.0001'))], verbose_name='Densidade (g/ml)'),
+        ),
+        migrations.AddField(
+            model_name='supplyitem',
+            name='unit_weight_g',
+            field=models.DecimalField(blank=True, decimal_places=3, help_text='Permite converter unidades em massa (ex.: 1 ovo ≈ 50 g).', max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.001'))], verbose_name='Peso da unidade (g)'),
+        ),
+    ]
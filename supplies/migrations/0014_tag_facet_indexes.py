@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:18
+
+from django.db import migrations, models
+
+
+# A tabela de ligação de SupplyItem.tags é criada pelo Django (sem Meta): o índice
+# (tag, item) permite filtrar por tag e contar itens só pelo índice (index-only scan)
+TAG_ITEM_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS supply_item_tags_tag_item_idx
+ON supplies_supplyitem_tags (supplyproducttag_id, supplyitem_id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplies', '0013_unit_conversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supplyproducttag',
+            index=models.Index(fields=['tag_type', 'name'], name='supply_tag_type_name_idx'),
+        ),
+        migrations.RunSQL(TAG_ITEM_INDEX_SQL, reverse_sql="DROP INDEX IF EXISTS supply_item_tags_tag_item_idx;"),
+    ]
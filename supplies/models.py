@@ -1,9 +1,14 @@
 import uuid
+from decimal import Decimal
 from django.db import models
+from django.core.validators import MinValueValidator
 from commons.enums import UnitOfMeasureEnum, get_unit_description
+from commons.images import FALLBACK_IMAGE_URL, VARIANTS, variant_url
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
-from django.db.models.functions import Now
+from django.db.models.functions import Lower, Now, Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 
 # ------------------------------
 # Categorias de Suprimentos
@@ -92,10 +97,51 @@ class SupplyProductTag(models.Model):
         verbose_name_plural = "Tags de Produtos"
         unique_together = ("name", "tag_type")
         ordering = ["tag_type", "name"]
+        indexes = [
+            # Filtro e facetas por tipo de tag
+            models.Index(fields=["tag_type", "name"], name="supply_tag_type_name_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_tag_type_display()})"
 
+# ------------------------------
+# Busca textual
+# ------------------------------
+SEARCH_CONFIG = "simple"
+
+
+class ImmutableUnaccent(models.Func):
+    """
+    supply_unaccent(): unaccent() marcado como IMMUTABLE (criado na migração
+    0010_supplyitem_search), o que permite usá-lo em índices.
+    """
+    function = "supply_unaccent"
+    output_field = models.TextField()
+
+
+def search_text(expression):
+    """Texto sem acentos e em minúsculas; mesma expressão dos índices de trigramas."""
+    return Lower(ImmutableUnaccent(expression))
+
+
+SEARCH_SOURCE_FIELDS = ("name", "sku", "barcode", "description")
+
+
+def supply_search_vector(name="name", sku="sku", barcode="barcode", description="description"):
+    """
+    Documento de busca do insumo: nome, SKU e código de barras (peso A) e descrição (C),
+    sem acentos. Por padrão lê as colunas (atualizações em massa); save() passa os valores
+    da instância, para gravar o documento no mesmo INSERT/UPDATE.
+    """
+    return (
+        SearchVector(ImmutableUnaccent(name), weight="A", config=SEARCH_CONFIG)
+        + SearchVector(sku, weight="A", config=SEARCH_CONFIG)
+        + SearchVector(barcode, weight="A", config=SEARCH_CONFIG)
+        + SearchVector(ImmutableUnaccent(description), weight="C", config=SEARCH_CONFIG)
+    )
+
+
 # ------------------------------
 # Item de Suprimento
 # ------------------------------
@@ -111,6 +157,17 @@ class SupplyItem(models.Model):
         max_length=16,
         choices=UnitOfMeasureEnum.choices
     )
+    # Conversões entre dimensões (commons.units): massa ↔ volume e unidade ↔ massa
+    density_g_per_ml = models.DecimalField(
+        "Densidade (g/ml)", max_digits=8, decimal_places=4, null=True, blank=True,
+        validators=[MinValueValidator(Decimal("0.0001"))],
+        help_text="Permite converter entre massa e volume (ex.: leite ≈ 1,03).",
+    )
+    unit_weight_g = models.DecimalField(
+        "Peso da unidade (g)", max_digits=10, decimal_places=3, null=True, blank=True,
+        validators=[MinValueValidator(Decimal("0.001"))],
+        help_text="Permite converter unidades em massa (ex.: 1 ovo ≈ 50 g).",
+    )
 
     category = models.CharField("Categoria", max_length=32, choices=SupplyCategory.choices)
     origin_country = models.CharField("País de origem", max_length=64, blank=True)
@@ -127,6 +184,13 @@ class SupplyItem(models.Model):
     tags = models.ManyToManyField(SupplyProductTag, related_name="supply_items", blank=True)
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
     updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+    # Mantido por save(); cargas em massa chamam supplies.services.search.refresh_search_vectors
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Capa (ou, sem capa marcada, a primeira imagem); mantida pelos receivers de SupplyImage
+    cover_image = models.ForeignKey(
+        "SupplyImage", on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="+", editable=False, verbose_name="Imagem de capa",
+    )
 
     # ----------- Funções auxiliares -----------
 
@@ -148,19 +212,19 @@ class SupplyItem(models.Model):
 
     @property
     def image_url(self):
-        cover = self.images.filter(is_cover=True).first()
-        return cover.image.url if cover and cover.image else "/static/img/no-image.png"
+        cover = self.cover_image
+        return cover.image.url if cover and cover.image else FALLBACK_IMAGE_URL
 
     def get_tag_names(self, tag_type=None):
-        """Retorna nomes de tags, opcionalmente filtrando por tipo."""
-        tags = self.tags.all()
-        if tag_type:
-            tags = tags.filter(tag_type=tag_type)
-        return [tag.name for tag in tags]
+        """
+        Retorna nomes de tags, opcionalmente filtrando por tipo.
+        Filtra em memória para aproveitar o prefetch_related("tags") das listagens.
+        """
+        return [tag.name for tag in self.tags.all() if not tag_type or tag.tag_type == tag_type]
 
     def main_image(self):
-        """Retorna a imagem de capa, se houver."""
-        return self.images.filter(is_cover=True).first()
+        """Retorna a imagem de capa, se houver (use select_related("cover_image") em listas)."""
+        return self.cover_image
 
     def has_expiration(self):
         return self.batches.filter(expiration_date__isnull=False).exists()
@@ -169,8 +233,8 @@ class SupplyItem(models.Model):
         """
         Retorna a data de vencimento mais próxima (passada ou futura), considerando todos os lotes.
         """
-        lotes = self.batches.filter(expiration_date__isnull=False).order_by('expiration_date')
-        return lotes.first().expiration_date if lotes.exists() else None
+        return self.batches.aggregate(next_expiration=models.Min("expiration_date"))["next_expiration"]
+
     def next_valid_expiration(self):
         """
         Opcional: retorna a próxima data futura de vencimento, ignorando lotes vencidos.
@@ -194,6 +258,15 @@ class SupplyItem(models.Model):
 
     def save(self, *args, **kwargs):
         self.sku = self.sku.strip().upper().replace(" ", "")
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or set(update_fields) & set(SEARCH_SOURCE_FIELDS):
+            # Expressão só com valores (sem colunas): vale no INSERT e no UPDATE do próprio save()
+            self.search_vector = supply_search_vector(*(
+                models.Value(getattr(self, field) or "", output_field=models.TextField())
+                for field in SEARCH_SOURCE_FIELDS
+            ))
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "search_vector"}
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -201,20 +274,16 @@ class SupplyItem(models.Model):
 
     @property
     def has_image(self) -> bool:
-        cover = self.images.filter(is_cover=True).first()
-        if not cover:
-            cover = self.images.first()
+        cover = self.cover_image
         return bool(cover and cover.image and hasattr(cover.image, "url"))
 
 
     def render_image_thumb(self):
-        cover = self.images.filter(is_cover=True).first()
-        if not cover:
-            cover = self.images.first()
+        cover = self.cover_image
         if cover and cover.image:
             return format_html(
                 '<img src="{}" style="height:40px;border-radius:6px;">',
-                cover.image.url
+                variant_url(cover.image, "thumb")
             )
         return format_html('<span style="opacity: 0.6;">Sem imagem</span>')
 
@@ -224,6 +293,17 @@ class SupplyItem(models.Model):
         verbose_name = "Item de Suprimento"
         verbose_name_plural = "Itens de Suprimentos"
         ordering = ["name"]
+        indexes = [
+            # 🔎 Busca por prefixo sem diferenciar maiúsculas (istartswith)
+            models.Index(OpClass(Upper("name"), name="text_pattern_ops"), name="supply_item_name_upper_idx"),
+            # 🔎 Busca sem acentos: full-text (nome, SKU, código de barras, descrição) e trigramas para erros de digitação
+            GinIndex(fields=["search_vector"], name="supply_item_search_idx"),
+            GinIndex(OpClass(search_text("name"), name="gin_trgm_ops"), name="supply_item_name_trgm_idx"),
+            GinIndex(fields=["sku"], opclasses=["gin_trgm_ops"], name="supply_item_sku_trgm_idx"),
+            # 📄 Chaves da paginação por cursor da listagem (só itens ativos)
+            models.Index(fields=["name", "id"], name="supply_item_active_name_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["updated_at", "id"], name="supply_item_active_updated_idx", condition=models.Q(is_active=True)),
+        ]
 
 
 # ------------------------------
@@ -239,6 +319,10 @@ class SupplyBatch(models.Model):
     batch_code = models.CharField("Código do lote", max_length=64)
     expiration_date = models.DateField("Data de validade")
     quantity = models.DecimalField("Quantidade", max_digits=10, decimal_places=2)
+    expected_date = models.DateField(
+        "Previsão de entrada", null=True, blank=True,
+        help_text="Para lotes ainda não lançados no estoque: data prevista de chegada (usada na projeção de estoque)."
+    )
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
 
     # ✅ Campo que indica se já foi lançado no estoque
@@ -262,6 +346,9 @@ class SupplyBatch(models.Model):
         verbose_name_plural = "Lotes de Suprimentos"
         ordering = ["-expiration_date"]
         unique_together = ("supply_item", "batch_code")
+        indexes = [
+            models.Index(OpClass(Upper("batch_code"), name="text_pattern_ops"), name="supply_batch_code_upper_idx"),
+        ]
 
 class ImageType(models.TextChoices):
     PRINCIPAL = 'principal', _('Principal')
@@ -284,10 +371,18 @@ class SupplyImage(models.Model):
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
     updated_at = models.DateTimeField("Atualizado em", auto_now=True)
 
+    # Campo que aponta para o dono da capa (ver commons.images.refresh_cover_image)
+    cover_owner_field = "supply_item"
+
     class Meta:
         verbose_name = "Imagem de Suprimento"
         verbose_name_plural = "Imagens de Suprimento"
         ordering = ["-is_cover", "image_type"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["supply_item"], condition=models.Q(is_cover=True), name="supply_image_single_cover",
+            ),
+        ]
 
     def __str__(self):
         tipo = self.get_image_type_display()
@@ -302,13 +397,17 @@ class SupplyImage(models.Model):
         super().save(*args, **kwargs)
 
     def get_image_url(self) -> str:
-        return self.image.url if self.has_image() else "/static/img/no-image.png"
+        return self.image.url if self.has_image() else FALLBACK_IMAGE_URL
+
+    def get_variant_url(self, variant="thumb") -> str:
+        """URL da versão reduzida (ver commons.images); sem imagem, o placeholder."""
+        return variant_url(self.image, variant) if self.has_image() else FALLBACK_IMAGE_URL
 
     def render_image_thumb(self, width=80) -> str:
         if self.has_image():
             return format_html(
                 '<img src="{}" width="{}" style="object-fit:cover; border-radius:4px; border:1px solid #ccc;" />',
-                self.get_image_url(), width
+                self.get_variant_url("thumb" if width <= VARIANTS["thumb"] else "medium"), width
             )
         return format_html('<span style="opacity: 0.5;">Sem imagem</span>')
 
@@ -317,10 +416,10 @@ class SupplyImage(models.Model):
             return format_html(
                 '''
                 <a href="{0}" target="_blank">
-                    <img src="{0}" width="{1}" style="border-radius: 8px; border: 1px solid #ccc;" />
+                    <img src="{1}" width="{2}" style="border-radius: 8px; border: 1px solid #ccc;" />
                 </a>
                 ''',
-                self.get_image_url(), width
+                self.get_image_url(), self.get_variant_url("medium"), width
             )
 
 class SupplyNutritionInfo(models.Model):
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from supplies.models import SupplyItem, SupplyBatch, SupplyNutritionInfo, SupplyIngredientDetail, SupplyProductTag
 from commons import UnitOfMeasureEnum, get_unit_description
+from commons.images import variant_urls
 
 
 
@@ -53,7 +54,6 @@ class SupplyIngredientDetailSerializer(serializers.ModelSerializer):
             "contains_gluten", "gluten_status",
             "is_vegan", "vegan_status",
             "warnings", "has_warnings",
-            "created_at"
         ]
 
     # ---------------------
@@ -96,12 +96,14 @@ class SupplyBatchSerializer(serializers.ModelSerializer):
         model = SupplyBatch
         fields = [
             "id", "batch_code", "expiration_date",
-            "quantity", "created_at"
+            "quantity", "expected_date", "created_at"
         ]
         read_only_fields = ["id", "created_at"]
 
 
 class SupplyItemSerializer(serializers.ModelSerializer):
+    image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     unit_of_measure_display = serializers.SerializerMethodField()
     unit_description = serializers.SerializerMethodField()
     category_display = serializers.SerializerMethodField()
@@ -114,8 +116,9 @@ class SupplyItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = SupplyItem
         fields = [
-            "id", "sku", "name", "description", "image", "barcode",
+            "id", "sku", "name", "description", "image", "image_variants", "barcode",
             "unit_of_measure", "unit_of_measure_display", "unit_description",
+            "density_g_per_ml", "unit_weight_g",
             "category", "category_display", "category_purpose",
             "origin_country", "expiration_control", "batch_control",
             "regulatory_code", "is_ingredient", "tags",
@@ -124,6 +127,14 @@ class SupplyItemSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
 
+    def get_image(self, obj):
+        # Capa por JOIN em supply_item_queryset()
+        return obj.image_url
+
+    def get_image_variants(self, obj):
+        cover = obj.cover_image
+        return variant_urls(cover.image, self.context.get("request")) if cover else None
+
     def get_category_display(self, obj):
         return obj.get_category_display()
 
@@ -147,16 +158,6 @@ class SupplyItemSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("O SKU deve conter apenas letras e números.")
         return value
 
-class BulkSupplyItemWithBatchSerializer(serializers.ListSerializer):
-    def create(self, validated_data):
-        created_items = []
-        for item_data in validated_data:
-            serializer = self.child.__class__(data=item_data, context=self.context)
-            serializer.is_valid(raise_exception=True)
-            created_items.append(serializer.save())
-        return created_items
-
-
 class SupplyItemWithBatchSerializer(serializers.Serializer):
     supply_item = SupplyItemSerializer()
     supply_batch = SupplyBatchSerializer(required=False)
@@ -178,9 +179,6 @@ class SupplyItemWithBatchSerializer(serializers.Serializer):
 
         return item
 
-    class Meta:
-        list_serializer_class = BulkSupplyItemWithBatchSerializer
-
 
 
 
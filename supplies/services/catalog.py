@@ -0,0 +1,49 @@
+# supplies/services/catalog.py
+
+from supplies.models import SupplyItem
+from supplies.services.search import search_supplies_queryset
+from supplies.services.tags import filter_by_tags, parse_tag_ids, parse_tag_types
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+
+def supply_item_queryset(active_only=True):
+    """
+    Queryset de SupplyItem com tudo o que o SupplyItemSerializer lê:
+    um-para-um (nutrição, ingredientes) e capa por JOIN, lotes e tags por prefetch.
+    O número de consultas fica fixo, independente da quantidade de itens na página.
+    Ao adicionar um campo aninhado no serializer, inclua o carregamento aqui.
+    """
+    queryset = SupplyItem.objects.all()
+    if active_only:
+        queryset = queryset.filter(is_active=True)
+    return queryset.select_related("nutrition_info", "ingredient_detail", "cover_image").prefetch_related(
+        "batches",
+        "tags",
+    )
+
+
+def filter_supply_items(queryset, params):
+    """
+    Aplica os filtros da listagem (q/name, sku, category, tags, tag_match, tag_type) e
+    devolve (queryset, filtros normalizados) — a listagem e as facetas usam os mesmos.
+    Levanta TagFilterError com parâmetros de tag inválidos.
+    """
+    filters = {
+        "q": (params.get("q") or params.get("name") or "").strip(),
+        "sku": (params.get("sku") or "").strip().upper().replace(" ", ""),
+        "category": params.get("category") or "",
+        "tags": parse_tag_ids(params.get("tags")),
+        "tag_match": params.get("tag_match") or "all",
+        "tag_type": parse_tag_types(params.get("tag_type")),
+    }
+    if filters["q"]:
+        queryset = search_supplies_queryset(queryset, filters["q"])
+    if filters["sku"]:
+        # SKU é gravado normalizado; o índice de trigramas atende o LIKE '%...%'
+        queryset = queryset.filter(sku__contains=filters["sku"])
+    if filters["category"]:
+        queryset = queryset.filter(category=filters["category"])
+    queryset = filter_by_tags(queryset, filters["tags"], filters["tag_match"], filters["tag_type"])
+    return queryset, filters
@@ -0,0 +1,189 @@
+# supplies/services/dashboard.py
+
+from datetime import date, timedelta
+from django.core.cache import cache
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from django.utils.dateformat import format as date_format
+from supplies.models import SupplyBatch, SupplyCategory, SupplyItem
+
+SNAPSHOT_CACHE_KEY = "supplies:dashboard:snapshot:{version}:{day}"
+TIMELINE_CACHE_KEY = "supplies:dashboard:timeline:{version}:{day}:{granularity}:{start}:{end}"
+VERSION_CACHE_KEY = "supplies:dashboard:version"
+# Cargas em massa (bulk_create/update) não disparam sinais: o TTL curto cobre esses casos
+SNAPSHOT_TTL = 300
+EXPIRING_DAYS = 7
+
+# Linha do tempo: janela padrão em torno de hoje e limite de pontos por granularidade
+GRANULARITIES = ("day", "week", "month")
+TIMELINE_DAYS_BEFORE = 30
+TIMELINE_DAYS_AFTER = 90
+MAX_TIMELINE_BUCKETS = 400
+REFERENCE_DAYS = {"today": 0, "minus7": 7, "minus15": 15}
+
+
+class TimelineError(ValueError):
+    pass
+
+
+def _metrics(today):
+    """
+    Todos os indicadores em uma consulta: itens LEFT JOIN lotes com agregação condicional.
+    Contagens de itens usam DISTINCT (o JOIN repete o item por lote); as de lotes contam
+    a chave do lote, que é nula para itens sem lote.
+    """
+    yesterday = today - timedelta(days=1)
+    soon = today + timedelta(days=EXPIRING_DAYS)
+
+    def items(condition=Q()):
+        return Count("id", filter=condition, distinct=True)
+
+    def batches(condition):
+        return Count("batches__id", filter=condition)
+
+    categories = {f"category:{value}": items(Q(category=value)) for value in SupplyCategory.values}
+    row = SupplyItem.objects.aggregate(
+        total_items=items(),
+        total_active=items(Q(is_active=True)),
+        total_items_yesterday=items(Q(created_at__date__lt=today)),
+        total_active_yesterday=items(Q(is_active=True, created_at__date__lt=today)),
+        total_expired=batches(Q(batches__expiration_date__lt=today)),
+        expiring_soon=batches(Q(batches__expiration_date__range=(today, soon))),
+        total_valid=batches(Q(batches__expiration_date__gte=soon)),
+        total_expired_yesterday=batches(Q(batches__expiration_date__lt=yesterday)),
+        expiring_soon_yesterday=batches(Q(batches__expiration_date__range=(yesterday, soon - timedelta(days=1)))),
+        **categories,
+    )
+    counts = sorted(
+        ((value, row.pop(f"category:{value}")) for value in SupplyCategory.values),
+        key=lambda pair: -pair[1],
+    )
+    row["categories"] = [(SupplyCategory(value).label, count) for value, count in counts if count]
+    return row
+
+
+def bucket_start(day, granularity):
+    """Início do período que contém `day` — o mesmo corte do date_trunc do PostgreSQL."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, granularity):
+    if granularity == "week":
+        return day + timedelta(days=7)
+    if granularity == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def _bucket_label(day, granularity):
+    return date_format(day, "M Y") if granularity == "month" else date_format(day, "d M Y")
+
+
+def _bucket_color(start, end, today):
+    if end < today:
+        return "#e74a3b"
+    if start <= today + timedelta(days=EXPIRING_DAYS):
+        return "#f6c23e"
+    return "#155724"
+
+
+def expiration_timeline(granularity="day", start=None, end=None, today=None) -> dict:
+    """
+    Lotes por período de validade (dia, semana ou mês) dentro de [start, end], agregados
+    no banco com date_trunc. Períodos sem lotes entram com zero para o eixo ficar contínuo.
+    Em cache até a próxima alteração de itens/lotes, como o snapshot do painel.
+    """
+    if granularity not in GRANULARITIES:
+        raise TimelineError(f"Granularidade inválida. Use: {', '.join(GRANULARITIES)}.")
+    today = today or timezone.localdate()
+    start = start or today - timedelta(days=TIMELINE_DAYS_BEFORE)
+    end = end or today + timedelta(days=TIMELINE_DAYS_AFTER)
+    if start > end:
+        raise TimelineError("A data inicial deve ser anterior à final.")
+
+    first = bucket_start(start, granularity)
+    buckets = [first]
+    while next_bucket(buckets[-1], granularity) <= end:
+        buckets.append(next_bucket(buckets[-1], granularity))
+        if len(buckets) > MAX_TIMELINE_BUCKETS:
+            raise TimelineError(f"Janela grande demais: máximo de {MAX_TIMELINE_BUCKETS} pontos; use uma granularidade maior.")
+
+    version = cache.get_or_set(VERSION_CACHE_KEY, 1, timeout=None)
+    key = TIMELINE_CACHE_KEY.format(
+        version=version, day=today.isoformat(), granularity=granularity, start=start.isoformat(), end=end.isoformat(),
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    totals = {
+        row["bucket"]: row
+        for row in SupplyBatch.objects.filter(expiration_date__range=(start, end))
+        .annotate(bucket=Trunc("expiration_date", granularity, output_field=DateField()))
+        .values("bucket")
+        .annotate(count=Count("id"), quantity=Sum("quantity"))
+        .order_by("bucket")
+    }
+
+    points = []
+    for bucket in buckets:
+        row = totals.get(bucket)
+        points.append({
+            "start": bucket.isoformat(),
+            "label": _bucket_label(bucket, granularity),
+            "count": row["count"] if row else 0,
+            "quantity": float(row["quantity"] or 0) if row else 0.0,
+            "color": _bucket_color(bucket, next_bucket(bucket, granularity) - timedelta(days=1), today)
+            if row else "#dee2e6",
+        })
+
+    markers = {}
+    for name, days in REFERENCE_DAYS.items():
+        reference = today - timedelta(days=days)
+        if start <= reference <= end:
+            markers[name] = _bucket_label(bucket_start(reference, granularity), granularity)
+
+    timeline = {
+        "today": today.isoformat(),
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "buckets": points,
+        "markers": markers,
+    }
+    cache.set(key, timeline, timeout=SNAPSHOT_TTL)
+    return timeline
+
+
+def parse_day(value, field):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise TimelineError(f"`{field}` deve estar no formato AAAA-MM-DD.")
+
+
+def dashboard_snapshot(today=None) -> dict:
+    """Indicadores do painel de insumos, em cache até a próxima alteração."""
+    today = today or timezone.localdate()
+    version = cache.get_or_set(VERSION_CACHE_KEY, 1, timeout=None)
+    key = SNAPSHOT_CACHE_KEY.format(version=version, day=today.isoformat())
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = _metrics(today)
+        cache.set(key, snapshot, timeout=SNAPSHOT_TTL)
+    return snapshot
+
+
+def invalidate_dashboard(sender=None, **kwargs):
+    """Receiver de post_save/post_delete de SupplyItem e SupplyBatch."""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 2, timeout=None)
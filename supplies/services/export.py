@@ -0,0 +1,115 @@
+# supplies/services/export.py
+
+from django.db.models import Prefetch
+from commons.export import EXPORT_CHUNK_SIZE, touch_updated_at
+from supplies.models import SupplyBatch, SupplyItem
+
+NUTRITION_FIELDS = [
+    "serving_size", "calories", "protein", "fat", "saturated_fat", "trans_fat",
+    "carbohydrates", "sugars", "fiber", "sodium",
+]
+INGREDIENT_FIELDS = ["ingredient_list", "contains_gluten", "is_vegan", "warnings"]
+
+SUPPLY_COLUMNS = [
+    "id", "sku", "name", "description", "barcode", "unit_of_measure", "density_g_per_ml", "unit_weight_g",
+    "category", "origin_country", "regulatory_code", "expiration_control", "batch_control",
+    "is_ingredient", "is_active", "image", "created_at", "updated_at", "tags",
+    *[f"nutrition_info.{field}" for field in NUTRITION_FIELDS],
+    *[f"ingredient_detail.{field}" for field in INGREDIENT_FIELDS],
+    "batches",
+]
+
+
+def supply_export_queryset(since=None):
+    """
+    Catálogo completo (ativos e inativos) em ordem estável. Com `since`, só os itens
+    alterados desde então — lotes, nutrição, ingredientes, imagens e tags atualizam o
+    `updated_at` do item (receivers abaixo), então basta filtrar por ele.
+    """
+    queryset = (
+        SupplyItem.objects.select_related("nutrition_info", "ingredient_detail", "cover_image")
+        .prefetch_related(
+            "tags",
+            Prefetch("batches", queryset=SupplyBatch.objects.order_by("expiration_date", "id")),
+        )
+        .order_by("id")
+    )
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    return queryset
+
+
+def _related(item, name, fields):
+    related = getattr(item, name, None)
+    return {field: getattr(related, field) for field in fields} if related else None
+
+
+def supply_record(item, build_url=str) -> dict:
+    return {
+        "id": item.id,
+        "sku": item.sku,
+        "name": item.name,
+        "description": item.description,
+        "barcode": item.barcode,
+        "unit_of_measure": item.unit_of_measure,
+        "density_g_per_ml": item.density_g_per_ml,
+        "unit_weight_g": item.unit_weight_g,
+        "category": item.category,
+        "origin_country": item.origin_country,
+        "regulatory_code": item.regulatory_code,
+        "expiration_control": item.expiration_control,
+        "batch_control": item.batch_control,
+        "is_ingredient": item.is_ingredient,
+        "is_active": item.is_active,
+        "image": build_url(item.cover_image.image.url) if item.cover_image and item.cover_image.image else None,
+        "created_at": item.created_at,
+        "updated_at": item.updated_at,
+        "tags": [f"{tag.tag_type}:{tag.name}" for tag in item.tags.all()],
+        "nutrition_info": _related(item, "nutrition_info", NUTRITION_FIELDS),
+        "ingredient_detail": _related(item, "ingredient_detail", INGREDIENT_FIELDS),
+        "batches": [
+            {
+                "batch_code": batch.batch_code,
+                "expiration_date": batch.expiration_date,
+                "expected_date": batch.expected_date,
+                "quantity": batch.quantity,
+                "is_active": batch.is_active,
+            }
+            for batch in item.batches.all()
+        ],
+    }
+
+
+def iter_supply_records(since=None, chunk_size=EXPORT_CHUNK_SIZE, build_url=str):
+    """
+    Registros do catálogo com memória constante: cursor no servidor (.iterator) e
+    prefetch de lotes e tags a cada bloco de `chunk_size` itens.
+    """
+    for item in supply_export_queryset(since).iterator(chunk_size=chunk_size):
+        yield supply_record(item, build_url)
+
+
+# ---------------------------------------------
+# Receivers: alterações nos filhos marcam o insumo como alterado
+# ---------------------------------------------
+
+def touch_supply_item(sender, instance, **kwargs):
+    """post_save/post_delete de lotes, nutrição, ingredientes e imagens."""
+    touch_updated_at(SupplyItem, [instance.supply_item_id])
+
+
+def touch_tagged_supply_items(sender, instance, action, reverse, pk_set, **kwargs):
+    """m2m_changed de SupplyItem.tags (pelos dois lados da relação)."""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        touch_updated_at(SupplyItem, [instance.pk])
+    elif action == "pre_clear":
+        touch_updated_at(SupplyItem, instance.supply_items.values_list("pk", flat=True))
+    else:
+        touch_updated_at(SupplyItem, pk_set or [])
+
+
+def touch_supply_items_of_tag(sender, instance, **kwargs):
+    """post_save/pre_delete de SupplyProductTag: o nome e o tipo da tag saem na coluna `tags`."""
+    touch_updated_at(SupplyItem, instance.supply_items.values_list("pk", flat=True))
@@ -0,0 +1,309 @@
+# supplies/services/importer.py
+
+import uuid
+from collections import Counter
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history
+from commons import UnitOfMeasureEnum
+from stock.models import StockItem, StockLocation, StockMovement, StockMovementType
+from stock.services.barcode_index import barcode_index
+from stock.services.movement_search import refresh_search_vectors as refresh_movement_search
+from supplies.models import INGREDIENT_CATEGORIES, SupplyBatch, SupplyCategory, SupplyItem
+from supplies.services.dashboard import invalidate_dashboard
+from supplies.services.search import refresh_search_vectors
+
+MAX_API_ROWS = 1000
+IMPORT_CHUNK_SIZE = 2000
+
+TEXT_FIELDS = {
+    "name": 128, "description": None, "barcode": 64, "origin_country": 64, "regulatory_code": 64,
+}
+BOOLEAN_FIELDS = ("expiration_control", "batch_control", "is_ingredient", "is_active")
+BOOLEAN_DEFAULTS = {"is_active": True}
+BATCH_QUANTITY_FIELD = SupplyBatch._meta.get_field("quantity")
+# Fatores de conversão de unidades (opcionais), validados pelas regras do próprio campo
+DECIMAL_FIELDS = {name: SupplyItem._meta.get_field(name) for name in ("density_g_per_ml", "unit_weight_g")}
+
+_TRUE = {"1", "true", "t", "sim", "s", "yes", "y"}
+_FALSE = {"0", "false", "f", "nao", "não", "n", "no", ""}
+
+
+class ImportValidationError(ValueError):
+    """Linhas inválidas: `errors` = [{"index": i, "errors": {campo: mensagem}}]."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} linha(s) inválida(s).")
+        self.errors = errors
+
+
+def normalize_sku(value) -> str:
+    """Mesma normalização de SupplyItem.save()."""
+    return str(value or "").strip().upper().replace(" ", "")
+
+
+def _boolean(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError
+
+
+def _decimal(value, field):
+    """
+    Número no formato do DecimalField `field`: casas decimais arredondadas e dígitos
+    inteiros conferidos (um valor maior estouraria a coluna com DataError).
+    """
+    number = Decimal(str(value).strip().replace(",", "."))
+    if not number.is_finite():
+        raise InvalidOperation
+    limit = Decimal(10) ** (field.max_digits - field.decimal_places)
+    if abs(number) < limit:
+        number = number.quantize(Decimal(1).scaleb(-field.decimal_places))
+    if abs(number) >= limit:
+        raise ValueError(f"Máximo de {field.max_digits - field.decimal_places} dígitos antes da vírgula.")
+    return number
+
+
+def _date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value).strip())
+
+
+def row_from_flat(record) -> dict:
+    """
+    Converte uma linha plana (CSV, NDJSON sem aninhamento) no formato da API:
+    colunas do lote são `batch_code`, `expiration_date`, `expected_date` e
+    `batch_quantity`; as demais pertencem ao insumo.
+    """
+    if "supply_item" in record:
+        return record
+    record = {key: value for key, value in record.items() if key}
+    batch = {
+        "batch_code": record.pop("batch_code", None),
+        "expiration_date": record.pop("expiration_date", None),
+        "expected_date": record.pop("expected_date", None),
+        "quantity": record.pop("batch_quantity", None),
+    }
+    has_batch = any(value not in (None, "") for value in batch.values())
+    return {"supply_item": record, "supply_batch": batch if has_batch else None}
+
+
+def _validate(rows):
+    """
+    Valida todas as linhas em passadas por coluna: normalização, escolhas, duplicidade
+    dentro do envio e uma única consulta `sku IN (...)` contra o cadastro.
+    Retorna (itens, lotes, erros) — listas alinhadas ao índice das linhas.
+    """
+    categories = set(SupplyCategory.values)
+    units = set(UnitOfMeasureEnum.values)
+    items, batches = [], []
+    errors = [{} for _ in rows]
+
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict) or not isinstance(row.get("supply_item"), dict):
+            errors[index]["supply_item"] = "Informe os dados do insumo."
+            items.append(None)
+            batches.append(None)
+            continue
+        data = row["supply_item"]
+        item = {"sku": normalize_sku(data.get("sku"))}
+        for field, max_length in TEXT_FIELDS.items():
+            value = str(data.get(field) or "").strip()
+            if max_length and len(value) > max_length:
+                errors[index][field] = f"Máximo de {max_length} caracteres."
+            item[field] = value
+        item["unit_of_measure"] = str(data.get("unit_of_measure") or "").strip()
+        item["category"] = str(data.get("category") or "").strip()
+        for field in BOOLEAN_FIELDS:
+            try:
+                value = _boolean(data.get(field))
+            except ValueError:
+                errors[index][field] = "Valor booleano inválido."
+                value = None
+            item[field] = BOOLEAN_DEFAULTS.get(field, False) if value is None else value
+        for field, model_field in DECIMAL_FIELDS.items():
+            value = data.get(field)
+            item[field] = None
+            if value in (None, ""):
+                continue
+            try:
+                item[field] = _decimal(value, model_field)
+                model_field.run_validators(item[field])
+            except InvalidOperation:
+                errors[index][field] = "Número inválido."
+            except ValidationError as exc:
+                errors[index][field] = " ".join(exc.messages)
+            except ValueError as exc:
+                errors[index][field] = str(exc)
+        items.append(item)
+
+        batch_data = row.get("supply_batch")
+        batch = None
+        if batch_data and not isinstance(batch_data, dict):
+            errors[index]["supply_batch"] = "Dados do lote inválidos."
+        elif batch_data:
+            batch = {"batch_code": str(batch_data.get("batch_code") or "").strip()}
+            try:
+                batch["quantity"] = _decimal(batch_data.get("quantity"), BATCH_QUANTITY_FIELD)
+                if batch["quantity"] <= 0:
+                    errors[index]["supply_batch.quantity"] = "Quantidade deve ser maior que zero."
+            except InvalidOperation:
+                errors[index]["supply_batch.quantity"] = "Quantidade inválida."
+            except ValueError as exc:
+                errors[index]["supply_batch.quantity"] = str(exc)
+            for field in ("expiration_date", "expected_date"):
+                value = batch_data.get(field)
+                try:
+                    batch[field] = _date(value) if value not in (None, "") else None
+                except ValueError:
+                    errors[index][f"supply_batch.{field}"] = "Data deve estar no formato AAAA-MM-DD."
+            if not batch["batch_code"]:
+                errors[index]["supply_batch.batch_code"] = "Informe o código do lote."
+            if batch.get("expiration_date") is None and "supply_batch.expiration_date" not in errors[index]:
+                errors[index]["supply_batch.expiration_date"] = "Informe a data de validade."
+        batches.append(batch)
+
+    # Regras por coluna
+    for index, item in enumerate(items):
+        if item is None:
+            continue
+        if not item["sku"]:
+            errors[index]["sku"] = "Informe o SKU."
+        elif not item["sku"].isalnum():
+            errors[index]["sku"] = "O SKU deve conter apenas letras e números."
+        elif len(item["sku"]) > 32:
+            errors[index]["sku"] = "Máximo de 32 caracteres."
+        if not item["name"]:
+            errors[index]["name"] = "Informe o nome."
+        if item["unit_of_measure"] not in units:
+            errors[index]["unit_of_measure"] = f"'{item['unit_of_measure']}' não é uma unidade válida."
+        if item["category"] not in categories:
+            errors[index]["category"] = f"'{item['category']}' não é uma categoria válida."
+        elif item["is_ingredient"] and item["category"] not in INGREDIENT_CATEGORIES:
+            errors[index]["category"] = "Categoria incompatível com ingrediente comestível."
+        if item["batch_control"] and batches[index] is None and "supply_batch" not in errors[index]:
+            errors[index]["supply_batch"] = "Lote é obrigatório para itens com controle de lote."
+
+    # Unicidade: repetidos no envio e já cadastrados (uma consulta)
+    skus = [item["sku"] for item in items if item and item["sku"]]
+    repeated = {sku for sku, count in Counter(skus).items() if count > 1}
+    existing = set(SupplyItem.objects.filter(sku__in=set(skus)).values_list("sku", flat=True))
+    for index, item in enumerate(items):
+        if item is None or not item["sku"]:
+            continue
+        if item["sku"] in existing:
+            errors[index]["sku"] = f"SKU {item['sku']} já cadastrado."
+        elif item["sku"] in repeated:
+            errors[index]["sku"] = f"SKU {item['sku']} repetido no envio."
+
+    return items, batches, [
+        {"index": index, "errors": row_errors} for index, row_errors in enumerate(errors) if row_errors
+    ]
+
+
+def _create(items, batches, location):
+    """Grava insumos, lotes e entradas de estoque com bulk_create (sem save()/sinais por linha)."""
+    created_items = SupplyItem.objects.bulk_create([SupplyItem(**item) for item in items])
+
+    today = timezone.localdate()
+    pairs = [(item, batch) for item, batch in zip(created_items, batches) if batch]
+    created_batches = SupplyBatch.objects.bulk_create([
+        SupplyBatch(
+            supply_item=item,
+            batch_code=batch["batch_code"],
+            expiration_date=batch["expiration_date"],
+            expected_date=batch["expected_date"],
+            quantity=batch["quantity"],
+            # Mesmas condições do StockOrchestrator.auto_add_to_stock; lote com chegada futura fica pendente
+            stock_entry_created=bool(
+                location and item.is_active and not (batch["expected_date"] and batch["expected_date"] > today)
+            ),
+        )
+        for item, batch in pairs
+    ])
+
+    to_post = [batch for batch in created_batches if batch.stock_entry_created]
+    stock_items = StockItem.objects.bulk_create([
+        StockItem(
+            supply_item=batch.supply_item,
+            supply_batch=batch,
+            location=location,
+            quantity=batch.quantity,
+            unit_of_measure=batch.supply_item.unit_of_measure,
+        )
+        for batch in to_post
+    ])
+    movements = bulk_create_with_history([
+        StockMovement(
+            stock_item=stock_item,
+            movement_type=StockMovementType.INBOUND,
+            quantity=stock_item.quantity,
+            destination_location=location,
+            reference=f"Lote {batch.batch_code}",
+            notes="Entrada via importação de insumos",
+            before_quantity=Decimal("0.00"),
+            after_quantity=stock_item.quantity,
+        )
+        for batch, stock_item in zip(to_post, stock_items)
+    ], StockMovement)
+
+    # Índices mantidos por save()/sinais, que o bulk_create não dispara
+    refresh_search_vectors(SupplyItem.objects.filter(pk__in=[item.pk for item in created_items]))
+    refresh_movement_search(StockMovement.objects.filter(pk__in=[movement.pk for movement in movements]))
+    transaction.on_commit(barcode_index.invalidate)
+    transaction.on_commit(invalidate_dashboard)
+    return created_items, created_batches, stock_items
+
+
+def import_supplies(rows, location_id=None, skip_invalid=False) -> dict:
+    """
+    Importa insumos (com lote opcional) em uma transação.
+
+    `rows` = [{"supply_item": {...}, "supply_batch": {...} | None}], o mesmo formato de
+    /items/with-batch/. Lotes recebidos entram no estoque no local informado (ou no
+    primeiro local ativo). Com linhas inválidas, levanta ImportValidationError sem gravar
+    nada — ou, com `skip_invalid`, grava as válidas e devolve os erros.
+    """
+    items, batches, errors = _validate(rows)
+    if errors and not skip_invalid:
+        raise ImportValidationError(errors)
+
+    invalid = {error["index"] for error in errors}
+    valid = [index for index, item in enumerate(items) if index not in invalid]
+
+    location_error = {"index": None, "errors": {"location": "Local de estoque não encontrado ou inativo."}}
+    locations = StockLocation.objects.filter(is_active=True)
+    if location_id:
+        try:
+            location_id = uuid.UUID(str(location_id))
+        except ValueError:
+            raise ImportValidationError([location_error])
+    location = locations.filter(pk=location_id).first() if location_id else locations.first()
+    if location_id and location is None:
+        raise ImportValidationError([location_error])
+
+    try:
+        with transaction.atomic():
+            created_items, created_batches, stock_items = _create(
+                [items[index] for index in valid], [batches[index] for index in valid], location
+            )
+    except IntegrityError:
+        # SKU cadastrado por outra importação entre a validação e a gravação
+        raise ImportValidationError([{"index": None, "errors": {
+            "sku": "Um dos SKUs foi cadastrado ao mesmo tempo por outra operação; envie novamente.",
+        }}])
+
+    return {
+        "items": created_items,
+        "created": len(created_items),
+        "batches": len(created_batches),
+        "stock_entries": len(stock_items),
+        "errors": errors,
+    }
@@ -0,0 +1,64 @@
+# supplies/services/nutrition.py
+
+import numpy as np
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from cakes.models import CakeRecipeLine
+from commons.units import convert, parse_quantity
+
+NUTRIENTS = [
+    "calories", "protein", "fat", "saturated_fat", "trans_fat",
+    "carbohydrates", "sugars", "fiber", "sodium",
+]
+
+
+def recipe_nutrition(recipe_ids) -> dict:
+    """
+    Tabela nutricional estimada por bolo de cada ficha técnica, somando a informação
+    nutricional dos insumos (`serving_size` como "100 g" / "200 ml").
+
+    Uma consulta traz todas as linhas; as quantidades são convertidas para a unidade da
+    porção de cada insumo em uma passada e somadas por receita. Retorna
+    {recipe_id: {"per_cake": {nutriente: valor}, "missing": [insumos sem informação]}}.
+    """
+    recipe_ids = list(recipe_ids)
+    rows = list(
+        CakeRecipeLine.objects.filter(recipe_id__in=recipe_ids)
+        .annotate(
+            quantity_float=Cast("quantity", FloatField()),
+            **{f"n_{name}": Cast(f"supply_item__nutrition_info__{name}", FloatField()) for name in NUTRIENTS},
+        )
+        .values_list(
+            "recipe_id", "recipe__yield_quantity", "supply_item__name", "quantity_float", "unit_of_measure",
+            "supply_item__density_g_per_ml", "supply_item__unit_weight_g", "supply_item__nutrition_info__serving_size",
+            *[f"n_{name}" for name in NUTRIENTS],
+        )
+    )
+    result = {recipe_id: {"per_cake": dict.fromkeys(NUTRIENTS, 0.0), "missing": []} for recipe_id in recipe_ids}
+    if not rows:
+        return result
+
+    columns = list(zip(*rows))
+    line_recipes, yields, names, quantities, units, density, unit_weight, servings = columns[:8]
+    values = np.array(columns[8:], dtype=np.float64).T  # linha × nutriente (NaN = não informado)
+
+    # Porção de referência de cada insumo; sem porção reconhecível a linha fica de fora
+    parsed = [parse_quantity(serving) for serving in servings]
+    serving_amount = np.array([serving[0] if serving else np.nan for serving in parsed], dtype=np.float64)
+    serving_units = [serving[1] if serving else unit for serving, unit in zip(parsed, units)]
+
+    portions = convert(quantities, units, serving_units, density, unit_weight) / serving_amount
+    portions /= np.asarray(yields, dtype=np.float64)
+    known = np.isfinite(portions) & (serving_amount > 0)
+
+    position = {recipe_id: code for code, recipe_id in enumerate(recipe_ids)}
+    recipe_codes = np.fromiter((position[recipe_id] for recipe_id in line_recipes), dtype=np.int64, count=len(rows))
+    totals = np.zeros((len(recipe_ids), len(NUTRIENTS)), dtype=np.float64)
+    np.add.at(totals, recipe_codes[known], np.nan_to_num(values[known]) * portions[known, None])
+
+    for code, recipe_id in enumerate(recipe_ids):
+        result[recipe_id]["per_cake"] = {name: round(float(value), 2) for name, value in zip(NUTRIENTS, totals[code])}
+    for line, ok in enumerate(known):
+        if not ok:
+            result[line_recipes[line]]["missing"].append(names[line])
+    return result
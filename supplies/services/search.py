@@ -0,0 +1,73 @@
+# supplies/services/search.py
+
+import re
+import unicodedata
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast, Coalesce
+from supplies.models import SupplyItem, SEARCH_CONFIG, search_text, supply_search_vector
+
+REFRESH_CHUNK_SIZE = 5000
+# Mais relevantes primeiro: casamento full-text, depois semelhança do nome
+RELEVANCE_ORDERING = ["-search_rank", "-search_similarity", "name", "id"]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_term(term) -> str:
+    """Mesma normalização do índice: sem acentos, minúsculas e espaços simples ("Açúcar " → "acucar")."""
+    decomposed = unicodedata.normalize("NFKD", str(term or ""))
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_TOKEN_RE.findall(without_accents.lower()))
+
+
+def build_search_query(normalized):
+    """Todas as palavras precisam aparecer, cada uma como prefixo ("acu ref" casa com "Açúcar Refinado")."""
+    tokens = normalized.split()
+    if not tokens:
+        return None
+    return SearchQuery(" & ".join(f"{token}:*" for token in tokens), search_type="raw", config=SEARCH_CONFIG)
+
+
+def search_supplies_queryset(queryset, term):
+    """
+    Filtra por full-text (nome, SKU, código de barras, descrição) OU por semelhança de
+    trigramas no nome (tolera erros de digitação: "acucr" → "Açúcar") OU por trecho do SKU.
+    Todas as condições usam índices GIN. Anota `search_rank` e `search_similarity` em
+    double precision (nunca nulos), para que sirvam de chave no cursor da paginação.
+    """
+    normalized = normalize_term(term)
+    query = build_search_query(normalized)
+    if query is None:
+        return queryset
+    sku = normalized.upper().replace(" ", "")
+    return (
+        queryset
+        .annotate(search_name=search_text("name"))
+        .filter(Q(search_vector=query) | Q(search_name__trigram_word_similar=normalized) | Q(sku__contains=sku))
+        .annotate(
+            search_rank=Coalesce(Cast(SearchRank(F("search_vector"), query), FloatField()), Value(0.0)),
+            search_similarity=Cast(TrigramWordSimilarity(normalized, "search_name"), FloatField()),
+        )
+    )
+
+
+def order_by_relevance(queryset):
+    """Ordena por RELEVANCE_ORDERING quando o queryset veio de search_supplies_queryset."""
+    if "search_rank" not in queryset.query.annotations:
+        return queryset
+    return queryset.order_by(*RELEVANCE_ORDERING)
+
+
+def refresh_search_vectors(queryset=None, chunk_size=REFRESH_CHUNK_SIZE) -> int:
+    """Recalcula o documento de busca dos insumos em blocos de `chunk_size` ids (ex.: após bulk_create)."""
+    queryset = SupplyItem.objects.all() if queryset is None else queryset
+    ids = queryset.order_by("id").values_list("id", flat=True)
+    updated, last_id = 0, None
+    while True:
+        chunk = ids.filter(id__gt=last_id) if last_id else ids
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return updated
+        updated += SupplyItem.objects.filter(id__in=chunk).update(search_vector=supply_search_vector())
+        last_id = chunk[-1]
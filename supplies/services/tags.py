@@ -0,0 +1,107 @@
+# supplies/services/tags.py
+
+import hashlib
+import json
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef
+from supplies.models import SupplyItem, SupplyProductTagType
+
+TagLink = SupplyItem.tags.through
+
+TAG_MATCHES = ("all", "any")
+FACETS_CACHE_KEY = "supplies:tags:facets:{version}:{signature}"
+FACETS_VERSION_CACHE_KEY = "supplies:tags:version"
+# Cargas em massa não disparam sinais: o TTL curto cobre esses casos
+FACETS_TTL = 300
+
+
+class TagFilterError(ValueError):
+    pass
+
+
+def parse_tag_ids(value):
+    """"3,7,7" → [3, 7] (ordenado, sem repetição)."""
+    try:
+        return sorted({int(part) for part in str(value or "").split(",") if part.strip()})
+    except ValueError:
+        raise TagFilterError("`tags` deve ser uma lista de IDs separados por vírgula.")
+
+
+def parse_tag_types(value):
+    types = sorted({part.strip() for part in str(value or "").split(",") if part.strip()})
+    invalid = [tag_type for tag_type in types if tag_type not in SupplyProductTagType.values]
+    if invalid:
+        raise TagFilterError(f"Tipo de tag inválido: {', '.join(invalid)}.")
+    return types
+
+
+def filter_by_tags(queryset, tag_ids=(), match="all", tag_types=()):
+    """
+    `match="all"`: itens com todas as tags (AND) — um GROUP BY na tabela de ligação com
+    HAVING COUNT = n. `match="any"`: itens com ao menos uma (OR) — EXISTS.
+    `tag_types`: itens com ao menos uma tag desses tipos.
+    """
+    if match not in TAG_MATCHES:
+        raise TagFilterError(f"`tag_match` deve ser {' ou '.join(TAG_MATCHES)}.")
+    if tag_ids:
+        links = TagLink.objects.filter(supplyproducttag_id__in=tag_ids)
+        if match == "any" or len(tag_ids) == 1:
+            queryset = queryset.filter(Exists(links.filter(supplyitem_id=OuterRef("pk"))))
+        else:
+            matching = (
+                links.values("supplyitem_id")
+                .annotate(matched=Count("supplyproducttag_id"))
+                .filter(matched=len(tag_ids))
+                .values("supplyitem_id")
+            )
+            queryset = queryset.filter(pk__in=matching)
+    if tag_types:
+        queryset = queryset.filter(Exists(
+            TagLink.objects.filter(supplyitem_id=OuterRef("pk"), supplyproducttag__tag_type__in=tag_types)
+        ))
+    return queryset
+
+
+def _signature(filters):
+    payload = json.dumps(filters, sort_keys=True, default=str)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def tag_facets(queryset, filters, tag_types=()):
+    """
+    Quantos itens do conjunto filtrado têm cada tag, agrupado por tipo — uma consulta
+    agrupada na tabela de ligação. Em cache pela assinatura dos filtros (`filters`, já
+    normalizados) e por uma versão invalidada quando itens ou tags mudam.
+    """
+    version = cache.get_or_set(FACETS_VERSION_CACHE_KEY, 1, timeout=None)
+    key = FACETS_CACHE_KEY.format(version=version, signature=_signature({**filters, "facet_types": tag_types}))
+    facets = cache.get(key)
+    if facets is not None:
+        return facets
+
+    links = TagLink.objects.filter(supplyitem_id__in=queryset.order_by().values("pk"))
+    if tag_types:
+        links = links.filter(supplyproducttag__tag_type__in=tag_types)
+    rows = (
+        links.values("supplyproducttag_id", "supplyproducttag__name", "supplyproducttag__tag_type")
+        .annotate(count=Count("supplyitem_id"))
+        .order_by("supplyproducttag__tag_type", "-count", "supplyproducttag__name")
+    )
+
+    labels = dict(SupplyProductTagType.choices)
+    groups = {}
+    for row in rows:
+        tag_type = row["supplyproducttag__tag_type"]
+        group = groups.setdefault(tag_type, {"tag_type": tag_type, "tag_type_display": labels.get(tag_type, tag_type), "tags": []})
+        group["tags"].append({"id": row["supplyproducttag_id"], "name": row["supplyproducttag__name"], "count": row["count"]})
+    facets = list(groups.values())
+    cache.set(key, facets, timeout=FACETS_TTL)
+    return facets
+
+
+def invalidate_tag_facets(sender=None, **kwargs):
+    """Receiver de post_save/post_delete/m2m_changed: troca a versão das facetas em cache."""
+    try:
+        cache.incr(FACETS_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(FACETS_VERSION_CACHE_KEY, 2, timeout=None)
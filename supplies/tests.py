@@ -1,3 +1,417 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cakes.models import Cake, CakeCategory, CakeRecipe, CakeRecipeLine
+from commons.units import UnitConversionError, conversion_factor, convert, parse_quantity
+from supplies.models import (
+    SupplyBatch, SupplyImage, SupplyIngredientDetail, SupplyItem, SupplyNutritionInfo,
+    SupplyProductTag, SupplyProductTagType, ImageType,
+)
+from supplies.services import importer
+from supplies.services.catalog import MAX_PAGE_SIZE
+from supplies.services.export import supply_export_queryset
+from supplies.services.search import RELEVANCE_ORDERING, order_by_relevance, search_supplies_queryset
+from supplies.views import SupplyItemListView
+from supplies.services.importer import ImportValidationError, import_supplies
+from supplies.services.nutrition import recipe_nutrition
 
-# Create your tests here.
+# itens (com nutrição, ingredientes e capa por JOIN) + lotes + tags — sem COUNT(*)
+LIST_QUERIES = 3
+# item (com JOINs) + lotes + tags
+RETRIEVE_QUERIES = 3
+
+
+class SupplyItemQueryBudgetTests(TestCase):
+    """O número de consultas das rotas de insumos não pode crescer com o tamanho da página."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = tags = [
+            SupplyProductTag.objects.create(name="Nacional", tag_type=SupplyProductTagType.CATALOG_CATEGORY),
+            SupplyProductTag.objects.create(name="Marca X", tag_type=SupplyProductTagType.BRAND),
+        ]
+        cls.items = []
+        for index in range(MAX_PAGE_SIZE + 5):
+            item = SupplyItem.objects.create(
+                sku=f"ITEM{index:04d}", name=f"Insumo {index:04d}", unit_of_measure="kg", category="base",
+            )
+            item.tags.set(tags)
+            for batch in range(2):
+                SupplyBatch.objects.create(
+                    supply_item=item, batch_code=f"L{batch}", quantity=1,
+                    expiration_date=date.today() + timedelta(days=batch + 1),
+                )
+            SupplyNutritionInfo.objects.create(supply_item=item, serving_size="100 g", calories=350)
+            SupplyIngredientDetail.objects.create(supply_item=item, ingredient_list="Trigo")
+            SupplyImage.objects.create(supply_item=item, image_type=ImageType.PRINCIPAL, is_cover=True)
+            cls.items.append(item)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assert_list_queries(self, page_size):
+        return self.assert_list_queries_with({"page_size": page_size})
+
+    def assert_list_queries_with(self, params):
+        with self.assertNumQueries(LIST_QUERIES):
+            response = self.client.get(reverse("supply-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_list_query_count_is_constant(self):
+        for page_size in (1, 10, 50):
+            data = self.assert_list_queries(page_size)
+            self.assertEqual(len(data["results"]), page_size)
+
+    def test_list_serializes_nested_data(self):
+        result = self.assert_list_queries(1)["results"][0]
+        self.assertEqual(len(result["batches"]), 2)
+        self.assertEqual(len(result["tags"]), 2)
+        self.assertEqual(result["nutrition_info"]["serving_size"], "100 g")
+        self.assertEqual(result["ingredient_detail"]["ingredient_list"], "Trigo")
+        self.assertEqual(result["image"], "/static/img/no-image.png")
+
+    def test_list_page_size_is_capped(self):
+        data = self.assert_list_queries(MAX_PAGE_SIZE * 10)
+        self.assertEqual(len(data["results"]), MAX_PAGE_SIZE)
+
+    def test_list_invalid_page_size_uses_default(self):
+        data = self.assert_list_queries("abc")
+        self.assertEqual(len(data["results"]), 10)
+
+    def test_list_with_filters_keeps_budget(self):
+        with self.assertNumQueries(LIST_QUERIES):
+            response = self.client.get(reverse("supply-list"), {"name": "Insumo 00", "category": "base", "page_size": 20})
+        self.assertEqual(len(response.json()["results"]), 20)
+
+    def test_cursor_pages_cost_the_same(self):
+        seen = []
+        params = {"page_size": 30}
+        while True:
+            data = self.assert_list_queries_with(params)
+            seen += [result["sku"] for result in data["results"]]
+            if not data["next"]:
+                break
+            params = {"page_size": 30, "cursor": data["next"]}
+        self.assertEqual(seen, sorted(item.sku for item in self.items))
+
+    def test_previous_cursor_returns_prior_page(self):
+        first = self.assert_list_queries_with({"page_size": 7})
+        self.assertIsNone(first["previous"])
+        second = self.assert_list_queries_with({"page_size": 7, "cursor": first["next"]})
+        back = self.assert_list_queries_with({"page_size": 7, "cursor": second["previous"]})
+        self.assertEqual(back["results"], first["results"])
+        self.assertEqual(back["next"], first["next"])
+
+    def test_descending_ordering(self):
+        data = self.assert_list_queries_with({"page_size": 3, "ordering": "-name"})
+        self.assertEqual([r["sku"] for r in data["results"]], [item.sku for item in self.items[::-1][:3]])
+
+    def test_forged_cursor_per_ordering_is_rejected(self):
+        orderings = {**{ordering: {} for ordering in SupplyItemListView.orderings}, "relevance": {"q": "insumo"}}
+        for ordering, params in orderings.items():
+            fields = SupplyItemListView.orderings.get(ordering, RELEVANCE_ORDERING)
+            payload = [["raw", ordering], ["raw", "n"], *[["raw", "nao-valido"]] * len(fields)]
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+            response = self.client.get(reverse("supply-list"), {**params, "ordering": ordering, "cursor": cursor})
+            self.assertEqual(response.status_code, 400, ordering)
+
+    def test_invalid_cursor_and_ordering_are_rejected(self):
+        first = self.client.get(reverse("supply-list"), {"page_size": 5}).json()
+        for params in ({"cursor": "lixo"}, {"cursor": first["next"], "ordering": "-name"}, {"ordering": "sku"}):
+            response = self.client.get(reverse("supply-list"), params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_count_is_opt_in(self):
+        self.assertIsNone(self.assert_list_queries(5)["count"])
+        with self.assertNumQueries(LIST_QUERIES + 1):
+            response = self.client.get(reverse("supply-list"), {"page_size": 5, "count": "exact"})
+        self.assertEqual(response.json()["count"], len(self.items))
+        with self.assertNumQueries(LIST_QUERIES + 1):
+            response = self.client.get(reverse("supply-list"), {"page_size": 5, "count": "estimate"})
+        self.assertIsInstance(response.json()["count"], int)
+
+    def test_tag_filters_keep_budget(self):
+        tag_ids = ",".join(str(tag.pk) for tag in self.tags)
+        for match in ("all", "any"):
+            data = self.assert_list_queries_with({"page_size": 50, "tags": tag_ids, "tag_match": match})
+            self.assertEqual(len(data["results"]), 50)
+        data = self.assert_list_queries_with({"tag_type": SupplyProductTagType.BRAND, "page_size": 5})
+        self.assertEqual(len(data["results"]), 5)
+        self.assertEqual(self.client.get(reverse("supply-list"), {"tags": "abc"}).status_code, 400)
+
+    def test_tag_facets_single_query(self):
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("supply-tag-facets"), {"tags": self.tags[0].pk})
+        counts = [tag["count"] for facet in response.json()["facets"] for tag in facet["tags"]]
+        self.assertEqual(counts, [len(self.items)] * 2)
+        with self.assertNumQueries(0):
+            self.client.get(reverse("supply-tag-facets"), {"tags": self.tags[0].pk})
+
+    def test_retrieve_query_count(self):
+        with self.assertNumQueries(RETRIEVE_QUERIES):
+            response = self.client.get(reverse("supply-detail", args=[self.items[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["batches"]), 2)
+
+    def test_retrieve_without_related_rows(self):
+        item = SupplyItem.objects.create(sku="VAZIO", name="Sem dados", unit_of_measure="un", category="other")
+        with self.assertNumQueries(RETRIEVE_QUERIES):
+            response = self.client.get(reverse("supply-detail", args=[item.pk]))
+        data = response.json()
+        self.assertIsNone(data["nutrition_info"])
+        self.assertIsNone(data["ingredient_detail"])
+        self.assertEqual(data["batches"], [])
+
+    def test_retrieve_inactive_item_is_not_found(self):
+        item = SupplyItem.objects.create(sku="INATIVO", name="Inativo", unit_of_measure="un", category="other", is_active=False)
+        response = self.client.get(reverse("supply-detail", args=[item.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class SupplyItemAdminQueryBudgetTests(TestCase):
+    """O changelist do admin anota a validade e traz capa/nutrição/ingredientes por JOIN."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "senha")
+
+    def create_items(self, count, offset=0):
+        for index in range(offset, offset + count):
+            item = SupplyItem.objects.create(sku=f"ADM{index:04d}", name=f"Admin {index}", unit_of_measure="kg", category="base")
+            SupplyBatch.objects.create(
+                supply_item=item, batch_code="L1", quantity=1, expiration_date=date.today() - timedelta(days=1),
+            )
+            SupplyNutritionInfo.objects.create(supply_item=item, serving_size="100 g", calories=350)
+            SupplyImage.objects.create(supply_item=item, image_type=ImageType.PRINCIPAL, is_cover=True)
+
+    def changelist_queries(self, params=None):
+        self.client.force_login(self.user)
+        self.client.get(reverse("admin:supplies_supplyitem_changelist"))  # aquece sessão/ContentTypes
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("admin:supplies_supplyitem_changelist"), params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries), response
+
+    def test_changelist_query_count_is_constant(self):
+        self.create_items(2)
+        few, _ = self.changelist_queries()
+        self.create_items(18, offset=2)
+        many, _ = self.changelist_queries()
+        self.assertEqual(few, many)
+
+    def test_expiration_filter_uses_annotation(self):
+        self.create_items(3)
+        _, response = self.changelist_queries({"status_validade": "expired"})
+        self.assertEqual(response.context["cl"].result_count, 3)
+        _, response = self.changelist_queries({"status_validade": "no_date"})
+        self.assertEqual(response.context["cl"].result_count, 0)
+
+
+class SupplyImportValidationTests(TestCase):
+    """Entradas que estourariam o banco voltam como erro de validação (400), não 500."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def row(self, sku="IMP001", quantity="5", **item):
+        return {
+            "supply_item": {"sku": sku, "name": "Importado", "unit_of_measure": "kg", "category": "base", **item},
+            "supply_batch": {"batch_code": "L1", "expiration_date": "2030-01-01", "quantity": quantity},
+        }
+
+    def test_batch_quantity_beyond_column_digits(self):
+        response = self.client.post(reverse("supply-item-with-batch"), [self.row(quantity="100000000")], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("supply_batch.quantity", response.json()["errors"][0]["errors"])
+        self.assertFalse(SupplyItem.objects.exists())
+
+    def test_unit_conversion_fields(self):
+        response = self.client.post(reverse("supply-item-with-batch"), [
+            self.row(sku="IMP010", density_g_per_ml="1,03", unit_weight_g=""),
+            self.row(sku="IMP011", density_g_per_ml="0", unit_weight_g="abc"),
+        ], format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual([error["index"] for error in errors], [1])
+        self.assertEqual(set(errors[0]["errors"]), {"density_g_per_ml", "unit_weight_g"})
+
+        response = self.client.post(reverse("supply-item-with-batch"), [
+            self.row(sku="IMP010", density_g_per_ml="1,03", unit_weight_g="50"),
+        ], format="json")
+        self.assertEqual(response.status_code, 201)
+        item = SupplyItem.objects.get(sku="IMP010")
+        self.assertEqual((str(item.density_g_per_ml), str(item.unit_weight_g)), ("1.0300", "50.000"))
+
+    def test_sku_created_concurrently(self):
+        validate = importer._validate
+
+        def validate_then_race(rows):
+            result = validate(rows)
+            SupplyItem.objects.create(sku="IMP001", name="Concorrente", unit_of_measure="kg", category="base")
+            return result
+
+        with mock.patch.object(importer, "_validate", side_effect=validate_then_race):
+            with self.assertRaises(ImportValidationError) as raised:
+                import_supplies([self.row()])
+        self.assertIn("sku", raised.exception.errors[0]["errors"])
+
+    def test_malformed_batch_is_a_row_error(self):
+        rows = [{**self.row(sku=f"IMP02{index}"), "supply_batch": batch} for index, batch in enumerate(["L1", ["L1"]])]
+        response = self.client.post(reverse("supply-item-with-batch"), rows, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([set(error["errors"]) for error in response.json()["errors"]], [{"supply_batch"}] * 2)
+
+    def test_command_rejects_non_object_lines(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as handle:
+            handle.write(json.dumps(self.row(sku="IMP003")) + "\n5\n")
+            handle.flush()
+            with self.assertRaisesMessage(CommandError, "Linha 2"):
+                call_command("import_supplies", handle.name, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_command_rejects_invalid_location(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as handle:
+            handle.write(json.dumps(self.row(sku="IMP002")) + "\n")
+            handle.flush()
+            with self.assertRaises(CommandError):
+                call_command("import_supplies", handle.name, location="nao-e-uuid", stderr=io.StringIO())
+        self.assertFalse(SupplyItem.objects.exists())
+
+
+class SupplyIncrementalExportTests(TestCase):
+    """`since` da exportação enxerga alterações feitas só nos filhos do insumo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.items = [
+            SupplyItem.objects.create(sku=f"EXP{index}", name=f"Exportado {index}", unit_of_measure="kg", category="base")
+            for index in range(3)
+        ]
+        cls.batch = SupplyBatch.objects.create(
+            supply_item=cls.items[0], batch_code="L1", quantity=1, expiration_date=date.today() + timedelta(days=30),
+        )
+        cls.nutrition = SupplyNutritionInfo.objects.create(supply_item=cls.items[1], serving_size="100 g", calories=100)
+        cls.tag = SupplyProductTag.objects.create(name="Orgânico", tag_type=SupplyProductTagType.BRAND)
+        cls.items[2].tags.add(cls.tag)
+
+    def changed_since(self, since):
+        return {item.sku for item in supply_export_queryset(since)}
+
+    def test_child_changes_mark_item(self):
+        since = timezone.now()
+        self.assertEqual(self.changed_since(since), set())
+        self.batch.quantity = 5
+        self.batch.save()
+        self.nutrition.calories = 120
+        self.nutrition.save()
+        self.tag.name = "Orgânico certificado"
+        self.tag.save()
+        self.assertEqual(self.changed_since(since), {"EXP0", "EXP1", "EXP2"})
+
+
+class UnitConversionTests(SimpleTestCase):
+    """Núcleo de conversão de unidades (commons/units.py): sem banco."""
+
+    def assert_converted(self, result, expected):
+        self.assertEqual([None if value != value else round(value, 6) for value in result.tolist()], expected)
+
+    def test_same_dimension_matrix(self):
+        self.assert_converted(
+            convert([1500, 2, 250, 1, 3], ["g", "kg", "ml", "l", "un"], ["kg", "g", "l", "ml", "un"]),
+            [1.5, 2000.0, 0.25, 1000.0, 3.0],
+        )
+
+    def test_across_dimensions_through_grams(self):
+        # ml → g e l → kg pela densidade; un → g e kg → un pelo peso da unidade
+        self.assert_converted(convert([200, 1], ["ml", "l"], ["g", "kg"], density=1.03), [206.0, 1.03])
+        self.assert_converted(convert([3, 1], ["un", "kg"], ["g", "un"], unit_weight=50), [150.0, 20.0])
+        self.assert_converted(convert([100, 100], "ml", "g", density=[1.2, None]), [120.0, None])
+
+    def test_without_conversion_is_nan(self):
+        self.assert_converted(convert([1, 1, 1], ["fatia", "ml", "un"], ["g", "g", "g"]), [None, None, None])
+        self.assertIsNone(conversion_factor("fatia", "un", unit_weight=50))
+        self.assertIsNone(conversion_factor("ml", "g"))
+        self.assertEqual(conversion_factor("kg", "g"), 1000.0)
+        with self.assertRaises(UnitConversionError):
+            convert([1], "xicara", "g")
+
+    def test_parse_quantity(self):
+        self.assertEqual(parse_quantity("1,5 kg"), (1.5, "kg"))
+        self.assertEqual(parse_quantity("200ml"), (200.0, "ml"))
+        self.assertEqual(parse_quantity("100 G"), (100.0, "g"))
+        for text in ("uma xícara", "2 xicaras", "", None):
+            self.assertIsNone(parse_quantity(text), text)
+
+
+class RecipeNutritionTests(TestCase):
+    """Tabela nutricional por bolo somada dos insumos, na unidade da porção de cada um."""
+
+    def test_per_cake_totals(self):
+        flour = SupplyItem.objects.create(sku="FAR", name="Farinha", unit_of_measure="g", category="base")
+        milk = SupplyItem.objects.create(
+            sku="LEI", name="Leite", unit_of_measure="ml", category="base", density_g_per_ml=Decimal("1.03"),
+        )
+        egg = SupplyItem.objects.create(sku="OVO", name="Ovo", unit_of_measure="un", category="base")
+        SupplyNutritionInfo.objects.create(supply_item=flour, serving_size="100 g", calories=350, protein=10)
+        SupplyNutritionInfo.objects.create(supply_item=milk, serving_size="100 g", calories=60)
+        cake = Cake.objects.create(name="Bolo", description="Teste", category=CakeCategory.choices[0][0])
+        recipe = CakeRecipe.objects.create(cake=cake, yield_quantity=2)
+        for supply, quantity in ((flour, "500"), (milk, "200"), (egg, "3")):
+            CakeRecipeLine.objects.create(recipe=recipe, supply_item=supply, quantity=Decimal(quantity))
+
+        result = recipe_nutrition([recipe.pk])[recipe.pk]
+        # Farinha: 500 g / 100 g × 350 / 2 = 875; leite: 200 ml × 1,03 = 206 g → 2,06 × 60 / 2 = 61,8
+        self.assertEqual(result["per_cake"]["calories"], 936.8)
+        self.assertEqual(result["per_cake"]["protein"], 25.0)
+        self.assertEqual(result["missing"], ["Ovo"])
+
+
+class SupplySearchTests(TestCase):
+    """Busca de insumos: sem acentos, tolerante a erros de digitação, por trecho do SKU e por relevância."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for sku, name, description in (
+            ("ACU001", "Açúcar Refinado", ""),
+            ("ACU002", "Açúcar Mascavo", ""),
+            ("FAR100", "Farinha de Trigo", "Mistura pronta com açúcar"),
+            ("CHO200", "Chocolate em Pó", ""),
+        ):
+            SupplyItem.objects.create(sku=sku, name=name, description=description, unit_of_measure="kg", category="base")
+
+    def search(self, term):
+        return [item.name for item in order_by_relevance(search_supplies_queryset(SupplyItem.objects.all(), term))]
+
+    def test_accent_insensitive(self):
+        self.assertEqual(set(self.search("acucar")), {"Açúcar Refinado", "Açúcar Mascavo", "Farinha de Trigo"})
+        self.assertEqual(self.search("ACUCAR REF")[0], "Açúcar Refinado")
+
+    def test_typo_tolerance(self):
+        self.assertIn("Chocolate em Pó", self.search("chocolte"))
+
+    def test_sku_substring(self):
+        self.assertEqual(set(self.search("u00")), {"Açúcar Refinado", "Açúcar Mascavo"})
+
+    def test_relevance_order(self):
+        # Nome (peso A) antes de descrição (peso C)
+        self.assertEqual(self.search("acucar")[-1], "Farinha de Trigo")
+
+    def test_save_keeps_search_vector_current(self):
+        item = SupplyItem.objects.get(sku="CHO200")
+        item.name = "Cacau em Pó"
+        item.save(update_fields=["name"])
+        self.assertEqual(self.search("cacau"), ["Cacau em Pó"])
@@ -10,11 +10,15 @@ from supplies.views import (
     SupplyItemWithBatchCreateView,
     SupplyNutritionInfoRetrieveView,
     SupplyNutritionInfoUpsertView,
-    SupplyNutritionInfoDeleteView 
+    SupplyNutritionInfoDeleteView,
+    SupplyCatalogExportView,
+    SupplyTagFacetsView,
 )
 
 urlpatterns = [
     path("", SupplyItemListView.as_view(), name="supply-list"),
+    path("facets/tags/", SupplyTagFacetsView.as_view(), name="supply-tag-facets"),
+    path("export/", SupplyCatalogExportView.as_view(), name="supply-export"),
     path("create/", SupplyItemCreateView.as_view(), name="supply-create"),
     path("<uuid:pk>/", SupplyItemRetrieveView.as_view(), name="supply-detail"),
     path("<uuid:pk>/update/", SupplyItemUpdateView.as_view(), name="supply-update"),
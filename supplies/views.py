@@ -4,7 +4,6 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import generics
 
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -13,70 +12,124 @@ from supplies.serializers import (
     SupplyItemSerializer,
     SupplyBatchSerializer,
     SupplyItemWithBatchSerializer,
-    BulkSupplyItemWithBatchSerializer,
     SupplyNutritionInfoSerializer 
 )
+from commons.pagination import CursorPaginatedView, ordering_choices
+from supplies.services.catalog import filter_supply_items, supply_item_queryset, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from supplies.services.search import RELEVANCE_ORDERING
+from supplies.services.tags import tag_facets, parse_tag_types, TagFilterError, TAG_MATCHES
+from supplies.services.importer import import_supplies, ImportValidationError, MAX_API_ROWS
+from supplies.services.export import iter_supply_records, SUPPLY_COLUMNS
+from commons.export import CONTENT_TYPES, ExportError, export_response, parse_since
+
+TAG_FILTER_PARAMETERS = [
+    openapi.Parameter("tags", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="IDs de tags separados por vírgula"),
+    openapi.Parameter("tag_match", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(TAG_MATCHES), description="all = todas as tags (padrão); any = qualquer uma"),
+    openapi.Parameter("tag_type", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Tipos de tag separados por vírgula (itens com alguma tag desses tipos)"),
+]
+
+
+class SupplyItemListView(CursorPaginatedView):
+    permission_classes = [AllowAny]
+    orderings = ordering_choices("name", "updated_at")
+    default_page_size = DEFAULT_PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
 
-class BasePaginatedView(APIView):
-    def paginate_queryset(self, queryset, request, serializer_class):
-        page = request.query_params.get("page", 1)
-        page_size = request.query_params.get("page_size", 10)
-        paginator = Paginator(queryset, page_size)
+    @swagger_auto_schema(
+        operation_summary="Listar suprimentos com filtros",
+        operation_description=(
+            "Permite buscar por nome, SKU ou categoria. `q` busca em nome, SKU, código de barras e "
+            "descrição ignorando acentos e tolerando erros de digitação, com os mais relevantes primeiro "
+            "(`ordering=relevance`, padrão quando há `q`). `tags` filtra por várias tags (`tag_match`=all/any) "
+            "e `tag_type` por tipos de tag. Paginação por cursor: use `next`/`previous` em `cursor`."
+        ),
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("name", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Mesmo que `q`"),
+            openapi.Parameter("sku", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("category", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            *TAG_FILTER_PARAMETERS,
+            openapi.Parameter("cursor", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description=f"Máximo {MAX_PAGE_SIZE}"),
+            openapi.Parameter(
+                "ordering", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                enum=[*ordering_choices("name", "updated_at"), "relevance"],
+            ),
+            openapi.Parameter("count", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=["estimate", "exact"]),
+        ],
+        tags=["supplies"]
+    )
+    def get(self, request):
         try:
-            paginated_items = paginator.page(page)
-        except (PageNotAnInteger, EmptyPage):
-            paginated_items = paginator.page(1)
+            queryset, _ = filter_supply_items(supply_item_queryset(), request.query_params)
+        except TagFilterError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        orderings, default_ordering = self.orderings, None
+        if "search_rank" in queryset.query.annotations:
+            orderings = {**self.orderings, "relevance": RELEVANCE_ORDERING}
+            default_ordering = "relevance"
 
-        serializer = serializer_class(paginated_items, many=True, context={"request": request})
-        return {
-            "count": paginator.count,
-            "next": paginated_items.next_page_number() if paginated_items.has_next() else None,
-            "previous": paginated_items.previous_page_number() if paginated_items.has_previous() else None,
-            "results": serializer.data,
-        }
+        return Response(self.paginate_queryset(
+            queryset, request, SupplyItemSerializer, orderings=orderings, default_ordering=default_ordering
+        ))
 
 
-class SupplyItemListView(APIView):
+EXPORT_PARAMETERS = [
+    openapi.Parameter("file_format", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(CONTENT_TYPES), description="Padrão: csv"),
+    openapi.Parameter("since", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Só registros alterados desde (ISO 8601)"),
+]
+
+
+class SupplyCatalogExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Exportar catálogo de insumos (CSV/NDJSON em streaming)",
+        operation_description=(
+            "Gera o catálogo completo — com lotes, tags, informação nutricional e ingredientes — "
+            "lido do banco em blocos. No CSV, lotes vão como JSON e tags como `tipo:nome` separadas por `|`."
+        ),
+        manual_parameters=EXPORT_PARAMETERS,
+        tags=["supplies"]
+    )
+    def get(self, request):
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in CONTENT_TYPES:
+            return Response({"detail": f"Formato inválido: {file_format}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            since = parse_since(request.query_params.get("since"))
+        except ExportError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        records = iter_supply_records(since=since, build_url=request.build_absolute_uri)
+        return export_response(records, file_format, SUPPLY_COLUMNS, "catalogo_insumos")
+
+
+class SupplyTagFacetsView(APIView):
     permission_classes = [AllowAny]
 
     @swagger_auto_schema(
-        operation_summary="Listar suprimentos com filtros",
-        operation_description="Permite buscar por nome, SKU ou categoria.",
+        operation_summary="Contagem de insumos por tag (facetas)",
+        operation_description=(
+            "Aceita os mesmos filtros da listagem e retorna, agrupado por tipo de tag, quantos insumos "
+            "ativos do resultado têm cada tag. `facet_types` limita os tipos retornados."
+        ),
         manual_parameters=[
-            openapi.Parameter("name", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING),
             openapi.Parameter("sku", openapi.IN_QUERY, type=openapi.TYPE_STRING),
             openapi.Parameter("category", openapi.IN_QUERY, type=openapi.TYPE_STRING),
-            openapi.Parameter("page", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
-            openapi.Parameter("page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            *TAG_FILTER_PARAMETERS,
+            openapi.Parameter("facet_types", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Tipos de tag a contar (vírgula)"),
         ],
         tags=["supplies"]
     )
     def get(self, request):
-        queryset = SupplyItem.objects.filter(is_active=True)
-        name = request.query_params.get("name")
-        sku = request.query_params.get("sku")
-        category = request.query_params.get("category")
-
-        if name:
-            queryset = queryset.filter(name__icontains=name)
-        if sku:
-            queryset = queryset.filter(sku__icontains=sku)
-        if category:
-            queryset = queryset.filter(category=category)
-
-        # Paginação simples
-        page = request.query_params.get("page", 1)
-        page_size = request.query_params.get("page_size", 10)
-        paginator = Paginator(queryset, page_size)
-        page_obj = paginator.get_page(page)
-        serializer = SupplyItemSerializer(page_obj, many=True, context={"request": request})
-
-        return Response({
-            "count": paginator.count,
-            "results": serializer.data,
-            "next": page_obj.next_page_number() if page_obj.has_next() else None,
-            "previous": page_obj.previous_page_number() if page_obj.has_previous() else None,
-        })
+        try:
+            queryset, filters = filter_supply_items(SupplyItem.objects.filter(is_active=True), request.query_params)
+            facet_types = parse_tag_types(request.query_params.get("facet_types"))
+        except TagFilterError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"facets": tag_facets(queryset, filters, facet_types)})
 
 
 class SupplyItemCreateView(APIView):
@@ -108,7 +161,7 @@ class SupplyItemRetrieveView(APIView):
     )
     def get(self, request, pk):
         try:
-            item = SupplyItem.objects.get(pk=pk, is_active=True)
+            item = supply_item_queryset().get(pk=pk)
             return Response(SupplyItemSerializer(item).data)
         except SupplyItem.DoesNotExist:
             return Response({"error": "Supply item not found"}, status=404)
@@ -216,7 +269,11 @@ class SupplyItemWithBatchCreateView(APIView):
 
     @swagger_auto_schema(
         operation_summary="Criar múltiplos itens com lote (opcional)",
-        operation_description="Cria itens de suprimentos com ou sem lote associado. Caso o item controle lote, o campo `supply_batch` é obrigatório.",
+        operation_description=(
+            "Cria itens de suprimentos com ou sem lote associado. Caso o item controle lote, o campo `supply_batch` é obrigatório. "
+            f"Até {MAX_API_ROWS} itens por envio, gravados em uma única transação (tudo ou nada); lotes recebidos "
+            "entram no estoque do primeiro local ativo."
+        ),
         request_body=SupplyItemWithBatchSerializer(many=True),
         responses={
             201: openapi.Response(description="Itens criados com sucesso"),
@@ -225,14 +282,20 @@ class SupplyItemWithBatchCreateView(APIView):
         tags=["supplies"]
     )
     def post(self, request):
-        serializer = SupplyItemWithBatchSerializer(
-            data=request.data,
-            many=True,
-            context={"request": request}
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response({"detail": "Itens criados com sucesso!"}, status=status.HTTP_201_CREATED)
+        if not isinstance(request.data, list) or not request.data:
+            return Response({"detail": "Envie uma lista de itens."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > MAX_API_ROWS:
+            return Response({"detail": f"Máximo de {MAX_API_ROWS} itens por envio."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = import_supplies(request.data)
+        except ImportValidationError as exc:
+            return Response({"detail": str(exc), "errors": exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "detail": "Itens criados com sucesso!",
+            "created": result["created"],
+            "batches": result["batches"],
+            "stock_entries": result["stock_entries"],
+        }, status=status.HTTP_201_CREATED)
 
 class SupplyNutritionInfoRetrieveView(APIView):
     permission_classes = [AllowAny]